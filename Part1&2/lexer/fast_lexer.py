@@ -0,0 +1,87 @@
+# fast_lexer.py
+# Single-regex scanner producing the same tokens as the PLY lexer in lexer.py.
+#
+# One compiled pattern finds each token together with the blanks and
+# comments in front of it, and the number of the group that matched gives the
+# token type from a table, so no per-token rule functions run. Words are
+# classified with one probe of a prebuilt word -> type table (a separate
+# regex alternative per keyword is several times slower in Python's regex
+# engine). Unlike run_lexer, it does not fill the debug symbol and literal
+# tables.
+import re
+
+from ply.lex import LexToken
+
+from tokens import reserved
+
+# rules after the leading blanks/comments, in match order (the PLY lexer's)
+_NEWLINE, _WORD, _INT, _STRING, _ERROR = 'newline', 'word', 'int', 'string', 'error'
+_RULES = [
+    (_NEWLINE, r'\n+'), (_WORD, r'[A-Za-z_][A-Za-z0-9_]*'), (_INT, r'\d+'), (_STRING, r'"[^"\n]*"'),
+    ('EQ', r'=='), ('NEQ', r'!='), ('SEMICOLON', r';'), ('COMMA', r','),
+    ('LPAREN', r'\('), ('RPAREN', r'\)'), ('LBRACE', r'\{'), ('RBRACE', r'\}'),
+    ('PLUS', r'\+'), ('MINUS', r'-'), ('LT', r'<'), ('GT', r'>'), ('ASSIGN', r'='),
+    (_ERROR, r'.'),
+]
+
+_PATTERN = re.compile(r'(?:[ \t]+|//[^\n]*)*(?:' + '|'.join(f'({regex})' for _, regex in _RULES) + ')')
+_GROUP_TYPES = [None] + [kind for kind, _ in _RULES]
+
+# word -> token type (reserved words; anything else is an ID)
+_WORD_TYPES = dict(reserved)
+
+
+class FastLexer:
+    """
+    Drop-in token source for the parser: input(text), then token() until None.
+    Illegal characters are printed, or added to `errors` if it is a list.
+    """
+
+    def __init__(self):
+        self.lineno = 1
+        self.lexpos = 0
+        self.errors = None
+        self._tokens = iter(())
+
+    def clone(self):
+        return FastLexer()
+
+    def input(self, text):
+        self._tokens = self._scan(text)
+
+    def token(self):
+        return next(self._tokens, None)
+
+    def __iter__(self):
+        return iter(self.token, None)
+
+    def _scan(self, text):
+        types = _GROUP_TYPES
+        word_types = _WORD_TYPES
+        for m in _PATTERN.finditer(text):
+            index = m.lastindex
+            kind = types[index]
+            value = m.group(index)
+            if kind == _NEWLINE:
+                self.lineno += len(value)
+                continue
+            if kind == _WORD:
+                kind = word_types.get(value, 'ID')
+            elif kind == _INT:
+                kind, value = 'INT_LIT', int(value)
+            elif kind == _STRING:
+                kind, value = 'STRING_LIT', value[1:-1]
+            elif kind == _ERROR:
+                message = f"[LEXICAL ERROR] Illegal character '{value}' at line {self.lineno}"
+                if self.errors is None:
+                    print(message)
+                else:
+                    self.errors.append(message)
+                continue
+            tok = LexToken()
+            tok.type = kind
+            tok.value = value
+            tok.lineno = self.lineno
+            tok.lexpos = self.lexpos = m.start(index)
+            tok.lexer = self
+            yield tok
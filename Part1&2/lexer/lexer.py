@@ -2,11 +2,15 @@
 import sys
 import ply.lex as lex
 from tokens import TOKEN_IDS, reserved, tokens
+from token_stream import write_token_stream
 import os
 
 # --------------------------------
 # Symbol and Literal Tables
 # --------------------------------
+# Filled by the shared `lexer` below (run_lexer prints them). The rules write
+# to the tables of the lexer that matched the token, so a lexer whose tables
+# are None (see parser.new_lexer) keeps none.
 symbol_table = {}    # Tracks identifiers and reserved words with their attributes
 literal_table = {}   # Tracks integer literals and their frequency
 
@@ -64,9 +68,10 @@ def t_ID(t):
     else:
         # This is a user-defined identifier
         t.type = 'ID'
-        if t.value not in symbol_table:
+        table = t.lexer.symbol_table
+        if table is not None and t.value not in table:
             # First time seeing this identifier - add to symbol table
-            symbol_table[t.value] = {'token': 'ID', 'kind': 'id'}
+            table[t.value] = {'token': 'ID', 'kind': 'id'}
     return t
 
 
@@ -82,7 +87,19 @@ def t_INT_LIT(t):
     """
     t.value = int(t.value)  # Convert from string to integer
     # Count occurrences of this literal value for analysis
-    literal_table[t.value] = literal_table.get(t.value, 0) + 1
+    table = t.lexer.literal_table
+    if table is not None:
+        table[t.value] = table.get(t.value, 0) + 1
+    return t
+
+
+def t_STRING_LIT(t):
+    r'"[^"\n]*"'
+    """
+    Match string literals: double quotes around anything but quotes and newlines.
+    No escapes; the token value is the text between the quotes.
+    """
+    t.value = t.value[1:-1]
     return t
 
 
@@ -112,16 +129,24 @@ def t_error(t):
     Handle lexical errors - called when no token rule matches.
     
     Logic:
-    1. Report the illegal character and its location
+    1. Report the illegal character and its location (printed, or added to
+       the lexer's `errors` list if it has one)
     2. Skip the problematic character to continue lexing
     3. This allows the lexer to recover from minor errors
     """
-    print(f"[LEXICAL ERROR] Illegal character '{t.value[0]}' at line {t.lexer.lineno}")
+    message = f"[LEXICAL ERROR] Illegal character '{t.value[0]}' at line {t.lexer.lineno}"
+    errors = getattr(t.lexer, 'errors', None)
+    if errors is None:
+        print(message)
+    else:
+        errors.append(message)
     t.lexer.skip(1)  # Skip one character and continue lexing
 
 
 # Build the lexer using PLY's lex engine
 lexer = lex.lex()
+lexer.symbol_table = symbol_table
+lexer.literal_table = literal_table
 
 # --------------------------------
 # Lexer driver - main interface
@@ -131,7 +156,7 @@ def run_lexer(filename: str):
     1. Read source code from file
     2. Feed source to lexer to generate tokens
     3. Process each token to create parser stream and debug output
-    4. Write token stream to file for parser consumption
+    4. Write token stream to file (text for reading, binary for the parser)
     5. Display debug information and symbol tables
     """
     with open(filename, 'r') as f:
@@ -142,6 +167,7 @@ def run_lexer(filename: str):
     
     token_lines = []  
     debug_lines = [] 
+    lexed = []
 
     # Process all tokens from the lexer
     while True:
@@ -159,6 +185,7 @@ def run_lexer(filename: str):
 
         token_lines.append(token_line)
         debug_lines.append(debug_line)
+        lexed.append(tok)
 
     base_name = os.path.basename(filename)        
     name_without_ext = os.path.splitext(base_name)[0]
@@ -166,6 +193,9 @@ def run_lexer(filename: str):
 
     with open(f'output/{stream_filename}', "w") as f:
         f.write("\n".join(token_lines))
+    # packed copy that parser.parse(stream=...) reads without re-lexing
+    binary_filename = f"{name_without_ext}_stream.bin"
+    write_token_stream(lexed, f'output/{binary_filename}')
 
     print("=== DEBUG OUTPUT (To Screen) ===")
     print("\n".join(debug_lines))
@@ -178,7 +208,7 @@ def run_lexer(filename: str):
     for val, count in sorted(literal_table.items()):
         print(f"{val:5} (occurrences: {count})")
 
-    print(f'\nToken stream written to output/{stream_filename}')
+    print(f'\nToken stream written to output/{stream_filename} and output/{binary_filename}')
 
 
 if __name__ == "__main__":
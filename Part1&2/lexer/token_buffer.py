@@ -0,0 +1,149 @@
+# token_buffer.py
+# Columnar token buffer: a whole program's tokens in parallel arrays instead
+# of one LexToken (plus value string) per token.
+#
+# Columns, one entry per token:
+#   ids      token id (uint8, from TOKEN_IDS)
+#   lines    line number
+#   starts   byte offset of the token in the UTF-8 source
+#   ends     byte offset just past it
+#   names    for ID tokens, index of the name in the string table
+# Identifier names are interned: each distinct name is decoded once into
+# `strings`. Every other value (numbers, string literals, keywords,
+# punctuation) is sliced from a memoryview of the source only when asked for.
+# Offsets count bytes, so they equal PLY's lexpos for ASCII programs.
+import re
+from array import array
+
+from ply.lex import LexToken
+
+from tokens import TOKEN_IDS, reserved
+from fast_lexer import _RULES, _NEWLINE, _WORD, _INT, _STRING, _ERROR
+
+# the fast lexer's rules over bytes; an illegal character is a whole UTF-8 sequence
+_PATTERN = re.compile(rb'(?:[ \t]+|//[^\n]*)*(?:' + b'|'.join(
+    b'(' + (rb'[\x00-\x7f]|[\xc0-\xff][\x80-\xbf]*' if kind == _ERROR else regex.encode()) + b')'
+    for kind, regex in _RULES) + b')')
+_GROUP_IDS = [None] + [TOKEN_IDS.get(kind, kind) for kind, _ in _RULES]
+
+_WORD_IDS = {word.encode(): TOKEN_IDS[kind] for word, kind in reserved.items()}
+_ID, _INT_LIT, _STRING_LIT = TOKEN_IDS['ID'], TOKEN_IDS['INT_LIT'], TOKEN_IDS['STRING_LIT']
+
+_TOKEN_NAMES = {token_id: name for name, token_id in TOKEN_IDS.items()}
+
+
+class TokenBuffer:
+    """
+    All tokens of one program, lexed up front into columns. Index it with
+    type(i) / value(i) / line(i), or use it as the parser's token source:
+    parse(stream=TokenBuffer(text)) (token() hands out LexTokens one at a time).
+    errors: a list to collect lexical errors in, as for the other lexers
+    (None prints them).
+    """
+
+    def __init__(self, text, errors=None):
+        self.source = memoryview(text.encode('utf-8') if isinstance(text, str) else text)
+        self.errors = errors
+        self.ids = array('B')
+        self.lines = array('I')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.names = array('I')
+        self.strings = []
+        self._scan()
+        self.rewind()
+
+    @classmethod
+    def from_file(cls, path, errors=None):
+        with open(path, 'rb') as f:
+            return cls(f.read(), errors)
+
+    def _scan(self):
+        ids, lines, starts, ends, names = self.ids, self.lines, self.starts, self.ends, self.names
+        group_ids, word_ids = _GROUP_IDS, _WORD_IDS
+        interned = {}
+        lineno = 1
+        for m in _PATTERN.finditer(self.source):
+            index = m.lastindex
+            token_id = group_ids[index]
+            name = 0
+            if token_id == _NEWLINE:
+                lineno += m.end() - m.start(index)
+                continue
+            if token_id == _WORD:
+                word = m.group(index)
+                token_id = word_ids.get(word, _ID)
+                if token_id == _ID:
+                    name = interned.get(word)
+                    if name is None:
+                        name = interned[word] = len(self.strings)
+                        self.strings.append(word.decode('ascii'))
+            elif token_id == _INT:
+                token_id = _INT_LIT
+            elif token_id == _STRING:
+                token_id = _STRING_LIT
+            elif token_id == _ERROR:
+                char = m.group(index).decode('utf-8', 'replace')
+                message = f"[LEXICAL ERROR] Illegal character '{char}' at line {lineno}"
+                if self.errors is None:
+                    print(message)
+                else:
+                    self.errors.append(message)
+                continue
+            ids.append(token_id)
+            lines.append(lineno)
+            starts.append(m.start(index))
+            ends.append(m.end())
+            names.append(name)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def type(self, i):
+        return _TOKEN_NAMES[self.ids[i]]
+
+    def line(self, i):
+        return self.lines[i]
+
+    def text(self, i):
+        """The token's source text."""
+        return str(self.source[self.starts[i]:self.ends[i]], 'utf-8')
+
+    def value(self, i):
+        """The token value the PLY lexer gives (int for numbers, no quotes on strings)."""
+        token_id = self.ids[i]
+        if token_id == _ID:
+            return self.strings[self.names[i]]
+        if token_id == _INT_LIT:
+            return int(bytes(self.source[self.starts[i]:self.ends[i]]))
+        if token_id == _STRING_LIT:
+            return str(self.source[self.starts[i] + 1:self.ends[i] - 1], 'utf-8')
+        return self.text(i)
+
+    # ---------- PLY token source ----------
+
+    def rewind(self):
+        self._next = 0
+        # position of the last token handed out; PLY reads these for empty productions
+        self.lineno = 1
+        self.lexpos = 0
+
+    def input(self, text):
+        raise TypeError("A TokenBuffer is already lexed; parse it without input text")
+
+    def token(self):
+        i = self._next
+        if i >= len(self.ids):
+            return None
+        self._next = i + 1
+        tok = LexToken()
+        tok.type = _TOKEN_NAMES[self.ids[i]]
+        tok.value = self.value(i)
+        tok.lineno = self.lineno = self.lines[i]
+        tok.lexpos = self.lexpos = self.starts[i]
+        tok.lexer = self
+        return tok
+
+    def __iter__(self):
+        self.rewind()
+        return iter(self.token, None)
@@ -0,0 +1,118 @@
+# token_stream.py
+# Packed binary token streams: lex a program once, then parse it any number
+# of times (in any process) straight from the stream.
+#
+# Layout (little-endian):
+#   MAGIC
+#   string count, token count             (two uint32)
+#   string table: per string, uint32 byte length + UTF-8 bytes
+#   tokens: one fixed 13-byte record each
+#       token id (uint8, from TOKEN_IDS), line, position in the source,
+#       index of the token text in the string table (uint32 each)
+# Every distinct token text is stored once; keywords and repeated names
+# share their entry.
+import struct
+
+from ply.lex import LexToken
+
+from tokens import TOKEN_IDS
+
+MAGIC = b'CWTS\x01'
+_COUNTS = struct.Struct('<II')
+_LENGTH = struct.Struct('<I')
+_RECORD = struct.Struct('<BIII')
+
+_TOKEN_NAMES = {token_id: name for name, token_id in TOKEN_IDS.items()}
+
+
+def encode_tokens(tokens):
+    """Pack PLY tokens (e.g. from lexer.token()) into token stream bytes."""
+    strings = {}
+    records = bytearray()
+    for tok in tokens:
+        text = str(tok.value)
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        records += _RECORD.pack(TOKEN_IDS[tok.type], tok.lineno, tok.lexpos, index)
+    out = bytearray(MAGIC)
+    out += _COUNTS.pack(len(strings), len(records) // _RECORD.size)
+    for text in strings:
+        encoded = text.encode('utf-8')
+        out += _LENGTH.pack(len(encoded)) + encoded
+    out += records
+    return bytes(out)
+
+
+def lex_to_stream(lexer, text):
+    """Lex `text` with a PLY lexer and return the token stream bytes."""
+    lexer.lineno = 1
+    lexer.input(text)
+    return encode_tokens(iter(lexer.token, None))
+
+
+def write_token_stream(tokens, path):
+    with open(path, 'wb') as f:
+        f.write(encode_tokens(tokens))
+
+
+class TokenStream:
+    """
+    PLY token source over token stream bytes: pass it as the lexer, e.g.
+    parser.parse(lexer=TokenStream.load(path), tracking=True).
+    rewind() starts it over for another parse.
+    """
+
+    def __init__(self, data):
+        data = memoryview(data)
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a token stream")
+        pos = len(MAGIC)
+        string_count, self.count = _COUNTS.unpack_from(data, pos)
+        pos += _COUNTS.size
+        self.strings = []
+        for _ in range(string_count):
+            (length,) = _LENGTH.unpack_from(data, pos)
+            pos += _LENGTH.size
+            self.strings.append(str(data[pos:pos + length], 'utf-8'))
+            pos += length
+        self.records = data[pos:pos + self.count * _RECORD.size]
+        if len(self.records) != self.count * _RECORD.size:
+            raise ValueError("Truncated token stream")
+        self.rewind()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def rewind(self):
+        self._records = _RECORD.iter_unpack(self.records)
+        # position of the last token handed out; PLY reads these for empty productions
+        self.lineno = 1
+        self.lexpos = 0
+
+    def input(self, text):
+        raise TypeError("A TokenStream is already lexed; parse it without input text")
+
+    def token(self):
+        record = next(self._records, None)
+        if record is None:
+            return None
+        token_id, lineno, lexpos, index = record
+        tok = LexToken()
+        tok.type = _TOKEN_NAMES[token_id]
+        tok.value = self.strings[index]
+        if tok.type == 'INT_LIT':
+            tok.value = int(tok.value)
+        tok.lineno = self.lineno = lineno
+        tok.lexpos = self.lexpos = lexpos
+        tok.lexer = self
+        return tok
+
+    def __iter__(self):
+        self.rewind()
+        return iter(self.token, None)
+
+    def __len__(self):
+        return self.count
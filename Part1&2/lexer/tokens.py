@@ -4,7 +4,8 @@
 TOKEN_IDS = {
     # World & Agent
     'WORLD': 1, 'AGENT': 2, 'SIZE': 3, 'ENTRY_DEF': 4, 'EXIT_DEF': 5,
-    'OBSTACLE_DEF': 6, 'DIRT_DEF': 7,
+    'OBSTACLE_DEF': 6, 'DIRT_DEF': 7, 'OBSTACLE_RECT': 61, 'DIRT_RECT': 62,
+    'OBSTACLE_RANDOM': 63, 'DIRT_RANDOM': 64, 'MAP_FILE': 65,
 
     # Directions
     'N': 8, 'E': 9, 'S': 10, 'W': 11,
@@ -15,9 +16,11 @@ TOKEN_IDS = {
 
     # Actions
     'MOVE': 20, 'TURN': 21, 'LEFT': 22, 'RIGHT': 23, 'CLEAN': 24, 'BACKTRACK': 25, 'REPORT': 55,
+    'GOTO_DIRT': 56, 'GOTO_EXIT': 57,
 
     # Sensors / Conditions
     'SENSE': 26, 'DIRT': 27, 'OBSTACLE': 28, 'UNVISITED': 29, 'ENTRY': 30, 'EXIT': 31,
+    'DIRT_COUNT': 58, 'DIRT_DIST': 59, 'DIRT_DIR': 60,
 
     # Functions
     'FUNC': 32, 'RETURNS': 33, 'RETURN': 34,
@@ -36,7 +39,7 @@ TOKEN_IDS = {
     'COMMA': 51, 'SEMICOLON': 52,
 
     # Literals & IDs
-    'INT_LIT': 53, 'ID': 54
+    'INT_LIT': 53, 'ID': 54, 'STRING_LIT': 66
 }
 
 # --------------------------------
@@ -0,0 +1,297 @@
+# incremental.py -- region-cached front end (lexer + parser + semantic analyzer)
+#
+# The source is split into its WORLD, FUNC and AGENT regions. Tokens and CST
+# are cached per region by content, so an edit re-lexes and re-parses only
+# the regions whose text changed. Semantic results are cached per region
+# together with the signatures of the functions it refers to, so a function
+# is only re-checked when its own text or one of those signatures changes.
+# The results match SemanticAnalyzer.analyze on the whole file: the same AST
+# and errors (syntax errors with their line numbers), and the cost profile.
+
+import re
+
+import ply.yacc as yacc
+
+import parser.parser as parser_module
+from parser.parser import CSTNode, parse_with_errors
+from semantics_analyzer.ast_nodes import Program
+from semantics_analyzer.cost import estimate_cost
+from semantics_analyzer.semantic import SemanticAnalyzer, function_signature
+
+# start symbol of the grammar used to parse each region kind on its own
+REGION_START = {'WORLD': 'world_def', 'FUNC': 'function_decl', 'AGENT': 'agent_def'}
+
+_REGION_KEYWORD = re.compile(r'(WORLD|FUNC|AGENT)(?![A-Za-z0-9_])')
+
+# LR parsers for region start symbols, built on first use
+_region_parsers = {}
+
+
+class Region:
+    """One top-level WORLD/FUNC/AGENT block of a source file."""
+    def __init__(self, kind, text, line):
+        self.kind = kind
+        self.text = text
+        self.line = line  # line number the region starts on
+
+
+class _RegionEntry:
+    """Cached front-end results for one region text."""
+    def __init__(self, tokens, cst, line, errors=()):
+        self.tokens = tokens
+        self.cst = cst
+        self.errors = list(errors)  # syntax errors (cst is None if there are any)
+        self.line = line           # line the cached CST line numbers are based on
+        self.refs = _referenced_names(cst)
+
+
+class _TokenList:
+    """Feeds a list of already lexed tokens to a PLY parser."""
+    def __init__(self, tokens, lineno=1):
+        self._it = iter(tokens)
+        # position of the last token handed out; PLY reads these for empty productions
+        self.lineno = lineno
+        self.lexpos = 0
+
+    def token(self):
+        tok = next(self._it, None)
+        if tok is not None:
+            self.lineno, self.lexpos = tok.lineno, tok.lexpos
+        return tok
+
+
+def split_regions(text):
+    """
+    Split source text into Regions, skipping whitespace and comments between
+    them. Returns None if the text does not consist of whole top-level blocks.
+    """
+    regions = []
+    i, n, line = 0, len(text), 1
+    while i < n:
+        c = text[i]
+        if c == '\n':
+            line += 1
+            i += 1
+        elif c in ' \t\r':
+            i += 1
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+        else:
+            m = _REGION_KEYWORD.match(text, i)
+            if not m:
+                return None
+            start, start_line, depth = i, line, 0
+            while i < n:
+                c = text[i]
+                if c == '\n':
+                    line += 1
+                elif c == '/' and text.startswith('//', i):
+                    end = text.find('\n', i)
+                    i = n if end < 0 else end
+                    continue
+                elif c == '{':
+                    depth += 1
+                elif c == '}':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+            if i >= n or depth != 0:
+                return None
+            i += 1
+            regions.append(Region(m.group(1), text[start:i], start_line))
+    return regions
+
+
+def _referenced_names(cst):
+    """Identifiers and called function names used inside a CST subtree."""
+    names = set()
+    pending = [cst] if cst is not None else []
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, CSTNode):
+            continue
+        if node.type in ('identifier', 'function_call', 'assign'):
+            names.add(node.value)
+        pending.extend(node.children)
+    return names
+
+
+def _shift_lines(cst, delta):
+    """Move every line number of a cached CST by `delta` lines."""
+    pending = [cst]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, CSTNode):
+            continue
+        if node.lineno is not None:
+            node.lineno += delta
+        pending.extend(node.children)
+
+
+def _region_parser(kind):
+    start = REGION_START[kind]
+    if start not in _region_parsers:
+        _region_parsers[start] = yacc.yacc(module=parser_module, start=start, write_tables=False,
+                                           debug=False, errorlog=yacc.NullLogger())
+    return _region_parsers[start]
+
+
+class IncrementalFrontEnd:
+    """
+    Keeps per-region caches between calls to analyze().
+    After each call, `stats` holds how many regions were seen, re-parsed and
+    re-analyzed, and `cost_profile` the program's static cost profile (None
+    if there were errors), as SemanticAnalyzer.cost_profile. Only entries used
+    by the latest call are kept.
+    """
+
+    def __init__(self):
+        self._lexer = parser_module.new_lexer()
+        self._regions = {}    # (kind, text) -> _RegionEntry
+        self._analyses = {}   # (kind, text, dependency signatures) -> (ast, errors)
+        self.stats = {'regions': 0, 'reparsed': 0, 'reanalyzed': 0, 'full': False}
+        self.cost_profile = None
+
+    def analyze_file(self, filename):
+        with open(filename, 'r') as f:
+            return self.analyze(f.read())
+
+    def analyze(self, text):
+        """
+        Return (cst, ast, errors) for source text, reusing cached regions.
+        With syntax errors, cst and ast are None and errors lists every one.
+        """
+        self.stats = {'regions': 0, 'reparsed': 0, 'reanalyzed': 0, 'full': False}
+        self.cost_profile = None
+        regions = split_regions(text)
+        if not self._well_formed(regions):
+            return self._analyze_full(text)
+        self.stats['regions'] = len(regions)
+
+        # Front half: tokens + CST per region
+        used = {}
+        entries = []
+        syntax_errors = []
+        for region in regions:
+            key = (region.kind, region.text)
+            entry = used.get(key) or self._regions.get(key)
+            if entry is None:
+                entry = self._parse_region(region)
+                self.stats['reparsed'] += 1
+                if entry.cst is None:
+                    # keep going, so every region's errors are reported at once
+                    syntax_errors.extend(entry.errors or [f"Syntax error in {region.kind} block "
+                                                          f"starting at line {region.line}"])
+                    continue
+            elif entry.line != region.line:
+                _shift_lines(entry.cst, region.line - entry.line)
+                entry.line = region.line
+            used[key] = entry
+            entries.append((region, entry))
+        self._regions = used
+        if syntax_errors:
+            return None, None, syntax_errors
+
+        world_cst = entries[0][1].cst
+        func_csts = [entry.cst for _, entry in entries[1:-1]]
+        agent_cst = entries[-1][1].cst
+        if func_csts:
+            funcs_node = CSTNode('function_list', func_csts, lineno=func_csts[0].lineno)
+        else:
+            funcs_node = CSTNode('function_list_opt', [])
+        cst = CSTNode('program', [world_cst, funcs_node, agent_cst], lineno=world_cst.lineno)
+
+        # Back half: semantic analysis per region
+        registry = SemanticAnalyzer()
+        registry._register_functions(func_csts)
+        errors = list(registry.errors)
+        globals_scope = registry.symtab.scopes[0]
+
+        used_analyses = {}
+        world_ast = self._cached_analysis(('WORLD', entries[0][0].text), used_analyses,
+                                          lambda sa: sa._transform_world(world_cst), globals_scope)[0]
+        ast_funcs = []
+        for region, entry in entries[1:-1]:
+            name, params, ret_type = function_signature(entry.cst)
+            key = ('FUNC', region.text, self._dependency_signatures(entry.refs, globals_scope))
+            f_cst = entry.cst
+            ast_func, func_errors = self._cached_analysis(
+                key, used_analyses,
+                lambda sa, f_cst=f_cst, name=name, params=params, ret_type=ret_type:
+                    sa._analyze_function(f_cst, name, params, ret_type),
+                globals_scope)
+            ast_funcs.append(ast_func)
+            errors.extend(func_errors)
+
+        agent_region, agent_entry = entries[-1]
+        key = ('AGENT', agent_region.text, self._dependency_signatures(agent_entry.refs, globals_scope))
+        agent_ast, agent_errors = self._cached_analysis(key, used_analyses,
+                                                        lambda sa: sa._analyze_agent(agent_cst), globals_scope)
+        errors.extend(agent_errors)
+        self._analyses = used_analyses
+
+        # purity and world requirements depend on all regions together; recomputed every time (cheap)
+        registry._classify_purity(ast_funcs)
+        program = Program(world_ast, ast_funcs, agent_ast)
+        checked = len(registry.errors)
+        registry._check_world_requirements(program)
+        errors.extend(registry.errors[checked:])
+        if not errors:
+            self.cost_profile = estimate_cost(program)
+        return cst, program, errors
+
+    def _well_formed(self, regions):
+        if not regions or len(regions) < 2:
+            return False
+        kinds = [r.kind for r in regions]
+        return kinds[0] == 'WORLD' and kinds[-1] == 'AGENT' and all(k == 'FUNC' for k in kinds[1:-1])
+
+    def _parse_region(self, region):
+        """Lex and parse a single region with the parser for its start symbol."""
+        self._lexer.lineno = region.line
+        self._lexer.input(region.text)
+        tokens = []
+        while True:
+            tok = self._lexer.token()
+            if not tok:
+                break
+            tokens.append(tok)
+        # the grammar recovers from syntax errors; a region with any is not used
+        cst, errors = parser_module.collect_syntax_errors(
+            lambda: _region_parser(region.kind).parse(lexer=_TokenList(tokens, region.line), tracking=True))
+        if errors:
+            cst = None
+        return _RegionEntry(tokens, cst, region.line, errors)
+
+    def _dependency_signatures(self, refs, globals_scope):
+        """Global declarations (function signatures) a region's analysis depends on."""
+        deps = []
+        for name in sorted(refs):
+            info = globals_scope.get(name)
+            deps.append((name, None if info is None else (tuple(info['params']), info['ret'])))
+        return tuple(deps)
+
+    def _cached_analysis(self, key, used, analyze, globals_scope):
+        """Return (ast, errors) for a region, running `analyze` only on a cache miss."""
+        result = used.get(key) or self._analyses.get(key)
+        if result is None:
+            sa = SemanticAnalyzer()
+            sa.symtab.scopes[0] = dict(globals_scope)
+            result = (analyze(sa), list(sa.errors))
+            self.stats['reanalyzed'] += 1
+        used[key] = result
+        return result
+
+    def _analyze_full(self, text):
+        """Fallback for sources that are not plain WORLD/FUNC*/AGENT blocks."""
+        self.stats['full'] = True
+        self._regions, self._analyses = {}, {}
+        cst, errors = parse_with_errors(text=text, lexer=self._lexer)
+        if cst is None or errors:
+            return None, None, errors or ["Syntax error"]
+        analyzer = SemanticAnalyzer()
+        ast, errors = analyzer.analyze(cst)
+        self.cost_profile = analyzer.cost_profile
+        return cst, ast, errors
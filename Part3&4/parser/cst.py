@@ -0,0 +1,33 @@
+# cst.py
+# ---------- CST node ----------
+# shared by the LALR parser (parser.py) and the recursive-descent one (descent.py)
+class CSTNode:
+    def __init__(self, node_type, children=None, value=None, lineno=None):
+        self.type = node_type        # Node category (e.g., 'program', 'expr', 'stmt')
+        self.children = children if children is not None else []
+        self.value = value           # Semantic value (for literals, identifiers, coordinates)
+        self.lineno = lineno         # Source line number for better debugging (I hope we never need it)
+        
+    def add_child(self, child):
+        if child is not None:
+            self.children.append(child)
+            
+    def __repr__(self, level=0):
+        indent = '  ' * level
+        result = f"{indent}{self.type}"
+        
+        if self.value is not None:
+            result += f": {self.value}"
+            
+        if self.lineno is not None:
+            result += f" [line {self.lineno}]"
+            
+        result += "\n"
+        
+        for child in self.children:
+            if isinstance(child, CSTNode):
+                result += child.__repr__(level + 1)
+            else:
+                result += f"{indent}  {repr(child)}\n"
+                
+        return result
@@ -0,0 +1,375 @@
+# descent.py
+# Hand-written recursive-descent parser for the grammar in Part1&2/BNF.txt.
+#
+# It builds exactly the CSTs the PLY grammar in parser.py builds (same node
+# types, values, children and line numbers) and reports syntax errors the
+# same way, but needs no parse tables: nothing is generated or written, and
+# there is no grammar action call per reduction. Lists are collected in
+# loops rather than by right recursion.
+#
+# Error recovery matches the grammar's 'error SEMICOLON' rules: a statement
+# or world statement with a syntax error is skipped up to its ';' and stands
+# as an error_stmt / error_decl node. As in the LALR parser, a statement list
+# followed by the wrong closing keyword is dropped and parsing resumes with a
+# new list at its start; errors outside any list, or at the end of input,
+# end the parse. PLY instead discards input and restarts from whatever
+# state it can, so after such an error it may report further errors (and
+# occasionally salvage a CST) where this parser stops at the first one.
+#
+# Two places follow the LALR parser's conflict resolution rather than the
+# usual precedence:
+# - AND and OR have the same precedence and group to the right, and NOT
+#   applies to the whole condition after it (PLY shifts on those conflicts):
+#       NOT a AND b OR c  ==  NOT (a AND (b OR c))
+# - PLUS/MINUS expressions are right-nested (expr : term PLUS expr):
+#       a - b - c  ==  a - (b - c)
+try:
+    from .cst import CSTNode
+except ImportError:  # loaded as a top-level module from its own folder
+    from cst import CSTNode
+
+_WORLD_STMTS = {
+    'SIZE': ('size_decl', 2), 'OBSTACLE_DEF': ('obstacle_decl', 2), 'DIRT_DEF': ('dirt_decl', 2),
+    'OBSTACLE_RECT': ('obstacle_rect_decl', 4), 'DIRT_RECT': ('dirt_rect_decl', 4),
+    'OBSTACLE_RANDOM': ('obstacle_random_decl', 2), 'DIRT_RANDOM': ('dirt_random_decl', 2),
+}
+_SIMPLE_STMTS = {'MOVE': ('move_stmt', None), 'CLEAN': ('clean_stmt', None),
+                 'BACKTRACK': ('backtrack_stmt', None),
+                 'GOTO_DIRT': ('goto_stmt', 'DIRT'), 'GOTO_EXIT': ('goto_stmt', 'EXIT')}
+_STMT_START = {'VAR', 'ID', 'IF', 'WHILE', 'TURN', 'REPORT', 'RETURN'} | set(_SIMPLE_STMTS)
+# tokens a statement list may end at (in any context, as in the LALR tables)
+_STMT_LIST_END = {'RBRACE', 'ELSE', 'ENDIF', 'ENDWHILE'}
+_EXPR_START = {'ID', 'INT_LIT', 'DIRT_COUNT', 'DIRT_DIST', 'DIRT_DIR'}
+_SENSES = {'DIRT': 'dirt_sense', 'OBSTACLE': 'obstacle_sense', 'EXIT': 'exit_sense', 'ENTRY': 'entry_sense'}
+_RELOPS = {'EQ': 'eq_op', 'NEQ': 'neq_op', 'LT': 'lt_op', 'GT': 'gt_op'}
+_DIRECTIONS = ('N', 'E', 'S', 'W')
+
+
+class _SyntaxError(Exception):
+    pass
+
+
+class DescentParser:
+    """
+    parse(lexer) reads tokens with lexer.token() and returns the program CST,
+    or None if it could not recover from a syntax error; the messages of all
+    syntax errors found are left in `errors`.
+    """
+
+    def parse(self, lexer):
+        self.lexer = lexer
+        self.errors = []
+        self.ahead = []  # tokens read past the current one
+        self.tok = lexer.token()
+        try:
+            program = self._program()
+            if self.tok is not None:
+                self._error()
+        except _SyntaxError:
+            return None
+        return program
+
+    # ---------- token handling ----------
+
+    def _advance(self):
+        tok = self.tok
+        self.tok = self.ahead.pop(0) if self.ahead else self.lexer.token()
+        return tok
+
+    def _peek(self):
+        """The token after the current one."""
+        if not self.ahead:
+            self.ahead.append(self.lexer.token())
+        return self.ahead[0]
+
+    def _at(self, kind):
+        return self.tok is not None and self.tok.type == kind
+
+    def _expect(self, kind):
+        if not self._at(kind):
+            self._error()
+        return self._advance()
+
+    def _error(self):
+        # same message as parser.p_error
+        tok = self.tok
+        if tok:
+            self.errors.append(f"Syntax error at token {tok.type} (value={tok.value!r}) "
+                               f"line={getattr(tok, 'lineno', '?')}")
+        else:
+            self.errors.append("Syntax error at EOF")
+        raise _SyntaxError()
+
+    def _skip_statement(self, node_type, line):
+        """
+        Recover from a syntax error: drop tokens through the next ';' (EOF ends
+        the parse). `line` is where the dropped input started, which PLY gives
+        the error symbol.
+        """
+        while self.tok is not None and self.tok.type != 'SEMICOLON':
+            self._advance()
+        if self.tok is None:
+            raise _SyntaxError()
+        self._advance()
+        return CSTNode(node_type, lineno=line)
+
+    def _recovering(self, parse, node_type):
+        line = self.tok.lineno if self.tok is not None else None
+        try:
+            return parse()
+        except _SyntaxError:
+            return self._skip_statement(node_type, line)
+
+    # ---------- program structure ----------
+
+    def _program(self):
+        world = self._world_def()
+        functions = self._function_list_opt()
+        agent = self._agent_def()
+        return CSTNode('program', [world, functions, agent], lineno=world.lineno)
+
+    def _function_list_opt(self):
+        if not self._at('FUNC'):
+            return CSTNode('function_list_opt', [])
+        decls = []
+        while self._at('FUNC'):
+            decls.append(self._function_decl())
+        return CSTNode('function_list', decls, lineno=decls[0].lineno)
+
+    def _function_decl(self):
+        line = self._expect('FUNC').lineno
+        name = self._expect('ID').value
+        self._expect('LPAREN')
+        params = self._param_list_opt()
+        self._expect('RPAREN')
+        self._expect('RETURNS')
+        if self._at('TYPE_INT'):
+            ret = CSTNode('type', value='int', lineno=self._advance().lineno)
+        elif self._at('TYPE_VOID'):
+            ret = CSTNode('type', value='void', lineno=self._advance().lineno)
+        else:
+            self._error()
+        self._expect('LBRACE')
+        body = self._block('RBRACE')
+        return CSTNode('function_decl', [params, ret, body], value=name, lineno=line)
+
+    def _param_list_opt(self):
+        if not self._at('ID'):
+            return CSTNode('param_list_opt', [])
+        params = []
+        while True:
+            tok = self._expect('ID')
+            params.append(CSTNode('param_decl', value=tok.value, lineno=tok.lineno))
+            if not self._at('COMMA'):
+                break
+            self._advance()
+        return CSTNode('param_list', params, lineno=params[0].lineno)
+
+    def _world_def(self):
+        line = self._expect('WORLD').lineno
+        name = self._expect('ID').value
+        self._expect('LBRACE')
+        stmts = [self._recovering(self._world_stmt, 'error_decl')]
+        while self.tok is not None and self.tok.type != 'RBRACE':
+            stmts.append(self._recovering(self._world_stmt, 'error_decl'))
+        self._expect('RBRACE')
+        return CSTNode('world_def', [CSTNode('world_body', stmts, lineno=stmts[0].lineno)],
+                       value=name, lineno=line)
+
+    def _world_stmt(self):
+        kind = self.tok.type if self.tok is not None else None
+        if kind in _WORLD_STMTS:
+            node_type, count = _WORLD_STMTS[kind]
+            line = self._advance().lineno
+            self._expect('LPAREN')
+            values = [self._expect('INT_LIT').value]
+            for _ in range(count - 1):
+                self._expect('COMMA')
+                values.append(self._expect('INT_LIT').value)
+            self._expect('RPAREN')
+            self._expect('SEMICOLON')
+            return CSTNode(node_type, value=tuple(values), lineno=line)
+        if kind in ('ENTRY_DEF', 'EXIT_DEF'):
+            line = self._advance().lineno
+            self._expect('LPAREN')
+            x = self._expect('INT_LIT').value
+            self._expect('COMMA')
+            y = self._expect('INT_LIT').value
+            self._expect('COMMA')
+            if self.tok is None or self.tok.type not in _DIRECTIONS:
+                self._error()
+            direction = self._advance().type
+            self._expect('RPAREN')
+            self._expect('SEMICOLON')
+            return CSTNode('entry_decl' if kind == 'ENTRY_DEF' else 'exit_decl',
+                           value=(x, y, direction), lineno=line)
+        if kind == 'MAP_FILE':
+            line = self._advance().lineno
+            self._expect('LPAREN')
+            path = self._expect('STRING_LIT').value
+            self._expect('RPAREN')
+            self._expect('SEMICOLON')
+            return CSTNode('map_decl', value=path, lineno=line)
+        self._error()
+
+    def _agent_def(self):
+        line = self._expect('AGENT').lineno
+        name = self._expect('ID').value
+        self._expect('LBRACE')
+        body = self._block('RBRACE')
+        return CSTNode('agent_def', [body], value=name, lineno=line)
+
+    # ---------- statements ----------
+
+    def _stmt_list(self, first=None):
+        stmts = [first or self._recovering(self._stmt, 'error_stmt')]
+        while self.tok is not None and self.tok.type not in _STMT_LIST_END:
+            stmts.append(self._recovering(self._stmt, 'error_stmt'))
+        return CSTNode('stmt_list', stmts, lineno=stmts[0].lineno)
+
+    def _block(self, *closers):
+        """A stmt_list and the tokens that close it (e.g. ENDWHILE ;)."""
+        body = self._stmt_list()
+        while True:
+            try:
+                for kind in closers:
+                    self._expect(kind)
+                return body
+            except _SyntaxError:
+                if self.tok is None:
+                    raise
+                # the LALR parser drops the list and starts a new one here
+                body = self._stmt_list(self._skip_statement('error_stmt', body.lineno))
+
+    def _stmt(self):
+        kind = self.tok.type if self.tok is not None else None
+        if kind in _SIMPLE_STMTS:
+            node_type, value = _SIMPLE_STMTS[kind]
+            line = self._advance().lineno
+            self._expect('SEMICOLON')
+            return CSTNode(node_type, value=value, lineno=line)
+        if kind == 'VAR':
+            line = self._advance().lineno
+            name = self._expect('ID').value
+            self._expect('ASSIGN')
+            expr = self._expr()
+            self._expect('SEMICOLON')
+            return CSTNode('var_decl', [expr], value=name, lineno=line)
+        if kind == 'ID':
+            following = self._peek()
+            if following is not None and following.type == 'ASSIGN':
+                tok = self._advance()
+                self._advance()
+                expr = self._expr()
+                self._expect('SEMICOLON')
+                return CSTNode('assign', [expr], value=tok.value, lineno=tok.lineno)
+            if following is not None and following.type == 'LPAREN':
+                call = self._function_call()
+                self._expect('SEMICOLON')
+                return CSTNode('call_stmt', [call], lineno=call.lineno)
+            self._advance()
+            self._error()
+        if kind == 'IF':
+            line = self._advance().lineno
+            condition = self._condition()
+            self._expect('THEN')
+            then_branch = self._block('ELSE')
+            else_branch = self._block('ENDIF', 'SEMICOLON')
+            return CSTNode('if_stmt', [condition, then_branch, else_branch], lineno=line)
+        if kind == 'WHILE':
+            line = self._advance().lineno
+            condition = self._condition()
+            self._expect('DO')
+            body = self._block('ENDWHILE', 'SEMICOLON')
+            return CSTNode('while_stmt', [condition, body], lineno=line)
+        if kind == 'TURN':
+            line = self._advance().lineno
+            if self._at('LEFT'):
+                direction = CSTNode('left_dir', value='LEFT', lineno=self._advance().lineno)
+            elif self._at('RIGHT'):
+                direction = CSTNode('right_dir', value='RIGHT', lineno=self._advance().lineno)
+            else:
+                self._error()
+            self._expect('SEMICOLON')
+            return CSTNode('turn_stmt', [direction], lineno=line)
+        if kind in ('REPORT', 'RETURN'):
+            line = self._advance().lineno
+            expr = self._expr()
+            self._expect('SEMICOLON')
+            return CSTNode('report_stmt' if kind == 'REPORT' else 'return_stmt', [expr], lineno=line)
+        self._error()
+
+    def _function_call(self):
+        tok = self._expect('ID')
+        self._expect('LPAREN')
+        if self.tok is not None and self.tok.type in _EXPR_START:
+            line = self.tok.lineno
+            exprs = [self._expr()]
+            while self._at('COMMA'):
+                self._advance()
+                exprs.append(self._expr())
+            args = CSTNode('arg_list', exprs, lineno=line)
+        else:
+            args = CSTNode('arg_list_opt', [])
+        self._expect('RPAREN')
+        return CSTNode('function_call', [args], value=tok.value, lineno=tok.lineno)
+
+    # ---------- conditions and expressions ----------
+
+    def _condition(self):
+        if self.tok is None:
+            self._error()
+        line = self.tok.lineno
+        if self._at('NOT'):
+            self._advance()
+            return CSTNode('not_condition', [self._condition()], lineno=line)
+        left = self._condition_atom()
+        if self._at('AND') or self._at('OR'):
+            node_type = 'and_condition' if self._advance().type == 'AND' else 'or_condition'
+            return CSTNode(node_type, [left, self._condition()], lineno=line)
+        return left
+
+    def _condition_atom(self):
+        line = self.tok.lineno
+        if self._at('SENSE'):
+            self._advance()
+            if self.tok is None or self.tok.type not in _SENSES:
+                self._error()
+            sense = self._advance()
+            return CSTNode('sense_condition', [CSTNode(_SENSES[sense.type], value=sense.type, lineno=sense.lineno)],
+                           lineno=line)
+        if self._at('UNVISITED'):
+            self._advance()
+            return CSTNode('unvisited_condition', lineno=line)
+        left = self._expr()
+        if self.tok is None or self.tok.type not in _RELOPS:
+            self._error()
+        op = self._advance()
+        relop = CSTNode(_RELOPS[op.type], value=op.type, lineno=op.lineno)
+        return CSTNode('relop_condition', [left, relop, self._expr()], lineno=line)
+
+    def _expr(self):
+        term = self._term()
+        if self._at('PLUS') or self._at('MINUS'):
+            op = self._advance()
+            if op.type == 'PLUS':
+                return CSTNode('plus_expr', [term, self._expr()], value='+', lineno=op.lineno)
+            return CSTNode('minus_expr', [term, self._expr()], value='-', lineno=op.lineno)
+        return term
+
+    def _term(self):
+        tok = self.tok
+        kind = tok.type if tok is not None else None
+        if kind == 'ID':
+            following = self._peek()
+            if following is not None and following.type == 'LPAREN':
+                return self._function_call()
+            self._advance()
+            return CSTNode('identifier', value=tok.value, lineno=tok.lineno)
+        if kind == 'INT_LIT':
+            self._advance()
+            return CSTNode('integer_literal', value=tok.value, lineno=tok.lineno)
+        if kind in ('DIRT_COUNT', 'DIRT_DIST', 'DIRT_DIR'):
+            self._advance()
+            return CSTNode('dirt_query', value=tok.value[len('DIRT_'):], lineno=tok.lineno)
+        self._error()
@@ -1,45 +1,24 @@
 # parser.py
 import ply.yacc as yacc
 from collections import deque
+import copy
 import sys
 import os
+import threading
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../Part1&2/lexer'))
 
 import lexer as lexer_module
 from tokens import tokens
-
-# ---------- CST node ----------
-class CSTNode:
-    def __init__(self, node_type, children=None, value=None, lineno=None):
-        self.type = node_type        # Node category (e.g., 'program', 'expr', 'stmt')
-        self.children = children if children is not None else []
-        self.value = value           # Semantic value (for literals, identifiers, coordinates)
-        self.lineno = lineno         # Source line number for better debugging (I hope we never need it)
-        
-    def add_child(self, child):
-        if child is not None:
-            self.children.append(child)
-            
-    def __repr__(self, level=0):
-        indent = '  ' * level
-        result = f"{indent}{self.type}"
-        
-        if self.value is not None:
-            result += f": {self.value}"
-            
-        if self.lineno is not None:
-            result += f" [line {self.lineno}]"
-            
-        result += "\n"
-        
-        for child in self.children:
-            if isinstance(child, CSTNode):
-                result += child.__repr__(level + 1)
-            else:
-                result += f"{indent}  {repr(child)}\n"
-                
-        return result
+from token_stream import TokenStream
+from token_buffer import TokenBuffer
+from fast_lexer import FastLexer
+try:
+    from .cst import CSTNode
+    from .descent import DescentParser
+except ImportError:  # loaded as a top-level module from its own folder
+    from cst import CSTNode
+    from descent import DescentParser
 
 # ---------- Grammar arithmetic rules ----------
 """
@@ -69,6 +48,10 @@ def p_function_list(p):
     'function_list : function_decl'
     p[0] = CSTNode('function_list', [p[1]], lineno=p.lineno(1))
 
+def p_function_list_more(p):
+    'function_list : function_decl function_list'
+    p[0] = CSTNode('function_list', [p[1]] + p[2].children, lineno=p.lineno(1))
+
 # function_decl: FUNC ID '(' param_list_opt ')' RETURNS type '{' stmt_list '}'
 def p_function_decl(p):
     "function_decl : FUNC ID LPAREN param_list_opt RPAREN RETURNS type LBRACE stmt_list RBRACE"
@@ -142,6 +125,33 @@ def p_world_stmt_dirt(p):
     'world_stmt : DIRT_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON'
     p[0] = CSTNode('dirt_decl', value=(p[3], p[5]), lineno=p.lineno(1))
 
+def p_world_stmt_obstacle_rect(p):
+    'world_stmt : OBSTACLE_RECT LPAREN INT_LIT COMMA INT_LIT COMMA INT_LIT COMMA INT_LIT RPAREN SEMICOLON'
+    p[0] = CSTNode('obstacle_rect_decl', value=(p[3], p[5], p[7], p[9]), lineno=p.lineno(1))
+
+def p_world_stmt_dirt_rect(p):
+    'world_stmt : DIRT_RECT LPAREN INT_LIT COMMA INT_LIT COMMA INT_LIT COMMA INT_LIT RPAREN SEMICOLON'
+    p[0] = CSTNode('dirt_rect_decl', value=(p[3], p[5], p[7], p[9]), lineno=p.lineno(1))
+
+def p_world_stmt_obstacle_random(p):
+    'world_stmt : OBSTACLE_RANDOM LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON'
+    p[0] = CSTNode('obstacle_random_decl', value=(p[3], p[5]), lineno=p.lineno(1))
+
+def p_world_stmt_dirt_random(p):
+    'world_stmt : DIRT_RANDOM LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON'
+    p[0] = CSTNode('dirt_random_decl', value=(p[3], p[5]), lineno=p.lineno(1))
+
+# error recovery: skip a malformed world statement up to its ';' and keep
+# parsing, so one pass finds every syntax error (see parse_with_errors)
+def p_world_stmt_error(p):
+    'world_stmt : error SEMICOLON'
+    p[0] = CSTNode('error_decl', lineno=p.lineno(1))
+    p.parser.errok()
+
+def p_world_stmt_map_file(p):
+    'world_stmt : MAP_FILE LPAREN STRING_LIT RPAREN SEMICOLON'
+    p[0] = CSTNode('map_decl', value=p[3], lineno=p.lineno(1))
+
 # agent definition
 def p_agent_def(p):
     'agent_def : AGENT ID LBRACE stmt_list RBRACE'
@@ -189,6 +199,14 @@ def p_stmt_backtrack(p):
     'stmt : BACKTRACK SEMICOLON'
     p[0] = CSTNode('backtrack_stmt', lineno=p.lineno(1))
 
+def p_stmt_goto_dirt(p):
+    'stmt : GOTO_DIRT SEMICOLON'
+    p[0] = CSTNode('goto_stmt', value='DIRT', lineno=p.lineno(1))
+
+def p_stmt_goto_exit(p):
+    'stmt : GOTO_EXIT SEMICOLON'
+    p[0] = CSTNode('goto_stmt', value='EXIT', lineno=p.lineno(1))
+
 def p_stmt_report(p):
     'stmt : REPORT expr SEMICOLON'
     p[0] = CSTNode('report_stmt', [p[2]], lineno=p.lineno(1))
@@ -201,6 +219,12 @@ def p_stmt_function_call(p):
     'stmt : function_call SEMICOLON'
     p[0] = CSTNode('call_stmt', [p[1]], lineno=p.lineno(1))
 
+# error recovery, as for world statements
+def p_stmt_error(p):
+    'stmt : error SEMICOLON'
+    p[0] = CSTNode('error_stmt', lineno=p.lineno(1))
+    p.parser.errok()
+
 # turn direction
 def p_turn_dir_left(p):
     'turn_dir : LEFT'
@@ -315,6 +339,12 @@ def p_term_call(p):
     'term : function_call'
     p[0] = p[1]
 
+def p_term_dirt_query(p):
+    '''term : DIRT_COUNT
+            | DIRT_DIST
+            | DIRT_DIR'''
+    p[0] = CSTNode('dirt_query', value=p[1][len('DIRT_'):], lineno=p.lineno(1))
+
 # dir (for ENTRY/EXIT)
 def p_dir_n(p):
     'dir : N'
@@ -333,29 +363,73 @@ def p_dir_w(p):
     p[0] = CSTNode('direction', value='W', lineno=p.lineno(1))
 
 # error handling
+# syntax errors of the parse running on this thread (see collect_syntax_errors);
+# outside of one they are printed
+_error_sink = threading.local()
+
+def report_syntax_error(message):
+    errors = getattr(_error_sink, 'errors', None)
+    if errors is None:
+        print(message)
+    else:
+        errors.append(message)
+
+def collect_syntax_errors(run):
+    """Call run() and return (its result, the syntax errors reported while it ran)."""
+    outer = getattr(_error_sink, 'errors', None)
+    _error_sink.errors = errors = []
+    try:
+        result = run()
+    finally:
+        _error_sink.errors = outer
+    return result, errors
+
 def p_error(p):
+    # recovery continues after this (error rules above), so no tokens are read here
     if p:
-        print(f"Syntax error at token {p.type} (value={p.value!r}) line={getattr(p, 'lineno', '?')}")
-        # Debug: show the next few tokens to understand context
-        print("Next tokens for debugging:")
-        for i in range(5):
-            tok = lexer.token()
-            if tok:
-                print(f"  {tok.type}: {tok.value}")
-            else:
-                print("  No more tokens")
-                break
+        report_syntax_error(f"Syntax error at token {p.type} (value={p.value!r}) line={getattr(p, 'lineno', '?')}")
     else:
-        print("Syntax error at EOF")
+        report_syntax_error("Syntax error at EOF")
 
-# create lexer instance
+# create lexer instance (shared by parse() calls that pass no lexer)
 lexer = lexer_module.lexer
 
-# build the parser
-parser = yacc.yacc()
-
-def write_cst_to_file(cst, filename):
-    """Write the Concrete Syntax Tree to output file"""
+# the LALR parser is built (or its tables loaded from parsetab.py) on first use
+parser = None
+_parser_lock = threading.Lock()
+
+def _lalr_parser():
+    global parser
+    with _parser_lock:
+        if parser is None:
+            parser = yacc.yacc()
+    return parser
+
+def new_lalr_parser():
+    """
+    A parser of its own for one thread: PLY keeps the state of a running parse
+    on the parser object, so concurrent parses each need one. The parse tables
+    are shared (read-only), so this is cheap.
+    """
+    return copy.copy(_lalr_parser())
+
+def new_lexer(scanner='ply'):
+    """
+    A lexer of its own for one thread ('ply': same rules as the shared one).
+    Neither kind fills the debug symbol and literal tables, so a lexer used
+    for many parses does not grow and threads share no mutable state.
+    """
+    if scanner == 'fast':
+        return FastLexer()
+    if scanner == 'ply':
+        clone = lexer_module.lexer.clone()
+        clone.symbol_table = clone.literal_table = None
+        return clone
+    raise ValueError(f"Unknown scanner: {scanner}")
+
+
+def write_cst_to_file(cst, filename, quiet=False):
+    """Write the Concrete Syntax Tree to output file (quiet: do not print its path)"""
     base_name = os.path.basename(filename)
     name_without_ext = os.path.splitext(base_name)[0]
     
@@ -372,22 +446,65 @@ def write_cst_to_file(cst, filename):
         f.write("=" * 50 + "\n")
         f.write(str(cst))
     
-    print(f"CST written to: {cst_filename}")
+    if not quiet:
+        print(f"CST written to: {cst_filename}")
     return cst_filename
 
 # convenience parse function
-def parse(text=None, filename=None):
+def _parse_tokens(source, engine, lalr_parser=None):
+    if engine == 'descent':
+        descent = DescentParser()
+        cst = descent.parse(source)
+        for message in descent.errors:
+            report_syntax_error(message)
+        return cst
+    return (lalr_parser or _lalr_parser()).parse(lexer=source, tracking=True)
+
+def parse_with_errors(text=None, filename=None, stream=None, scanner='ply', engine='lalr',
+                      lexer=None, lalr_parser=None):
+    """
+    Parse and return (cst, errors): every syntax error found in one pass, and
+    the CST with an error_stmt / error_decl node for each statement skipped.
+    cst is None when the parser could not recover (e.g. at end of input).
+    lexer / lalr_parser: instances to use instead of the lexer `scanner`
+    selects and the shared parser (see new_lexer and new_lalr_parser); threads
+    parsing at once need their own.
+    """
+    return collect_syntax_errors(lambda: _parse(text, filename, stream, scanner, engine, lexer, lalr_parser))
+
+def parse(text=None, filename=None, stream=None, scanner='ply', engine='lalr'):
+    # the CST, or None (after printing the syntax errors) if there are any
+    cst, errors = parse_with_errors(text, filename, stream, scanner, engine)
+    for message in errors:
+        print(message)
+    if errors:
+        return None
+    if filename and cst:
+        write_cst_to_file(cst, filename)
+    return cst
+
+def _parse(text, filename, stream, scanner, engine, source=None, lalr_parser=None):
+    # engine: 'lalr' (PLY yacc, the grammar above) or 'descent' (descent.py:
+    # same CSTs, no parse tables built or written)
+    if engine not in ('lalr', 'descent'):
+        raise ValueError(f"Unknown parser engine: {engine}")
+    # stream: a TokenStream or TokenBuffer, or the path of a token stream
+    # written by the lexer (*_stream.bin)
+    if stream is not None:
+        if not isinstance(stream, (TokenStream, TokenBuffer)):
+            stream = TokenStream.load(stream)
+        stream.rewind()
+        return _parse_tokens(stream, engine, lalr_parser)
+    # scanner: 'ply' (the shared lexer.py lexer) or 'fast' (fast_lexer.py,
+    # same tokens), unless a lexer was passed in
+    if source is None:
+        source = lexer if scanner == 'ply' else new_lexer(scanner)
+    # line numbers restart for every program parsed with the shared lexer
+    source.lineno = 1
     if filename:
         with open(filename, 'r') as f:
             text = f.read()
-        
-        cst = parser.parse(text, lexer=lexer, tracking=True)
-        
-        if cst:
-            write_cst_to_file(cst, filename)
-        
-        return cst
-    elif text is not None:
-        return parser.parse(text, lexer=lexer, tracking=True)
-    else:
-        raise ValueError("provide text or filename")
+    elif text is None:
+        raise ValueError("provide text, filename or stream")
+    source.input(text)
+    return _parse_tokens(source, engine, lalr_parser)
@@ -6,9 +6,9 @@ _tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = 'leftPLUSMINUSAGENT AND ASSIGN BACKTRACK CLEAN COMMA DIRT DIRT_DEF DO E ELSE ENDIF ENDWHILE ENTRY ENTRY_DEF EQ EXIT EXIT_DEF FUNC GT ID IF INT_LIT LBRACE LEFT LPAREN LT MINUS MOVE N NEQ NOT OBSTACLE OBSTACLE_DEF OR PLUS RBRACE REPORT RETURN RETURNS RIGHT RPAREN S SEMICOLON SENSE SIZE THEN TURN TYPE_INT TYPE_VOID UNVISITED VAR W WHILE WORLDprogram : world_def function_list_opt agent_deffunction_list_opt :function_list_opt : function_listfunction_list : function_declfunction_decl : FUNC ID LPAREN param_list_opt RPAREN RETURNS type LBRACE stmt_list RBRACEparam_list_opt :param_list_opt : param_listparam_list : param_declparam_list : param_decl COMMA param_listparam_decl : IDtype : TYPE_INTtype : TYPE_VOIDworld_def : WORLD ID LBRACE world_body RBRACEworld_body : world_stmtworld_body : world_stmt world_bodyworld_stmt : SIZE LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : ENTRY_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLONworld_stmt : EXIT_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLONworld_stmt : OBSTACLE_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : DIRT_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONagent_def : AGENT ID LBRACE stmt_list RBRACEstmt_list : stmtstmt_list : stmt stmt_liststmt : VAR ID ASSIGN expr SEMICOLONstmt : ID ASSIGN expr SEMICOLONstmt : IF condition THEN stmt_list ELSE stmt_list ENDIF SEMICOLONstmt : WHILE condition DO stmt_list ENDWHILE SEMICOLONstmt : MOVE SEMICOLONstmt : TURN turn_dir SEMICOLONstmt : CLEAN SEMICOLONstmt : BACKTRACK SEMICOLONstmt : REPORT expr SEMICOLONstmt : RETURN expr SEMICOLONstmt : function_call SEMICOLONturn_dir : LEFTturn_dir : RIGHTfunction_call : ID LPAREN arg_list_opt RPARENarg_list_opt :arg_list_opt : arg_listarg_list : exprarg_list : expr COMMA arg_listcondition : SENSE sense_exprcondition : NOT conditioncondition : condition AND conditioncondition : condition OR conditioncondition : expr relop exprcondition : UNVISITEDsense_expr : DIRTsense_expr : OBSTACLEsense_expr : EXITsense_expr : ENTRYrelop : EQrelop : NEQrelop : LTrelop : GTexpr : term PLUS exprexpr : term MINUS exprexpr : termterm : IDterm : INT_LITterm : function_calldir : Ndir : Edir : Sdir : W'
+_lr_signature = 'leftPLUSMINUSAGENT AND ASSIGN BACKTRACK CLEAN COMMA DIRT DIRT_COUNT DIRT_DEF DIRT_DIR DIRT_DIST DIRT_RANDOM DIRT_RECT DO E ELSE ENDIF ENDWHILE ENTRY ENTRY_DEF EQ EXIT EXIT_DEF FUNC GOTO_DIRT GOTO_EXIT GT ID IF INT_LIT LBRACE LEFT LPAREN LT MAP_FILE MINUS MOVE N NEQ NOT OBSTACLE OBSTACLE_DEF OBSTACLE_RANDOM OBSTACLE_RECT OR PLUS RBRACE REPORT RETURN RETURNS RIGHT RPAREN S SEMICOLON SENSE SIZE STRING_LIT THEN TURN TYPE_INT TYPE_VOID UNVISITED VAR W WHILE WORLDprogram : world_def function_list_opt agent_deffunction_list_opt :function_list_opt : function_listfunction_list : function_declfunction_list : function_decl function_listfunction_decl : FUNC ID LPAREN param_list_opt RPAREN RETURNS type LBRACE stmt_list RBRACEparam_list_opt :param_list_opt : param_listparam_list : param_declparam_list : param_decl COMMA param_listparam_decl : IDtype : TYPE_INTtype : TYPE_VOIDworld_def : WORLD ID LBRACE world_body RBRACEworld_body : world_stmtworld_body : world_stmt world_bodyworld_stmt : SIZE LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : ENTRY_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLONworld_stmt : EXIT_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLONworld_stmt : OBSTACLE_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : DIRT_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : OBSTACLE_RECT LPAREN INT_LIT COMMA INT_LIT COMMA INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : DIRT_RECT LPAREN INT_LIT COMMA INT_LIT COMMA INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : OBSTACLE_RANDOM LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : DIRT_RANDOM LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLONworld_stmt : error SEMICOLONworld_stmt : MAP_FILE LPAREN STRING_LIT RPAREN SEMICOLONagent_def : AGENT ID LBRACE stmt_list RBRACEstmt_list : stmtstmt_list : stmt stmt_liststmt : VAR ID ASSIGN expr SEMICOLONstmt : ID ASSIGN expr SEMICOLONstmt : IF condition THEN stmt_list ELSE stmt_list ENDIF SEMICOLONstmt : WHILE condition DO stmt_list ENDWHILE SEMICOLONstmt : MOVE SEMICOLONstmt : TURN turn_dir SEMICOLONstmt : CLEAN SEMICOLONstmt : BACKTRACK SEMICOLONstmt : GOTO_DIRT SEMICOLONstmt : GOTO_EXIT SEMICOLONstmt : REPORT expr SEMICOLONstmt : RETURN expr SEMICOLONstmt : function_call SEMICOLONstmt : error SEMICOLONturn_dir : LEFTturn_dir : RIGHTfunction_call : ID LPAREN arg_list_opt RPARENarg_list_opt :arg_list_opt : arg_listarg_list : exprarg_list : expr COMMA arg_listcondition : SENSE sense_exprcondition : NOT conditioncondition : condition AND conditioncondition : condition OR conditioncondition : expr relop exprcondition : UNVISITEDsense_expr : DIRTsense_expr : OBSTACLEsense_expr : EXITsense_expr : ENTRYrelop : EQrelop : NEQrelop : LTrelop : GTexpr : term PLUS exprexpr : term MINUS exprexpr : termterm : IDterm : INT_LITterm : function_callterm : DIRT_COUNT\n            | DIRT_DIST\n            | DIRT_DIRdir : Ndir : Edir : Sdir : W'
     
-_lr_action_items = {'WORLD':([0,],[3,]),'$end':([1,9,56,],[0,-1,-21,]),'AGENT':([2,4,5,6,27,151,],[-2,10,-3,-4,-13,-5,]),'FUNC':([2,27,],[7,-13,]),'ID':([3,7,10,14,22,36,37,38,39,44,45,48,54,55,61,69,73,74,77,89,90,91,92,99,100,101,102,103,104,105,106,107,108,109,118,120,129,136,137,150,157,],[8,11,13,23,34,34,58,65,65,65,65,23,65,65,65,-28,-30,-31,-34,65,34,65,65,65,-52,-53,-54,-55,65,65,34,-29,-32,-33,-25,65,34,-24,34,-27,-26,]),'LBRACE':([8,13,110,111,112,],[12,22,129,-11,-12,]),'LPAREN':([11,17,18,19,20,21,34,65,],[14,29,30,31,32,33,55,55,]),'SIZE':([12,16,140,147,148,155,156,],[17,17,-16,-19,-20,-17,-18,]),'ENTRY_DEF':([12,16,140,147,148,155,156,],[18,18,-16,-19,-20,-17,-18,]),'EXIT_DEF':([12,16,140,147,148,155,156,],[19,19,-16,-19,-20,-17,-18,]),'OBSTACLE_DEF':([12,16,140,147,148,155,156,],[20,20,-16,-19,-20,-17,-18,]),'DIRT_DEF':([12,16,140,147,148,155,156,],[21,21,-16,-19,-20,-17,-18,]),'RPAREN':([14,23,24,25,26,55,64,65,66,67,79,86,87,88,113,116,117,119,126,127,135,141,142,143,144,145,146,],[-6,-10,47,-7,-8,-38,-58,-59,-60,-61,-9,119,-39,-40,130,133,134,-37,-56,-57,-41,152,-62,-63,-64,-65,153,]),'RBRACE':([15,16,28,35,36,57,69,73,74,77,107,108,109,118,136,139,140,147,148,150,155,156,157,],[27,-14,-15,56,-22,-23,-28,-30,-31,-34,-29,-32,-33,-25,-24,151,-16,-19,-20,-27,-17,-18,-26,]),'VAR':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[37,37,-28,-30,-31,-34,37,37,-29,-32,-33,-25,37,-24,37,-27,-26,]),'IF':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[38,38,-28,-30,-31,-34,38,38,-29,-32,-33,-25,38,-24,38,-27,-26,]),'WHILE':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[39,39,-28,-30,-31,-34,39,39,-29,-32,-33,-25,39,-24,39,-27,-26,]),'MOVE':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[40,40,-28,-30,-31,-34,40,40,-29,-32,-33,-25,40,-24,40,-27,-26,]),'TURN':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[41,41,-28,-30,-31,-34,41,41,-29,-32,-33,-25,41,-24,41,-27,-26,]),'CLEAN':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[42,42,-28,-30,-31,-34,42,42,-29,-32,-33,-25,42,-24,42,-27,-26,]),'BACKTRACK':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[43,43,-28,-30,-31,-34,43,43,-29,-32,-33,-25,43,-24,43,-27,-26,]),'REPORT':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[44,44,-28,-30,-31,-34,44,44,-29,-32,-33,-25,44,-24,44,-27,-26,]),'RETURN':([22,36,69,73,74,77,90,106,107,108,109,118,129,136,137,150,157,],[45,45,-28,-30,-31,-34,45,45,-29,-32,-33,-25,45,-24,45,-27,-26,]),'COMMA':([23,26,49,50,51,52,53,64,65,66,67,88,114,115,119,126,127,],[-10,48,80,81,82,83,84,-58,-59,-60,-61,120,131,132,-37,-56,-57,]),'INT_LIT':([29,30,31,32,33,38,39,44,45,54,55,61,80,81,82,83,84,89,91,92,99,100,101,102,103,104,105,120,],[49,50,51,52,53,66,66,66,66,66,66,66,113,114,115,116,117,66,66,66,66,-52,-53,-54,-55,66,66,66,]),'ASSIGN':([34,58,],[54,89,]),'ELSE':([36,57,69,73,74,77,107,108,109,118,122,136,150,157,],[-22,-23,-28,-30,-31,-34,-29,-32,-33,-25,137,-24,-27,-26,]),'ENDWHILE':([36,57,69,73,74,77,107,108,109,118,128,136,150,157,],[-22,-23,-28,-30,-31,-34,-29,-32,-33,-25,138,-24,-27,-26,]),'ENDIF':([36,57,69,73,74,77,107,108,109,118,136,149,150,157,],[-22,-23,-28,-30,-31,-34,-29,-32,-33,-25,-24,154,-27,-26,]),'SENSE':([38,39,61,91,92,],[60,60,60,60,60,]),'NOT':([38,39,61,91,92,],[61,61,61,61,61,]),'UNVISITED':([38,39,61,91,92,],[63,63,63,63,63,]),'SEMICOLON':([40,42,43,46,64,65,66,67,70,71,72,75,76,85,119,121,126,127,130,133,134,138,152,153,154,],[69,73,74,77,-58,-59,-60,-61,107,-35,-36,108,109,118,-37,136,-56,-57,140,147,148,150,155,156,157,]),'LEFT':([41,],[71,]),'RIGHT':([41,],[72,]),'RETURNS':([47,],[78,]),'THEN':([59,63,64,65,66,67,93,94,95,96,97,98,119,123,124,125,126,127,],[90,-47,-58,-59,-60,-61,-42,-48,-49,-50,-51,-43,-37,-44,-45,-46,-56,-57,]),'AND':([59,63,64,65,66,67,68,93,94,95,96,97,98,119,123,124,125,126,127,],[91,-47,-58,-59,-60,-61,91,-42,-48,-49,-50,-51,91,-37,91,91,-46,-56,-57,]),'OR':([59,63,64,65,66,67,68,93,94,95,96,97,98,119,123,124,125,126,127,],[92,-47,-58,-59,-60,-61,92,-42,-48,-49,-50,-51,92,-37,92,92,-46,-56,-57,]),'DIRT':([60,],[94,]),'OBSTACLE':([60,],[95,]),'EXIT':([60,],[96,]),'ENTRY':([60,],[97,]),'EQ':([62,64,65,66,67,119,126,127,],[100,-58,-59,-60,-61,-37,-56,-57,]),'NEQ':([62,64,65,66,67,119,126,127,],[101,-58,-59,-60,-61,-37,-56,-57,]),'LT':([62,64,65,66,67,119,126,127,],[102,-58,-59,-60,-61,-37,-56,-57,]),'GT':([62,64,65,66,67,119,126,127,],[103,-58,-59,-60,-61,-37,-56,-57,]),'DO':([63,64,65,66,67,68,93,94,95,96,97,98,119,123,124,125,126,127,],[-47,-58,-59,-60,-61,106,-42,-48,-49,-50,-51,-43,-37,-44,-45,-46,-56,-57,]),'PLUS':([64,65,66,67,119,],[104,-59,-60,-61,-37,]),'MINUS':([64,65,66,67,119,],[105,-59,-60,-61,-37,]),'TYPE_INT':([78,],[111,]),'TYPE_VOID':([78,],[112,]),'N':([131,132,],[142,142,]),'E':([131,132,],[143,143,]),'S':([131,132,],[144,144,]),'W':([131,132,],[145,145,]),}
+_lr_action_items = {'WORLD':([0,],[3,]),'$end':([1,9,77,],[0,-1,-28,]),'AGENT':([2,4,5,6,11,34,196,],[-2,10,-3,-4,-5,-14,-6,]),'FUNC':([2,6,34,196,],[7,7,-14,-6,]),'ID':([3,7,10,15,29,49,50,51,52,59,60,64,75,76,82,93,97,98,99,100,103,104,121,122,123,124,131,132,133,134,135,136,137,138,139,140,141,155,157,166,177,178,195,206,],[8,12,14,30,47,47,79,86,86,86,86,30,86,86,86,-35,-37,-38,-39,-40,-43,-44,86,47,86,86,86,-62,-63,-64,-65,86,86,47,-36,-41,-42,-32,86,47,-31,47,-34,-33,]),'LBRACE':([8,14,142,143,144,],[13,29,166,-12,-13,]),'LPAREN':([12,18,19,20,21,22,23,24,25,26,28,47,86,],[15,36,37,38,39,40,41,42,43,44,46,76,76,]),'SIZE':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[18,18,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'ENTRY_DEF':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[19,19,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'EXIT_DEF':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[20,20,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'OBSTACLE_DEF':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[21,21,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'DIRT_DEF':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[22,22,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'OBSTACLE_RECT':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[23,23,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'DIRT_RECT':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[24,24,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'OBSTACLE_RANDOM':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[25,25,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'DIRT_RANDOM':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[26,26,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'error':([13,17,29,45,49,93,97,98,99,100,103,104,122,138,139,140,141,154,155,166,177,178,181,188,189,192,193,195,202,203,206,209,210,],[27,27,62,-26,62,-35,-37,-38,-39,-40,-43,-44,62,62,-36,-41,-42,-27,-32,62,-31,62,-17,-20,-21,-24,-25,-34,-18,-19,-33,-22,-23,]),'MAP_FILE':([13,17,45,154,181,188,189,192,193,202,203,209,210,],[28,28,-26,-27,-17,-20,-21,-24,-25,-18,-19,-22,-23,]),'RPAREN':([15,30,31,32,33,74,76,85,86,87,88,89,90,91,106,118,119,120,145,148,149,152,153,156,163,164,176,182,183,184,185,186,187,204,205,],[-7,-11,63,-8,-9,116,-48,-68,-69,-70,-71,-72,-73,-74,-10,156,-49,-50,167,170,171,174,175,-47,-66,-67,-51,197,-75,-76,-77,-78,198,207,208,]),'RBRACE':([16,17,35,45,48,49,78,93,97,98,99,100,103,104,139,140,141,154,155,177,180,181,188,189,192,193,195,202,203,206,209,210,],[34,-15,-16,-26,77,-29,-30,-35,-37,-38,-39,-40,-43,-44,-36,-41,-42,-27,-32,-31,196,-17,-20,-21,-24,-25,-34,-18,-19,-33,-22,-23,]),'SEMICOLON':([27,53,55,56,57,58,61,62,85,86,87,88,89,90,91,94,95,96,101,102,116,117,156,158,163,164,167,170,171,174,175,179,197,198,201,207,208,],[45,93,97,98,99,100,103,104,-68,-69,-70,-71,-72,-73,-74,139,-45,-46,140,141,154,155,-47,177,-66,-67,181,188,189,192,193,195,202,203,206,209,210,]),'VAR':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[50,50,-35,-37,-38,-39,-40,-43,-44,50,50,-36,-41,-42,-32,50,-31,50,-34,-33,]),'IF':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[51,51,-35,-37,-38,-39,-40,-43,-44,51,51,-36,-41,-42,-32,51,-31,51,-34,-33,]),'WHILE':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[52,52,-35,-37,-38,-39,-40,-43,-44,52,52,-36,-41,-42,-32,52,-31,52,-34,-33,]),'MOVE':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[53,53,-35,-37,-38,-39,-40,-43,-44,53,53,-36,-41,-42,-32,53,-31,53,-34,-33,]),'TURN':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[54,54,-35,-37,-38,-39,-40,-43,-44,54,54,-36,-41,-42,-32,54,-31,54,-34,-33,]),'CLEAN':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[55,55,-35,-37,-38,-39,-40,-43,-44,55,55,-36,-41,-42,-32,55,-31,55,-34,-33,]),'BACKTRACK':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[56,56,-35,-37,-38,-39,-40,-43,-44,56,56,-36,-41,-42,-32,56,-31,56,-34,-33,]),'GOTO_DIRT':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[57,57,-35,-37,-38,-39,-40,-43,-44,57,57,-36,-41,-42,-32,57,-31,57,-34,-33,]),'GOTO_EXIT':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[58,58,-35,-37,-38,-39,-40,-43,-44,58,58,-36,-41,-42,-32,58,-31,58,-34,-33,]),'REPORT':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[59,59,-35,-37,-38,-39,-40,-43,-44,59,59,-36,-41,-42,-32,59,-31,59,-34,-33,]),'RETURN':([29,49,93,97,98,99,100,103,104,122,138,139,140,141,155,166,177,178,195,206,],[60,60,-35,-37,-38,-39,-40,-43,-44,60,60,-36,-41,-42,-32,60,-31,60,-34,-33,]),'COMMA':([30,33,65,66,67,68,69,70,71,72,73,85,86,87,88,89,90,91,120,146,147,150,151,156,163,164,190,191,],[-11,64,107,108,109,110,111,112,113,114,115,-68,-69,-70,-71,-72,-73,-74,157,168,169,172,173,-47,-66,-67,199,200,]),'INT_LIT':([36,37,38,39,40,41,42,43,44,51,52,59,60,75,76,82,107,108,109,110,111,112,113,114,115,121,123,124,131,132,133,134,135,136,137,157,172,173,199,200,],[65,66,67,68,69,70,71,72,73,87,87,87,87,87,87,87,145,146,147,148,149,150,151,152,153,87,87,87,87,-62,-63,-64,-65,87,87,87,190,191,204,205,]),'STRING_LIT':([46,],[74,]),'ASSIGN':([47,79,],[75,121,]),'ELSE':([49,78,93,97,98,99,100,103,104,139,140,141,155,159,177,195,206,],[-29,-30,-35,-37,-38,-39,-40,-43,-44,-36,-41,-42,-32,178,-31,-34,-33,]),'ENDWHILE':([49,78,93,97,98,99,100,103,104,139,140,141,155,165,177,195,206,],[-29,-30,-35,-37,-38,-39,-40,-43,-44,-36,-41,-42,-32,179,-31,-34,-33,]),'ENDIF':([49,78,93,97,98,99,100,103,104,139,140,141,155,177,194,195,206,],[-29,-30,-35,-37,-38,-39,-40,-43,-44,-36,-41,-42,-32,-31,201,-34,-33,]),'SENSE':([51,52,82,123,124,],[81,81,81,81,81,]),'NOT':([51,52,82,123,124,],[82,82,82,82,82,]),'UNVISITED':([51,52,82,123,124,],[84,84,84,84,84,]),'DIRT_COUNT':([51,52,59,60,75,76,82,121,123,124,131,132,133,134,135,136,137,157,],[89,89,89,89,89,89,89,89,89,89,89,-62,-63,-64,-65,89,89,89,]),'DIRT_DIST':([51,52,59,60,75,76,82,121,123,124,131,132,133,134,135,136,137,157,],[90,90,90,90,90,90,90,90,90,90,90,-62,-63,-64,-65,90,90,90,]),'DIRT_DIR':([51,52,59,60,75,76,82,121,123,124,131,132,133,134,135,136,137,157,],[91,91,91,91,91,91,91,91,91,91,91,-62,-63,-64,-65,91,91,91,]),'LEFT':([54,],[95,]),'RIGHT':([54,],[96,]),'RETURNS':([63,],[105,]),'THEN':([80,84,85,86,87,88,89,90,91,125,126,127,128,129,130,156,160,161,162,163,164,],[122,-57,-68,-69,-70,-71,-72,-73,-74,-52,-58,-59,-60,-61,-53,-47,-54,-55,-56,-66,-67,]),'AND':([80,84,85,86,87,88,89,90,91,92,125,126,127,128,129,130,156,160,161,162,163,164,],[123,-57,-68,-69,-70,-71,-72,-73,-74,123,-52,-58,-59,-60,-61,123,-47,123,123,-56,-66,-67,]),'OR':([80,84,85,86,87,88,89,90,91,92,125,126,127,128,129,130,156,160,161,162,163,164,],[124,-57,-68,-69,-70,-71,-72,-73,-74,124,-52,-58,-59,-60,-61,124,-47,124,124,-56,-66,-67,]),'DIRT':([81,],[126,]),'OBSTACLE':([81,],[127,]),'EXIT':([81,],[128,]),'ENTRY':([81,],[129,]),'EQ':([83,85,86,87,88,89,90,91,156,163,164,],[132,-68,-69,-70,-71,-72,-73,-74,-47,-66,-67,]),'NEQ':([83,85,86,87,88,89,90,91,156,163,164,],[133,-68,-69,-70,-71,-72,-73,-74,-47,-66,-67,]),'LT':([83,85,86,87,88,89,90,91,156,163,164,],[134,-68,-69,-70,-71,-72,-73,-74,-47,-66,-67,]),'GT':([83,85,86,87,88,89,90,91,156,163,164,],[135,-68,-69,-70,-71,-72,-73,-74,-47,-66,-67,]),'DO':([84,85,86,87,88,89,90,91,92,125,126,127,128,129,130,156,160,161,162,163,164,],[-57,-68,-69,-70,-71,-72,-73,-74,138,-52,-58,-59,-60,-61,-53,-47,-54,-55,-56,-66,-67,]),'PLUS':([85,86,87,88,89,90,91,156,],[136,-69,-70,-71,-72,-73,-74,-47,]),'MINUS':([85,86,87,88,89,90,91,156,],[137,-69,-70,-71,-72,-73,-74,-47,]),'TYPE_INT':([105,],[143,]),'TYPE_VOID':([105,],[144,]),'N':([168,169,],[183,183,]),'E':([168,169,],[184,184,]),'S':([168,169,],[185,185,]),'W':([168,169,],[186,186,]),}
 
 _lr_action = {}
 for _k, _v in _lr_action_items.items():
@@ -17,7 +17,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'program':([0,],[1,]),'world_def':([0,],[2,]),'function_list_opt':([2,],[4,]),'function_list':([2,],[5,]),'function_decl':([2,],[6,]),'agent_def':([4,],[9,]),'world_body':([12,16,],[15,28,]),'world_stmt':([12,16,],[16,16,]),'param_list_opt':([14,],[24,]),'param_list':([14,48,],[25,79,]),'param_decl':([14,48,],[26,26,]),'stmt_list':([22,36,90,106,129,137,],[35,57,122,128,139,149,]),'stmt':([22,36,90,106,129,137,],[36,36,36,36,36,36,]),'function_call':([22,36,38,39,44,45,54,55,61,89,90,91,92,99,104,105,106,120,129,137,],[46,46,67,67,67,67,67,67,67,67,46,67,67,67,67,67,46,67,46,46,]),'condition':([38,39,61,91,92,],[59,68,98,123,124,]),'expr':([38,39,44,45,54,55,61,89,91,92,99,104,105,120,],[62,62,75,76,85,88,62,121,62,62,125,126,127,88,]),'term':([38,39,44,45,54,55,61,89,91,92,99,104,105,120,],[64,64,64,64,64,64,64,64,64,64,64,64,64,64,]),'turn_dir':([41,],[70,]),'arg_list_opt':([55,],[86,]),'arg_list':([55,120,],[87,135,]),'sense_expr':([60,],[93,]),'relop':([62,],[99,]),'type':([78,],[110,]),'dir':([131,132,],[141,146,]),}
+_lr_goto_items = {'program':([0,],[1,]),'world_def':([0,],[2,]),'function_list_opt':([2,],[4,]),'function_list':([2,6,],[5,11,]),'function_decl':([2,6,],[6,6,]),'agent_def':([4,],[9,]),'world_body':([13,17,],[16,35,]),'world_stmt':([13,17,],[17,17,]),'param_list_opt':([15,],[31,]),'param_list':([15,64,],[32,106,]),'param_decl':([15,64,],[33,33,]),'stmt_list':([29,49,122,138,166,178,],[48,78,159,165,180,194,]),'stmt':([29,49,122,138,166,178,],[49,49,49,49,49,49,]),'function_call':([29,49,51,52,59,60,75,76,82,121,122,123,124,131,136,137,138,157,166,178,],[61,61,88,88,88,88,88,88,88,88,61,88,88,88,88,88,61,88,61,61,]),'condition':([51,52,82,123,124,],[80,92,130,160,161,]),'expr':([51,52,59,60,75,76,82,121,123,124,131,136,137,157,],[83,83,101,102,117,120,83,158,83,83,162,163,164,120,]),'term':([51,52,59,60,75,76,82,121,123,124,131,136,137,157,],[85,85,85,85,85,85,85,85,85,85,85,85,85,85,]),'turn_dir':([54,],[94,]),'arg_list_opt':([76,],[118,]),'arg_list':([76,157,],[119,176,]),'sense_expr':([81,],[125,]),'relop':([83,],[131,]),'type':([105,],[142,]),'dir':([168,169,],[182,187,]),}
 
 _lr_goto = {}
 for _k, _v in _lr_goto_items.items():
@@ -27,69 +27,82 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> program","S'",1,None,None,None),
-  ('program -> world_def function_list_opt agent_def','program',3,'p_program','parser.py',56),
-  ('function_list_opt -> <empty>','function_list_opt',0,'p_function_list_opt_empty','parser.py',61),
-  ('function_list_opt -> function_list','function_list_opt',1,'p_function_list_opt','parser.py',65),
-  ('function_list -> function_decl','function_list',1,'p_function_list','parser.py',69),
-  ('function_decl -> FUNC ID LPAREN param_list_opt RPAREN RETURNS type LBRACE stmt_list RBRACE','function_decl',10,'p_function_decl','parser.py',74),
-  ('param_list_opt -> <empty>','param_list_opt',0,'p_param_list_opt_empty','parser.py',82),
-  ('param_list_opt -> param_list','param_list_opt',1,'p_param_list_opt','parser.py',86),
-  ('param_list -> param_decl','param_list',1,'p_param_list_single','parser.py',90),
-  ('param_list -> param_decl COMMA param_list','param_list',3,'p_param_list_more','parser.py',94),
-  ('param_decl -> ID','param_decl',1,'p_param_decl','parser.py',98),
-  ('type -> TYPE_INT','type',1,'p_type_int','parser.py',102),
-  ('type -> TYPE_VOID','type',1,'p_type_void','parser.py',106),
-  ('world_def -> WORLD ID LBRACE world_body RBRACE','world_def',5,'p_world_def','parser.py',111),
-  ('world_body -> world_stmt','world_body',1,'p_world_body_single','parser.py',115),
-  ('world_body -> world_stmt world_body','world_body',2,'p_world_body_more','parser.py',119),
-  ('world_stmt -> SIZE LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_size','parser.py',124),
-  ('world_stmt -> ENTRY_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLON','world_stmt',9,'p_world_stmt_entry','parser.py',128),
-  ('world_stmt -> EXIT_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLON','world_stmt',9,'p_world_stmt_exit','parser.py',133),
-  ('world_stmt -> OBSTACLE_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_obstacle','parser.py',138),
-  ('world_stmt -> DIRT_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_dirt','parser.py',142),
-  ('agent_def -> AGENT ID LBRACE stmt_list RBRACE','agent_def',5,'p_agent_def','parser.py',147),
-  ('stmt_list -> stmt','stmt_list',1,'p_stmt_list_single','parser.py',152),
-  ('stmt_list -> stmt stmt_list','stmt_list',2,'p_stmt_list_more','parser.py',156),
-  ('stmt -> VAR ID ASSIGN expr SEMICOLON','stmt',5,'p_stmt_var_decl','parser.py',161),
-  ('stmt -> ID ASSIGN expr SEMICOLON','stmt',4,'p_stmt_assign','parser.py',165),
-  ('stmt -> IF condition THEN stmt_list ELSE stmt_list ENDIF SEMICOLON','stmt',8,'p_stmt_if','parser.py',169),
-  ('stmt -> WHILE condition DO stmt_list ENDWHILE SEMICOLON','stmt',6,'p_stmt_while','parser.py',173),
-  ('stmt -> MOVE SEMICOLON','stmt',2,'p_stmt_move','parser.py',177),
-  ('stmt -> TURN turn_dir SEMICOLON','stmt',3,'p_stmt_turn','parser.py',181),
-  ('stmt -> CLEAN SEMICOLON','stmt',2,'p_stmt_clean','parser.py',185),
-  ('stmt -> BACKTRACK SEMICOLON','stmt',2,'p_stmt_backtrack','parser.py',189),
-  ('stmt -> REPORT expr SEMICOLON','stmt',3,'p_stmt_report','parser.py',193),
-  ('stmt -> RETURN expr SEMICOLON','stmt',3,'p_stmt_return','parser.py',197),
-  ('stmt -> function_call SEMICOLON','stmt',2,'p_stmt_function_call','parser.py',201),
-  ('turn_dir -> LEFT','turn_dir',1,'p_turn_dir_left','parser.py',206),
-  ('turn_dir -> RIGHT','turn_dir',1,'p_turn_dir_right','parser.py',210),
-  ('function_call -> ID LPAREN arg_list_opt RPAREN','function_call',4,'p_function_call','parser.py',215),
-  ('arg_list_opt -> <empty>','arg_list_opt',0,'p_arg_list_opt_empty','parser.py',219),
-  ('arg_list_opt -> arg_list','arg_list_opt',1,'p_arg_list_opt','parser.py',223),
-  ('arg_list -> expr','arg_list',1,'p_arg_list_single','parser.py',227),
-  ('arg_list -> expr COMMA arg_list','arg_list',3,'p_arg_list_more','parser.py',231),
-  ('condition -> SENSE sense_expr','condition',2,'p_condition_sense','parser.py',236),
-  ('condition -> NOT condition','condition',2,'p_condition_unary_not','parser.py',240),
-  ('condition -> condition AND condition','condition',3,'p_condition_and','parser.py',244),
-  ('condition -> condition OR condition','condition',3,'p_condition_or','parser.py',248),
-  ('condition -> expr relop expr','condition',3,'p_condition_relop','parser.py',252),
-  ('condition -> UNVISITED','condition',1,'p_condition_unvisited','parser.py',256),
-  ('sense_expr -> DIRT','sense_expr',1,'p_sense_expr','parser.py',260),
-  ('sense_expr -> OBSTACLE','sense_expr',1,'p_sense_obs','parser.py',264),
-  ('sense_expr -> EXIT','sense_expr',1,'p_sense_exit','parser.py',268),
-  ('sense_expr -> ENTRY','sense_expr',1,'p_sense_entry','parser.py',272),
-  ('relop -> EQ','relop',1,'p_relop_eq','parser.py',277),
-  ('relop -> NEQ','relop',1,'p_relop_neq','parser.py',281),
-  ('relop -> LT','relop',1,'p_relop_lt','parser.py',285),
-  ('relop -> GT','relop',1,'p_relop_gt','parser.py',289),
-  ('expr -> term PLUS expr','expr',3,'p_expr_plus','parser.py',295),
-  ('expr -> term MINUS expr','expr',3,'p_expr_minus','parser.py',299),
-  ('expr -> term','expr',1,'p_expr_term','parser.py',303),
-  ('term -> ID','term',1,'p_term_id','parser.py',307),
-  ('term -> INT_LIT','term',1,'p_term_int','parser.py',311),
-  ('term -> function_call','term',1,'p_term_call','parser.py',315),
-  ('dir -> N','dir',1,'p_dir_n','parser.py',320),
-  ('dir -> E','dir',1,'p_dir_e','parser.py',324),
-  ('dir -> S','dir',1,'p_dir_s','parser.py',328),
-  ('dir -> W','dir',1,'p_dir_w','parser.py',332),
+  ('program -> world_def function_list_opt agent_def','program',3,'p_program','parser.py',33),
+  ('function_list_opt -> <empty>','function_list_opt',0,'p_function_list_opt_empty','parser.py',38),
+  ('function_list_opt -> function_list','function_list_opt',1,'p_function_list_opt','parser.py',42),
+  ('function_list -> function_decl','function_list',1,'p_function_list','parser.py',46),
+  ('function_list -> function_decl function_list','function_list',2,'p_function_list_more','parser.py',50),
+  ('function_decl -> FUNC ID LPAREN param_list_opt RPAREN RETURNS type LBRACE stmt_list RBRACE','function_decl',10,'p_function_decl','parser.py',55),
+  ('param_list_opt -> <empty>','param_list_opt',0,'p_param_list_opt_empty','parser.py',63),
+  ('param_list_opt -> param_list','param_list_opt',1,'p_param_list_opt','parser.py',67),
+  ('param_list -> param_decl','param_list',1,'p_param_list_single','parser.py',71),
+  ('param_list -> param_decl COMMA param_list','param_list',3,'p_param_list_more','parser.py',75),
+  ('param_decl -> ID','param_decl',1,'p_param_decl','parser.py',79),
+  ('type -> TYPE_INT','type',1,'p_type_int','parser.py',83),
+  ('type -> TYPE_VOID','type',1,'p_type_void','parser.py',87),
+  ('world_def -> WORLD ID LBRACE world_body RBRACE','world_def',5,'p_world_def','parser.py',92),
+  ('world_body -> world_stmt','world_body',1,'p_world_body_single','parser.py',96),
+  ('world_body -> world_stmt world_body','world_body',2,'p_world_body_more','parser.py',100),
+  ('world_stmt -> SIZE LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_size','parser.py',105),
+  ('world_stmt -> ENTRY_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLON','world_stmt',9,'p_world_stmt_entry','parser.py',109),
+  ('world_stmt -> EXIT_DEF LPAREN INT_LIT COMMA INT_LIT COMMA dir RPAREN SEMICOLON','world_stmt',9,'p_world_stmt_exit','parser.py',114),
+  ('world_stmt -> OBSTACLE_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_obstacle','parser.py',119),
+  ('world_stmt -> DIRT_DEF LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_dirt','parser.py',123),
+  ('world_stmt -> OBSTACLE_RECT LPAREN INT_LIT COMMA INT_LIT COMMA INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',11,'p_world_stmt_obstacle_rect','parser.py',127),
+  ('world_stmt -> DIRT_RECT LPAREN INT_LIT COMMA INT_LIT COMMA INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',11,'p_world_stmt_dirt_rect','parser.py',131),
+  ('world_stmt -> OBSTACLE_RANDOM LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_obstacle_random','parser.py',135),
+  ('world_stmt -> DIRT_RANDOM LPAREN INT_LIT COMMA INT_LIT RPAREN SEMICOLON','world_stmt',7,'p_world_stmt_dirt_random','parser.py',139),
+  ('world_stmt -> error SEMICOLON','world_stmt',2,'p_world_stmt_error','parser.py',145),
+  ('world_stmt -> MAP_FILE LPAREN STRING_LIT RPAREN SEMICOLON','world_stmt',5,'p_world_stmt_map_file','parser.py',150),
+  ('agent_def -> AGENT ID LBRACE stmt_list RBRACE','agent_def',5,'p_agent_def','parser.py',155),
+  ('stmt_list -> stmt','stmt_list',1,'p_stmt_list_single','parser.py',160),
+  ('stmt_list -> stmt stmt_list','stmt_list',2,'p_stmt_list_more','parser.py',164),
+  ('stmt -> VAR ID ASSIGN expr SEMICOLON','stmt',5,'p_stmt_var_decl','parser.py',169),
+  ('stmt -> ID ASSIGN expr SEMICOLON','stmt',4,'p_stmt_assign','parser.py',173),
+  ('stmt -> IF condition THEN stmt_list ELSE stmt_list ENDIF SEMICOLON','stmt',8,'p_stmt_if','parser.py',177),
+  ('stmt -> WHILE condition DO stmt_list ENDWHILE SEMICOLON','stmt',6,'p_stmt_while','parser.py',181),
+  ('stmt -> MOVE SEMICOLON','stmt',2,'p_stmt_move','parser.py',185),
+  ('stmt -> TURN turn_dir SEMICOLON','stmt',3,'p_stmt_turn','parser.py',189),
+  ('stmt -> CLEAN SEMICOLON','stmt',2,'p_stmt_clean','parser.py',193),
+  ('stmt -> BACKTRACK SEMICOLON','stmt',2,'p_stmt_backtrack','parser.py',197),
+  ('stmt -> GOTO_DIRT SEMICOLON','stmt',2,'p_stmt_goto_dirt','parser.py',201),
+  ('stmt -> GOTO_EXIT SEMICOLON','stmt',2,'p_stmt_goto_exit','parser.py',205),
+  ('stmt -> REPORT expr SEMICOLON','stmt',3,'p_stmt_report','parser.py',209),
+  ('stmt -> RETURN expr SEMICOLON','stmt',3,'p_stmt_return','parser.py',213),
+  ('stmt -> function_call SEMICOLON','stmt',2,'p_stmt_function_call','parser.py',217),
+  ('stmt -> error SEMICOLON','stmt',2,'p_stmt_error','parser.py',222),
+  ('turn_dir -> LEFT','turn_dir',1,'p_turn_dir_left','parser.py',228),
+  ('turn_dir -> RIGHT','turn_dir',1,'p_turn_dir_right','parser.py',232),
+  ('function_call -> ID LPAREN arg_list_opt RPAREN','function_call',4,'p_function_call','parser.py',237),
+  ('arg_list_opt -> <empty>','arg_list_opt',0,'p_arg_list_opt_empty','parser.py',241),
+  ('arg_list_opt -> arg_list','arg_list_opt',1,'p_arg_list_opt','parser.py',245),
+  ('arg_list -> expr','arg_list',1,'p_arg_list_single','parser.py',249),
+  ('arg_list -> expr COMMA arg_list','arg_list',3,'p_arg_list_more','parser.py',253),
+  ('condition -> SENSE sense_expr','condition',2,'p_condition_sense','parser.py',258),
+  ('condition -> NOT condition','condition',2,'p_condition_unary_not','parser.py',262),
+  ('condition -> condition AND condition','condition',3,'p_condition_and','parser.py',266),
+  ('condition -> condition OR condition','condition',3,'p_condition_or','parser.py',270),
+  ('condition -> expr relop expr','condition',3,'p_condition_relop','parser.py',274),
+  ('condition -> UNVISITED','condition',1,'p_condition_unvisited','parser.py',278),
+  ('sense_expr -> DIRT','sense_expr',1,'p_sense_expr','parser.py',282),
+  ('sense_expr -> OBSTACLE','sense_expr',1,'p_sense_obs','parser.py',286),
+  ('sense_expr -> EXIT','sense_expr',1,'p_sense_exit','parser.py',290),
+  ('sense_expr -> ENTRY','sense_expr',1,'p_sense_entry','parser.py',294),
+  ('relop -> EQ','relop',1,'p_relop_eq','parser.py',299),
+  ('relop -> NEQ','relop',1,'p_relop_neq','parser.py',303),
+  ('relop -> LT','relop',1,'p_relop_lt','parser.py',307),
+  ('relop -> GT','relop',1,'p_relop_gt','parser.py',311),
+  ('expr -> term PLUS expr','expr',3,'p_expr_plus','parser.py',317),
+  ('expr -> term MINUS expr','expr',3,'p_expr_minus','parser.py',321),
+  ('expr -> term','expr',1,'p_expr_term','parser.py',325),
+  ('term -> ID','term',1,'p_term_id','parser.py',329),
+  ('term -> INT_LIT','term',1,'p_term_int','parser.py',333),
+  ('term -> function_call','term',1,'p_term_call','parser.py',337),
+  ('term -> DIRT_COUNT','term',1,'p_term_dirt_query','parser.py',341),
+  ('term -> DIRT_DIST','term',1,'p_term_dirt_query','parser.py',342),
+  ('term -> DIRT_DIR','term',1,'p_term_dirt_query','parser.py',343),
+  ('dir -> N','dir',1,'p_dir_n','parser.py',348),
+  ('dir -> E','dir',1,'p_dir_e','parser.py',352),
+  ('dir -> S','dir',1,'p_dir_s','parser.py',356),
+  ('dir -> W','dir',1,'p_dir_w','parser.py',360),
 ]
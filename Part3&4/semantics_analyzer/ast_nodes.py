@@ -29,10 +29,11 @@ def Program(world, functions, agent):
 def WorldDef(name, stmts):
     return ASTNode('WorldDef', value=name, children=stmts)
 
-def FunctionDef(name, params, ret_type, body):
+def FunctionDef(name, params, ret_type, body, pure=False):
     return ASTNode('Function', value=name, children=[ASTNode('Params', children=[ASTNode('Param', value=p) for p in params]),
                                                     ASTNode('RetType', value=ret_type),
-                                                    ASTNode('Body', children=body)])
+                                                    ASTNode('Body', children=body),
+                                                    ASTNode('Pure', value=pure)])
 
 def AgentDef(name, stmts):
     return ASTNode('Agent', value=name, children=stmts)
@@ -62,6 +63,9 @@ def CleanStmt():
 def BacktrackStmt():
     return ASTNode('Backtrack')
 
+def GotoStmt(target):
+    return ASTNode('Goto', value=target)
+
 def ReportStmt(expr):
     return ASTNode('Report', children=[expr])
 
@@ -83,5 +87,8 @@ def VarRef(name):
 def SenseExpr(kind):
     return ASTNode('Sense', value=kind)
 
+def DirtQuery(kind):
+    return ASTNode('DirtQuery', value=kind)
+
 def UnvisitedExpr():
     return ASTNode('Unvisited')
\ No newline at end of file
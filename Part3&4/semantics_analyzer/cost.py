@@ -0,0 +1,390 @@
+# cost.py -- static cost profile of an analyzed program, for admission before running it
+
+from math import ceil
+
+# statements that change the world, and expressions/conditions that read it
+WORLD_ACTIONS = {'Move', 'Turn', 'Clean', 'Backtrack', 'Goto'}
+WORLD_READS = {'Sense', 'Unvisited', 'DirtQuery'}
+
+# loop verdicts
+INFINITE, DEAD, INFINITE_OR_DEAD = 'infinite', 'dead', 'infinite or dead'
+
+
+def estimate_cost(program):
+    """
+    Static cost profile of a Program AST (as a single agent would run it):
+      max_nesting      deepest IF/WHILE nesting in the agent or any function
+      max_call_depth   longest call chain from the agent (None with recursion)
+      recursion        call-graph cycles, each a sorted list of function names
+      invariant_loops  WHILE loops whose condition nothing in the body can
+                       change: {'where', 'condition', 'verdict'}, the verdict
+                       being 'infinite', 'dead' or 'infinite or dead'
+      statement_bound  upper bound on statements executed (the interpreter's
+                       step count), or None when it cannot be derived
+    """
+    return _CostEstimator(program).profile()
+
+
+def admission_errors(profile, max_cost=None):
+    """Reasons to reject a program before running it (empty list = admit)."""
+    reasons = []
+    for loop in profile['invariant_loops']:
+        if loop['verdict'] == INFINITE:
+            reasons.append(f"WHILE {loop['condition']} in {loop['where']} never terminates")
+    bound = profile['statement_bound']
+    if max_cost is not None and bound is not None and bound > max_cost:
+        reasons.append(f"Program may run {bound} statements, over the budget of {max_cost}")
+    return reasons
+
+
+def _walk(node):
+    pending = [node]
+    while pending:
+        n = pending.pop()
+        if n is None or not hasattr(n, 'kind'):
+            continue
+        yield n
+        pending.extend(n.children)
+
+
+def _describe(node):
+    """Source-like text of a condition or expression."""
+    kind = node.kind
+    if kind in ('Int', 'Var'):
+        return str(node.value)
+    if kind in ('BinOp', 'RelOp'):
+        return f"{_describe(node.children[0])} {node.value} {_describe(node.children[1])}"
+    if kind in ('And', 'Or'):
+        return f"{_describe(node.children[0])} {kind.upper()} {_describe(node.children[1])}"
+    if kind == 'Not':
+        return f"NOT {_describe(node.children[0])}"
+    if kind == 'Sense':
+        return f"SENSE {node.value}"
+    if kind == 'Unvisited':
+        return 'UNVISITED'
+    if kind == 'DirtQuery':
+        return f"DIRT_{node.value}"
+    if kind == 'Call':
+        return f"{node.value}({', '.join(_describe(a) for a in node.children)})"
+    return kind
+
+
+def _constant(node):
+    """Value of an expression or condition that only depends on literals, else None."""
+    kind = node.kind
+    if kind == 'Int':
+        return node.value
+    if kind == 'Not':
+        inner = _constant(node.children[0])
+        return None if inner is None else not inner
+    if kind not in ('BinOp', 'RelOp', 'And', 'Or'):
+        return None
+    left, right = _constant(node.children[0]), _constant(node.children[1])
+    if kind == 'And' and (left is False or right is False):
+        return False
+    if kind == 'Or' and (left is True or right is True):
+        return True
+    if left is None or right is None:
+        return None
+    op = node.value if kind in ('BinOp', 'RelOp') else kind
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == 'LT':
+        return left < right
+    if op == 'GT':
+        return left > right
+    if op == 'EQ':
+        return left == right
+    if op == 'NEQ':
+        return left != right
+    return bool(left) and bool(right) if op == 'And' else bool(left) or bool(right)
+
+
+class _CostEstimator:
+    def __init__(self, program):
+        _, funcs, agent = program.children
+        self.agent = agent
+        self.functions = {fn.value: fn for fn in funcs.children}
+        self.calls = {name: {n.value for n in _walk(fn.children[2]) if n.kind == 'Call'} & set(self.functions)
+                      for name, fn in self.functions.items()}
+        self.changes_world = self._closure(WORLD_ACTIONS)
+        self.reads_world = self._closure(WORLD_READS)
+        self.cycles = self._cycles()
+        self.recursive = {name for cycle in self.cycles for name in cycle}
+        self.loops = []
+        self._bounds = {}
+
+    def _closure(self, kinds):
+        """Functions that contain one of `kinds`, directly or through calls."""
+        found = {name for name, fn in self.functions.items()
+                 if any(n.kind in kinds for n in _walk(fn.children[2]))}
+        changed = True
+        while changed:
+            changed = False
+            for name, callees in self.calls.items():
+                if name not in found and callees & found:
+                    found.add(name)
+                    changed = True
+        return found
+
+    def _cycles(self):
+        """Strongly connected components of the call graph that contain a cycle (Tarjan)."""
+        index, low, stack, on_stack, cycles = {}, {}, [], set(), []
+
+        def visit(name):
+            index[name] = low[name] = len(index)
+            stack.append(name)
+            on_stack.add(name)
+            for callee in self.calls[name]:
+                if callee not in index:
+                    visit(callee)
+                    low[name] = min(low[name], low[callee])
+                elif callee in on_stack:
+                    low[name] = min(low[name], index[callee])
+            if low[name] == index[name]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == name:
+                        break
+                if len(component) > 1 or name in self.calls[name]:
+                    cycles.append(sorted(component))
+
+        for name in sorted(self.functions):
+            if name not in index:
+                visit(name)
+        return sorted(cycles)
+
+    def profile(self):
+        bodies = [(f"agent {self.agent.value}", self.agent.children)]
+        bodies += [(f"function {name}", fn.children[2].children) for name, fn in sorted(self.functions.items())]
+        nesting = max(self._nesting(stmts) for _, stmts in bodies)
+        for where, stmts in bodies:
+            self._find_invariant_loops(where, stmts)
+        return {
+            'max_nesting': nesting,
+            'max_call_depth': None if self.recursive else self._call_depth(self.agent),
+            'recursion': self.cycles,
+            'invariant_loops': self.loops,
+            'statement_bound': self._stmts_bound(self.agent.children, {}),
+        }
+
+    # ---------- structure ----------
+
+    def _nesting(self, stmts):
+        deepest = 0
+        for stmt in stmts:
+            if stmt.kind == 'If':
+                deepest = max(deepest, 1 + self._nesting(stmt.children[1].children),
+                              1 + self._nesting(stmt.children[2].children))
+            elif stmt.kind == 'While':
+                deepest = max(deepest, 1 + self._nesting(stmt.children[1].children))
+        return deepest
+
+    def _call_depth(self, node, memo=None):
+        memo = {} if memo is None else memo
+        callees = {n.value for n in _walk(node) if n.kind == 'Call' and n.value in self.functions}
+        depth = 0
+        for name in callees:
+            if name not in memo:
+                memo[name] = self._call_depth(self.functions[name].children[2], memo)
+            depth = max(depth, 1 + memo[name])
+        return depth
+
+    # ---------- loops whose condition cannot change ----------
+
+    def _find_invariant_loops(self, where, stmts):
+        for stmt in stmts:
+            if stmt.kind == 'If':
+                self._find_invariant_loops(where, stmt.children[1].children)
+                self._find_invariant_loops(where, stmt.children[2].children)
+            elif stmt.kind == 'While':
+                cond, body = stmt.children[0], stmt.children[1]
+                self._find_invariant_loops(where, body.children)
+                if not self._invariant(cond, body):
+                    continue
+                value = _constant(cond)
+                if value is None:
+                    verdict = INFINITE_OR_DEAD
+                else:
+                    verdict = INFINITE if value else DEAD
+                if verdict != DEAD and any(n.kind == 'Return' for n in _walk(body)):
+                    continue  # a RETURN can still leave the loop
+                self.loops.append({'where': where, 'condition': _describe(cond), 'verdict': verdict})
+
+    def _invariant(self, cond, body):
+        """True if nothing the body (or the condition itself) does can change the condition."""
+        cond_nodes = list(_walk(cond))
+        cond_calls = {n.value for n in cond_nodes if n.kind == 'Call'}
+        if cond_calls & self.changes_world:
+            return False
+        assigned = {n.value for n in _walk(body) if n.kind in ('Assign', 'VarDecl')}
+        if assigned & {n.value for n in cond_nodes if n.kind == 'Var'}:
+            return False
+        reads_world = any(n.kind in WORLD_READS for n in cond_nodes) or bool(cond_calls & self.reads_world)
+        if reads_world:
+            body_nodes = list(_walk(body))
+            if any(n.kind in WORLD_ACTIONS for n in body_nodes):
+                return False
+            if {n.value for n in body_nodes if n.kind == 'Call'} & self.changes_world:
+                return False
+        return True
+
+    # ---------- statement bound ----------
+
+    def _function_bound(self, name):
+        if name in self.recursive:
+            return None
+        if name not in self._bounds:
+            self._bounds[name] = self._stmts_bound(self.functions[name].children[2].children, {})
+        return self._bounds[name]
+
+    def _expr_bound(self, node):
+        """Statements run while evaluating an expression or condition (its calls)."""
+        total = 0
+        for n in _walk(node):
+            if n.kind == 'Call' and n.value in self.functions:
+                callee = self._function_bound(n.value)
+                if callee is None:
+                    return None
+                total += callee
+        return total
+
+    def _stmts_bound(self, stmts, known):
+        """
+        Bound for a statement list. `known` maps variables to values they are
+        certain to hold (from literal assignments); it is updated in place.
+        """
+        total = 0
+        for stmt in stmts:
+            cost = self._stmt_bound(stmt, known)
+            if cost is None:
+                return None
+            total += cost
+        return total
+
+    def _stmt_bound(self, stmt, known):
+        kind = stmt.kind
+        if kind == 'If':
+            cond = self._expr_bound(stmt.children[0])
+            then_known, else_known = dict(known), dict(known)
+            then_cost = self._stmts_bound(stmt.children[1].children, then_known)
+            else_cost = self._stmts_bound(stmt.children[2].children, else_known)
+            for name in list(known):
+                if then_known.get(name) != known[name] or else_known.get(name) != known[name]:
+                    del known[name]
+            if None in (cond, then_cost, else_cost):
+                return None
+            return 1 + cond + max(then_cost, else_cost)
+        if kind == 'While':
+            return self._loop_bound(stmt, known)
+        cost = self._expr_bound(stmt)
+        if cost is None:
+            return None
+        if kind in ('Assign', 'VarDecl'):
+            value = self._value(stmt.children[0], known)
+            if value is None:
+                known.pop(stmt.value, None)
+            else:
+                known[stmt.value] = value
+        return 1 + cost
+
+    def _value(self, expr, known):
+        """Value of `expr` if it only uses literals and known variables."""
+        if expr is None:
+            return None
+        if expr.kind == 'Int':
+            return expr.value
+        if expr.kind == 'Var':
+            return known.get(expr.value)
+        if expr.kind == 'BinOp':
+            left, right = self._value(expr.children[0], known), self._value(expr.children[1], known)
+            if left is None or right is None:
+                return None
+            return left + right if expr.value == '+' else left - right
+        return None
+
+    def _loop_bound(self, stmt, known):
+        cond, body = stmt.children[0], stmt.children[1].children
+        assigned = {n.value for s in body for n in _walk(s) if n.kind in ('Assign', 'VarDecl')}
+        trips = self._trip_count(cond, body, known)
+        if trips is None and _constant(cond) is False:
+            trips = 0
+        counter = self._counter(cond)
+        final = None
+        if trips is not None and counter is not None and counter[0] in known:
+            # where the counter ends up (steps are literal, see _trip_count)
+            final = known[counter[0]] + trips * self._step(body, counter[0]) if trips else known[counter[0]]
+        for name in assigned:
+            known.pop(name, None)
+        if final is not None:
+            known[counter[0]] = final
+        if trips is None:
+            return None
+        cond_cost = self._expr_bound(cond)
+        body_cost = self._stmts_bound(body, {})
+        if cond_cost is None or body_cost is None:
+            return None
+        return 1 + (trips + 1) * cond_cost + trips * body_cost
+
+    def _counter(self, cond):
+        """(variable, op, limit) for conditions like `i LT 10` or `10 GT i`, else None."""
+        if cond.kind != 'RelOp' or len(cond.children) != 2:
+            return None
+        left, right = cond.children
+        if left.kind == 'Var' and right.kind == 'Int':
+            return left.value, cond.value, right.value
+        if left.kind == 'Int' and right.kind == 'Var':
+            flipped = {'LT': 'GT', 'GT': 'LT'}.get(cond.value, cond.value)
+            return right.value, flipped, left.value
+        return None
+
+    def _step(self, body, name):
+        """c for a body whose only write to `name` is a top-level `name = name + c` (or - c)."""
+        steps = [s for s in body if s.kind == 'Assign' and s.value == name]
+        writes = [n for s in body for n in _walk(s) if n.kind in ('Assign', 'VarDecl') and n.value == name]
+        if len(steps) != 1 or len(writes) != 1:
+            return None
+        expr = steps[0].children[0]
+        if (expr is None or expr.kind != 'BinOp' or expr.children[0].kind != 'Var'
+                or expr.children[0].value != name or expr.children[1].kind != 'Int'):
+            return None
+        return expr.children[1].value if expr.value == '+' else -expr.children[1].value
+
+    def _trip_count(self, cond, body, known):
+        """
+        Iterations of a counted loop: the condition compares a variable with a
+        literal, the variable's value on entry is known, and the body steps it
+        by a literal exactly once at its top level and assigns it nowhere else.
+        """
+        counter = self._counter(cond)
+        if counter is None:
+            return None
+        name, op, limit = counter
+        start = known.get(name)
+        if start is None:
+            return None
+        step = self._step(body, name)
+        if step is None:
+            return None
+        if op == 'LT':
+            if start >= limit:
+                return 0
+            return ceil((limit - start) / step) if step > 0 else None
+        if op == 'GT':
+            if start <= limit:
+                return 0
+            return ceil((start - limit) / -step) if step < 0 else None
+        if op == 'NEQ':
+            if start == limit:
+                return 0
+            if step and (limit - start) % step == 0 and (limit - start) // step > 0:
+                return (limit - start) // step
+            return None
+        if op == 'EQ':
+            return 0 if start != limit else (1 if step else None)
+        return None
@@ -1,6 +1,12 @@
 # semantic.py -- CST -> AST transformer + simple static semantics checks
 
 from .ast_nodes import *
+from .cost import estimate_cost
+
+
+# AST kinds that act on or observe the world; a function containing any of
+# them (directly or through a call) is not pure
+IMPURE_KINDS = {'Move', 'Turn', 'Clean', 'Backtrack', 'Goto', 'Report', 'Sense', 'Unvisited', 'DirtQuery'}
 
 
 class SymbolTable:
@@ -39,6 +45,8 @@ class SemanticAnalyzer:
         self.symtab = SymbolTable()
         self.errors = []
         self.current_function = None
+        self.pure_functions = set()  # names of functions classified as pure
+        self.cost_profile = None     # static cost estimate (see cost.estimate_cost)
 
     def error(self, msg):
         """Record a semantic error."""
@@ -58,72 +66,125 @@ class SemanticAnalyzer:
         agent_cst = cst.children[2]
 
         # Phase 1: collect and register functions in global scope
-        funcs = []
-        func_nodes = []
-        if funcs_cst:
-            if funcs_cst.type == 'function_list':
-                func_nodes = funcs_cst.children
-            elif funcs_cst.type == 'function_list_opt' and funcs_cst.children:
-                # defensive: function_list_opt might wrap the actual list
-                first = funcs_cst.children[0]
-                if first.type == 'function_list':
-                    func_nodes = first.children
+        funcs = self._register_functions(function_decls(funcs_cst))
+
+        # Phase 2: transform world definition
+        world_ast = self._transform_world(world_cst)
 
+        # Phase 3: transform functions (bodies in function scope)
+        ast_funcs = []
+        for f_cst, name, params, ret_type in funcs:
+            ast_funcs.append(self._analyze_function(f_cst, name, params, ret_type))
+
+        # Phase 3b: classify functions as pure (no world effects, only pure calls)
+        self._classify_purity(ast_funcs)
+
+        # Phase 4: transform agent (agent has its own scope)
+        ast_prog = Program(world_ast, ast_funcs, self._analyze_agent(agent_cst))
+
+        # Phase 5: checks that need the world and the code together
+        self._check_world_requirements(ast_prog)
+
+        # Phase 6: static cost profile, for admission before running
+        if not self.errors:
+            self.cost_profile = estimate_cost(ast_prog)
+        return ast_prog, self.errors
+
+    def _register_functions(self, func_nodes):
+        """Declare every function in the global scope; returns [(cst, name, params, ret_type)]."""
+        funcs = []
         for f in func_nodes:
             # function_decl structure: children = [param_list_opt, type_node, stmt_list], value = function name
-            name = f.value
-            ret_type = f.children[1].value if len(f.children) > 1 and f.children[1] is not None else 'int'
-            params = self._collect_param_names(f.children[0])
-            
+            name, params, ret_type = function_signature(f)
+
             # Check for duplicate function declarations
             if not self.symtab.declare(name, {'kind': 'function', 'params': params, 'ret': ret_type}):
                 self.error(f"Duplicate function declaration: {name}")
             funcs.append((f, name, params, ret_type))
+        return funcs
 
-        # Phase 2: transform world definition
-        world_ast = self._transform_world(world_cst)
+    def _analyze_function(self, f_cst, name, params, ret_type):
+        """Transform one function body in its own scope (functions must already be registered)."""
+        self.symtab.push()
+        # Declare parameters in function scope
+        for p in params:
+            if not self.symtab.declare(p, {'kind': 'param', 'type': 'int'}):
+                self.error(f"Duplicate parameter name '{p}' in function {name}")
 
-        # Phase 3: transform functions (bodies in function scope)
-        ast_funcs = []
-        for f_cst, name, params, ret_type in funcs:
-            self.symtab.push()
-            # Declare parameters in function scope
-            for p in params:
-                if not self.symtab.declare(p, {'kind': 'param', 'type': 'int'}):
-                    self.error(f"Duplicate parameter name '{p}' in function {name}")
-            
-            self.current_function = {'name': name, 'ret': ret_type}
-            # function_decl children: [param_list_opt, type_node, stmt_list]
-            body_node = f_cst.children[2] if len(f_cst.children) > 2 else None
-            body_stmts = self._transform_stmt_list(body_node) if body_node else []
-            ast_funcs.append(FunctionDef(name, params, ret_type, body_stmts))
-            self.symtab.pop()
-            self.current_function = None
+        self.current_function = {'name': name, 'ret': ret_type}
+        # function_decl children: [param_list_opt, type_node, stmt_list]
+        body_node = f_cst.children[2] if len(f_cst.children) > 2 else None
+        body_stmts = self._transform_stmt_list(body_node) if body_node else []
+        self.symtab.pop()
+        self.current_function = None
+        return FunctionDef(name, params, ret_type, body_stmts)
 
-        # Phase 4: transform agent (agent has its own scope)
+    def _analyze_agent(self, agent_cst):
+        """Transform the agent body in its own scope."""
         # agent_def structure: value = agent name, children[0] = stmt_list
         agent_name = agent_cst.value
         self.symtab.push()
         agent_body = self._transform_stmt_list(agent_cst.children[0])
         self.symtab.pop()
+        return AgentDef(agent_name, agent_body)
 
-        ast_prog = Program(world_ast, ast_funcs, AgentDef(agent_name, agent_body))
-        return ast_prog, self.errors
+    def _classify_purity(self, ast_funcs):
+        """
+        Mark each Function AST node pure or impure.
+        A function is pure if its body has no world action/sensing and every
+        function it calls is pure. Computed as a greatest fixpoint so that
+        (mutually) recursive pure functions stay pure.
+        """
+        effects = {}
+        for fn in ast_funcs:
+            effects[fn.value] = self._scan_effects(fn.children[2])
 
-    def _collect_param_names(self, param_list_opt):
-        """Extract parameter names from param_list_opt CST node."""
-        if param_list_opt is None:
-            return []
-        if param_list_opt.type == 'param_list_opt':
-            # param_list_opt can be empty or wrap a param_list
-            if not param_list_opt.children:
-                return []
-            first = param_list_opt.children[0]
-            if first.type == 'param_list':
-                return [p.value for p in first.children]
-        elif param_list_opt.type == 'param_list':
-            return [p.value for p in param_list_opt.children]
-        return []
+        pure = {name for name, (impure, _) in effects.items() if not impure}
+        changed = True
+        while changed:
+            changed = False
+            for name in list(pure):
+                if any(callee not in pure for callee in effects[name][1]):
+                    pure.discard(name)
+                    changed = True
+
+        for fn in ast_funcs:
+            fn.children[3].value = fn.value in pure
+        self.pure_functions = pure
+
+    def _scan_effects(self, node):
+        """Return (has_world_effect, called_function_names) for an AST subtree."""
+        impure = False
+        callees = set()
+        pending = [node]
+        while pending:
+            n = pending.pop()
+            if not isinstance(n, ASTNode):
+                continue
+            if n.kind in IMPURE_KINDS:
+                impure = True
+            elif n.kind == 'Call':
+                callees.add(n.value)
+            pending.extend(n.children)
+        return impure, callees
+
+    def _check_world_requirements(self, program):
+        """GOTO_DIRT/GOTO_EXIT plan on a bounded grid, so the world must declare a SIZE or MAP_FILE (and an EXIT for GOTO_EXIT)."""
+        world, funcs, agent = program.children
+        declared = {s.kind for s in world.children}
+        targets = set()
+        pending = [funcs, agent]
+        while pending:
+            n = pending.pop()
+            if not isinstance(n, ASTNode):
+                continue
+            if n.kind == 'Goto':
+                targets.add(n.value)
+            pending.extend(n.children)
+        if targets and not declared & {'Size', 'MapFile'}:
+            self.error("GOTO_DIRT/GOTO_EXIT used but the world has no SIZE")
+        if 'EXIT' in targets and 'Exit' not in declared:
+            self.error("GOTO_EXIT used but the world has no EXIT_DEF")
 
     def _transform_world(self, world_cst):
         """Transform world_def CST to AST."""
@@ -133,7 +194,8 @@ class SemanticAnalyzer:
         stmts = []
         
         for s in body.children:
-            # Parser world statements: size_decl, entry_decl, exit_decl, obstacle_decl, dirt_decl
+            # Parser world statements: size_decl, entry_decl, exit_decl, obstacle_decl, dirt_decl,
+            # obstacle_rect_decl, dirt_rect_decl, obstacle_random_decl, dirt_random_decl, map_decl
             if s.type == 'size_decl':
                 stmts.append(ASTNode('Size', value=s.value))
             elif s.type == 'entry_decl':
@@ -144,6 +206,29 @@ class SemanticAnalyzer:
                 stmts.append(ASTNode('Obstacle', value=s.value))
             elif s.type == 'dirt_decl':
                 stmts.append(ASTNode('Dirt', value=s.value))
+            elif s.type in ('obstacle_rect_decl', 'dirt_rect_decl'):
+                # value = (x1, y1, x2, y2), normalized so (x1, y1) is the top-left corner
+                x1, y1, x2, y2 = s.value
+                kind = 'ObstacleRect' if s.type == 'obstacle_rect_decl' else 'DirtRect'
+                stmts.append(ASTNode(kind, value=(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))))
+            elif s.type in ('obstacle_random_decl', 'dirt_random_decl'):
+                # value = (percent, seed)
+                if s.type == 'obstacle_random_decl':
+                    kind, keyword = 'ObstacleRandom', 'OBSTACLE_RANDOM'
+                else:
+                    kind, keyword = 'DirtRandom', 'DIRT_RANDOM'
+                if not 0 <= s.value[0] <= 100:
+                    self.error(f"{keyword} density must be a percentage (0-100), got {s.value[0]}")
+                stmts.append(ASTNode(kind, value=s.value))
+            elif s.type == 'map_decl':
+                # value = map file path
+                stmts.append(ASTNode('MapFile', value=s.value))
+        
+        kinds = {st.kind for st in stmts}
+        if kinds & {'ObstacleRandom', 'DirtRandom'} and not kinds & {'Size', 'MapFile'}:
+            self.error("OBSTACLE_RANDOM/DIRT_RANDOM used but the world has no SIZE")
+        if sum(st.kind == 'MapFile' for st in stmts) > 1:
+            self.error("A world can load only one MAP_FILE")
         
         return WorldDef(name, stmts)
 
@@ -204,6 +289,10 @@ class SemanticAnalyzer:
         if t == 'backtrack_stmt':
             return BacktrackStmt()
         
+        if t == 'goto_stmt':
+            # goto_stmt structure: value = target ('DIRT' or 'EXIT')
+            return GotoStmt(node.value)
+        
         if t == 'report_stmt':
             # report_stmt structure: children[0] = expr
             expr = self._transform_expr(node.children[0]) if node.children else None
@@ -299,6 +388,10 @@ class SemanticAnalyzer:
         if t == 'function_call':
             return self._transform_call(node)
         
+        if t == 'dirt_query':
+            # dirt_query structure: value = COUNT, DIST or DIR
+            return DirtQuery(node.value)
+        
         self.error(f"Unhandled expr kind: {t}")
         return ASTNode('UnknownExpr', value=t)
 
@@ -326,6 +419,42 @@ class SemanticAnalyzer:
         return CallExpr(name, args)
 
 
+def function_decls(funcs_cst):
+    """Return the function_decl CST nodes of a function_list_opt/function_list node."""
+    if funcs_cst:
+        if funcs_cst.type == 'function_list':
+            return funcs_cst.children
+        if funcs_cst.type == 'function_list_opt' and funcs_cst.children:
+            # defensive: function_list_opt might wrap the actual list
+            first = funcs_cst.children[0]
+            if first.type == 'function_list':
+                return first.children
+    return []
+
+
+def function_signature(f_cst):
+    """Return (name, param_names, ret_type) of a function_decl CST node."""
+    name = f_cst.value
+    ret_type = f_cst.children[1].value if len(f_cst.children) > 1 and f_cst.children[1] is not None else 'int'
+    return name, _collect_param_names(f_cst.children[0]), ret_type
+
+
+def _collect_param_names(param_list_opt):
+    """Extract parameter names from param_list_opt CST node."""
+    if param_list_opt is None:
+        return []
+    if param_list_opt.type == 'param_list_opt':
+        # param_list_opt can be empty or wrap a param_list
+        if not param_list_opt.children:
+            return []
+        first = param_list_opt.children[0]
+        if first.type == 'param_list':
+            return [p.value for p in first.children]
+    elif param_list_opt.type == 'param_list':
+        return [p.value for p in param_list_opt.children]
+    return []
+
+
 def analyze_cst(cst):
     """Convenience API: analyze a CST and return (ast, errors) tuple."""
     sa = SemanticAnalyzer()
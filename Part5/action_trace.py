@@ -0,0 +1,294 @@
+"""
+Action traces: a compact binary log of what a run did to the world, so the
+run can be replayed (and scrubbed to any point) without the program.
+
+A trace file is MAGIC, the length-prefixed zlib-compressed JSON of the
+state when recording started (scalars, the visited, dirt and obstacle cells
+as flat coordinate lists, the BACKTRACK history's fields), then one record
+per world action or REPORT:
+    opcode byte | steps since the previous record (varint) | operands
+and a closing END record with the halt reason. Opcodes carry the outcome
+(moved or blocked, dirt cleaned or not, ...), which replay checks against
+what it reproduces.
+
+Replay re-applies each action with the interpreter's own action handlers
+on the recorded world, so positions, dirt and outputs come out exactly as
+in the original run; no AST is needed and nothing is evaluated. Nothing in
+a trace is unpickled, so opening one runs no code from it. The replayed
+world always uses the set store, whatever store the run used.
+
+Usage: python action_trace.py TRACE [--at N] [--print]
+"""
+
+import copy
+import json
+import struct
+import sys
+import zlib
+from collections import namedtuple
+
+MAGIC = b'CWTR\x02'
+_LENGTH = struct.Struct('<I')
+
+# InterpreterState fields stored as they are, and those holding cells
+_SCALARS = ('width', 'height', 'agent_x', 'agent_y', 'agent_dir', 'cleaned_dirt', 'blocked_moves',
+            'steps', 'halt_reason', 'memo_hits', 'memo_misses', 'entry', 'exit', 'outputs')
+_CELL_LAYERS = ('visited', 'dirt', 'obstacles')
+
+# record opcodes
+(MOVE, MOVE_BLOCKED, TURN_LEFT, TURN_RIGHT, CLEAN, CLEAN_NONE,
+ BACKTRACK, BACKTRACK_NONE, GOTO, GOTO_NONE, REPORT, END) = range(12)
+
+_GOTO_TARGETS = ('DIRT', 'EXIT')
+
+# stand-in for the action statement the handlers expect (they read kind and value)
+Action = namedtuple('Action', 'kind value')
+
+
+def _varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+    return out
+
+
+def _text(text):
+    encoded = text.encode('utf-8')
+    return _varint(len(encoded)) + encoded
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_text(data, pos):
+    length, pos = _read_varint(data, pos)
+    return data[pos:pos + length].decode('utf-8'), pos + length
+
+
+def _encode_state(state):
+    """A state as compressed JSON (see the module docstring)."""
+    data = {name: getattr(state, name, None) for name in _SCALARS}
+    for name in _CELL_LAYERS:
+        data[name] = [v for cell in getattr(state, name) for v in cell]
+    data['history'] = state.history.to_dict()
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode_state(blob):
+    """InterpreterState from _encode_state's bytes; its layers are plain sets."""
+    from interpreter import InterpreterState
+    from path_history import PathHistory
+
+    data = json.loads(zlib.decompress(blob))
+    state = InterpreterState()
+    for name in _SCALARS:
+        setattr(state, name, data[name])
+    state.entry = tuple(state.entry) if state.entry else None
+    state.exit = tuple(state.exit) if state.exit else None
+    for name in _CELL_LAYERS:
+        flat = data[name]
+        setattr(state, name, set(zip(flat[::2], flat[1::2])))
+    state.history = PathHistory.from_dict(data['history'])
+    return state
+
+
+class TraceWriter:
+    """Records the world actions and REPORTs of one run (see Interpreter(trace_path=...))."""
+
+    def __init__(self, path, state):
+        self.fh = open(path, 'wb')
+        header = _encode_state(state)
+        self.fh.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        self.last_steps = state.steps
+        self.records = 0
+
+    def _record(self, state, opcode, operands=b''):
+        out = bytearray((opcode,))
+        out += _varint(state.steps - self.last_steps)
+        out += operands
+        self.fh.write(out)
+        self.last_steps = state.steps
+        self.records += 1
+
+    def wrap(self, interp, actions):
+        """Action handlers that record each action and its outcome after running it."""
+        def traced(kind, handler):
+            def run(stmt):
+                state = interp.state
+                before = (state.agent_x, state.agent_y, state.cleaned_dirt)
+                handler(stmt)
+                moved = (state.agent_x, state.agent_y) != before[:2]
+                if kind == 'Move':
+                    self._record(state, MOVE if moved else MOVE_BLOCKED)
+                elif kind == 'Turn':
+                    self._record(state, TURN_LEFT if stmt.value == 'LEFT' else TURN_RIGHT)
+                elif kind == 'Clean':
+                    self._record(state, CLEAN if state.cleaned_dirt != before[2] else CLEAN_NONE)
+                elif kind == 'Backtrack':
+                    self._record(state, BACKTRACK if moved else BACKTRACK_NONE)
+                elif kind == 'Goto':
+                    self._record(state, GOTO if moved else GOTO_NONE,
+                                 bytes((_GOTO_TARGETS.index(stmt.value),)))
+            return run
+        return {kind: traced(kind, handler) for kind, handler in actions.items()}
+
+    def report(self, state, value):
+        self._record(state, REPORT, _text(str(value)))
+
+    def close(self, state):
+        halt = state.halt_reason or ''
+        message = state.outputs[-1] if halt and state.outputs else ''
+        self._record(state, END, _text(halt) + _text(message))
+        self.fh.close()
+
+
+class TraceReplayer:
+    """
+    Rebuilds InterpreterStates from a trace file alone. state_at(i) is the
+    state after the first i records (0 = when recording started); a copy of
+    the state is kept every `keyframe_every` records so scrubbing back and
+    forth only replays the records since the nearest one.
+    """
+
+    def __init__(self, path, keyframe_every=1000):
+        from interpreter import Interpreter
+
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"Not a trace file: {path}")
+        pos = len(MAGIC)
+        (length,) = _LENGTH.unpack_from(data, pos)
+        pos += _LENGTH.size
+        try:
+            initial = _decode_state(data[pos:pos + length])
+        except (zlib.error, ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Corrupt trace header in {path}: {e}") from None
+        pos += length
+
+        self.records = []  # (opcode, step delta, operand)
+        while pos < len(data):
+            opcode = data[pos]
+            delta, pos = _read_varint(data, pos + 1)
+            operand = None
+            if opcode in (GOTO, GOTO_NONE):
+                operand = _GOTO_TARGETS[data[pos]]
+                pos += 1
+            elif opcode == REPORT:
+                operand, pos = _read_text(data, pos)
+            elif opcode == END:
+                halt, pos = _read_text(data, pos)
+                message, pos = _read_text(data, pos)
+                operand = (halt, message)
+            self.records.append((opcode, delta, operand))
+
+        self.keyframe_every = keyframe_every
+        self.interp = Interpreter()
+        self.interp.state = initial
+        self.position = 0
+        self.keyframes = {0: self._copy(initial)}
+
+    def __len__(self):
+        return len(self.records)
+
+    def _copy(self, state):
+        # obstacles never change during a run: keyframes share them
+        return copy.deepcopy(state, {id(state.obstacles): state.obstacles})
+
+    def _use(self, state):
+        interp = self.interp
+        interp.state = state
+        interp.dirt_index = None
+        interp._distance_fields = {}
+
+    def state_at(self, index):
+        """State after `index` records (a fresh copy is not made: do not modify it)."""
+        index = max(0, min(index, len(self.records)))
+        start = max(k for k in self.keyframes if k <= index)
+        # going back needs a keyframe; going forward, one is only worth copying
+        # when it is ahead of the current position and saves a long replay
+        if index < self.position or (start > self.position and index - self.position > self.keyframe_every):
+            self._use(self._copy(self.keyframes[start]))
+            self.position = start
+        while self.position < index:
+            self._apply(self.position, self.records[self.position])
+            self.position += 1
+            if self.position % self.keyframe_every == 0 and self.position not in self.keyframes:
+                self.keyframes[self.position] = self._copy(self.interp.state)
+        return self.interp.state
+
+    def final_state(self):
+        return self.state_at(len(self.records))
+
+    def _apply(self, i, record):
+        opcode, delta, operand = record
+        interp = self.interp
+        state = interp.state
+        state.steps += delta
+        before = (state.agent_x, state.agent_y, state.cleaned_dirt)
+        if opcode in (MOVE, MOVE_BLOCKED):
+            interp.perform_action(Action('Move', None))
+            ok = ((state.agent_x, state.agent_y) != before[:2]) == (opcode == MOVE)
+        elif opcode in (TURN_LEFT, TURN_RIGHT):
+            interp.perform_action(Action('Turn', 'LEFT' if opcode == TURN_LEFT else 'RIGHT'))
+            ok = True
+        elif opcode in (CLEAN, CLEAN_NONE):
+            interp.perform_action(Action('Clean', None))
+            ok = (state.cleaned_dirt != before[2]) == (opcode == CLEAN)
+        elif opcode in (BACKTRACK, BACKTRACK_NONE):
+            interp.perform_action(Action('Backtrack', None))
+            ok = ((state.agent_x, state.agent_y) != before[:2]) == (opcode == BACKTRACK)
+        elif opcode in (GOTO, GOTO_NONE):
+            interp.perform_action(Action('Goto', operand))
+            ok = ((state.agent_x, state.agent_y) != before[:2]) == (opcode == GOTO)
+        elif opcode == REPORT:
+            state.outputs.append(f"[REPORT] {operand}")
+            ok = True
+        elif opcode == END:
+            halt, message = operand
+            if halt:
+                state.halt_reason = halt
+                state.outputs.append(message)
+            ok = True
+        else:
+            raise ValueError(f"Unknown trace opcode {opcode} at record {i}")
+        if not ok:
+            raise ValueError(f"Trace record {i} does not replay to its recorded outcome")
+
+
+def main():
+    from run_complete import pop_option
+
+    args = sys.argv[1:]
+    do_print = '--print' in args
+    if do_print:
+        args.remove('--print')
+    at = pop_option(args, '--at', int)
+    if len(args) != 1:
+        print("Usage: python action_trace.py TRACE [--at N] [--print]")
+        sys.exit(1)
+    replayer = TraceReplayer(args[0])
+    state = replayer.final_state() if at is None else replayer.state_at(at)
+    print(f"Records: {len(replayer)}" + (f", showing the state after {min(max(at, 0), len(replayer))}"
+                                           if at is not None else ""))
+    summary = state.summary()
+    print(f"  Position: ({summary['position'][0]}, {summary['position'][1]}) facing {summary['direction']}")
+    print(f"  Dirt cleaned: {summary['cleaned_dirt']}, remaining: {summary['remaining_dirt']}")
+    print(f"  Steps: {summary['steps']}" + (f" (halted: {summary['halt_reason']})" if summary['halt_reason'] else ""))
+    if do_print:
+        for i, output in enumerate(state.outputs, 1):
+            print(f"  {i}. {output}")
+
+
+if __name__ == '__main__':
+    main()
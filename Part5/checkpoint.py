@@ -0,0 +1,140 @@
+"""
+Checkpoint file format for stack-mode interpreter snapshots.
+A checkpoint file is a short header followed by records of
+(step, length, snapshot), appended every N steps. A snapshot is a plain
+header (magic, the program digest and an HMAC) followed by a
+zlib-compressed pickle.
+
+The payload is a pickle, and unpickling can run arbitrary code, so it is
+authenticated first: the HMAC-SHA256 of digest and payload is keyed with a
+secret made on first use and kept in a file only this user can read
+(CW_CHECKPOINT_KEY_FILE, default ~/.cw_checkpoint_key). A snapshot this
+installation did not write, or one of another program, is rejected before
+anything is unpickled. Anyone who can read the key file can forge snapshots.
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+
+MAGIC = b'CWCK\x03'
+_RECORD = struct.Struct('<QI')  # step, payload length
+SNAPSHOT_MAGIC = b'CWSN\x02'
+_DIGEST_SIZE = 40  # hex sha1
+_MAC_SIZE = 32     # HMAC-SHA256
+_KEY_SIZE = 32
+
+_key = None  # this installation's snapshot key, read on first use
+
+
+def snapshot_key():
+    """The secret snapshots are signed with; created (readable by this user only) on first use."""
+    global _key
+    if _key is None:
+        path = os.environ.get('CW_CHECKPOINT_KEY_FILE') or os.path.join(os.path.expanduser('~'),
+                                                                        '.cw_checkpoint_key')
+        try:
+            with open(path, 'rb') as fh:
+                key = fh.read()
+        except FileNotFoundError:
+            # write the new key aside and link it into place, so a process
+            # starting at the same time never reads a half-written key
+            key = os.urandom(_KEY_SIZE)
+            temp = f"{path}.{os.getpid()}.tmp"
+            with os.fdopen(os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as fh:
+                fh.write(key)
+            try:
+                os.link(temp, path)
+            except FileExistsError:
+                with open(path, 'rb') as fh:
+                    key = fh.read()
+            finally:
+                os.unlink(temp)
+        if len(key) < _KEY_SIZE:
+            raise ValueError(f"Checkpoint key file is too short: {path}")
+        _key = key
+    return _key
+
+
+def _mac(key, digest, payload):
+    return hmac.new(key, digest + payload, hashlib.sha256).digest()
+
+
+def program_digest(ast):
+    """Identify a program so snapshots are only restored into the same AST."""
+    return hashlib.sha1(repr(ast).encode('utf-8')).hexdigest()
+
+
+def pack_snapshot(digest, payload, key=None):
+    """Snapshot bytes: header with the program digest and HMAC, then the compressed payload."""
+    digest = digest.encode('ascii')
+    return SNAPSHOT_MAGIC + digest + _mac(key or snapshot_key(), digest, payload) + payload
+
+
+def unpack_snapshot(blob):
+    """
+    Return (program digest, compressed payload) of a snapshot. Raises
+    ValueError unless its HMAC matches this installation's key.
+    """
+    start = len(SNAPSHOT_MAGIC)
+    header = start + _DIGEST_SIZE + _MAC_SIZE
+    if len(blob) < header or not blob.startswith(SNAPSHOT_MAGIC):
+        raise ValueError("Not an interpreter snapshot")
+    digest, mac, payload = blob[start:start + _DIGEST_SIZE], blob[start + _DIGEST_SIZE:header], blob[header:]
+    if not hmac.compare_digest(mac, _mac(snapshot_key(), digest, payload)):
+        raise ValueError("Snapshot signature does not match: it was not written by this installation")
+    return digest.decode('ascii', 'replace'), payload
+
+
+class CheckpointWriter:
+    """Appends snapshot records to a checkpoint file."""
+    def __init__(self, path, append=False):
+        self.path = path
+        self.fh = open(path, 'ab' if append else 'wb')
+        if self.fh.tell() == 0:
+            self.fh.write(MAGIC)
+
+    def write(self, step, blob):
+        self.fh.write(_RECORD.pack(step, len(blob)))
+        self.fh.write(blob)
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+
+def read_index(path):
+    """Return [(step, offset, length), ...] for every record in a checkpoint file."""
+    index = []
+    with open(path, 'rb') as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a checkpoint file: {path}")
+        while True:
+            header = fh.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                break  # end of file (or a record cut short by a crash)
+            step, length = _RECORD.unpack(header)
+            offset = fh.tell()
+            fh.seek(length, 1)
+            if fh.tell() - offset < length:
+                break
+            index.append((step, offset, length))
+    return index
+
+
+def load_snapshot(path, step=None):
+    """
+    Return (step, blob) of the latest snapshot taken at or before `step`
+    (the last snapshot when step is None), or (None, None) if there is none.
+    """
+    best = None
+    for entry in read_index(path):
+        if step is None or entry[0] <= step:
+            if best is None or entry[0] >= best[0]:
+                best = entry
+    if best is None:
+        return None, None
+    with open(path, 'rb') as fh:
+        fh.seek(best[1])
+        return best[0], fh.read(best[2])
@@ -0,0 +1,186 @@
+"""
+AST -> flat instruction list compiler for the Cleaning-World stack machine.
+Each function body (and the agent body) becomes a list of (op, arg) tuples
+that Interpreter runs with an explicit frame stack instead of Python recursion.
+"""
+
+# Statements that only act on the world; executed by the interpreter's action handlers
+ACTION_KINDS = {'Move', 'Turn', 'Clean', 'Backtrack', 'Goto'}
+
+# Frame name used for the agent body (matches the interpreter's global frame)
+AGENT_CODE = '__global__'
+
+
+def compile_program(functions, agent_stmts, tail_calls=True):
+    """
+    Compile registered functions {name: (params, ret_type, body)} and the
+    agent statement list. Returns {code_name: [(op, arg), ...]}.
+    """
+    known = set(functions)
+    code = {}
+    for name, (params, ret_type, body) in functions.items():
+        code[name] = _Compiler(known, True, tail_calls).compile_body(body or [])
+    code[AGENT_CODE] = _Compiler(known, False, False).compile_body(agent_stmts or [])
+    return code
+
+
+class _Compiler:
+    """Emits instructions for one body; jump targets are absolute indexes."""
+    def __init__(self, known_functions, in_function, tail_calls):
+        self.known = known_functions
+        self.in_function = in_function
+        self.tail_calls = tail_calls
+        self.code = []
+
+    def emit(self, op, arg=None):
+        self.code.append((op, arg))
+        return len(self.code) - 1
+
+    def patch(self, index, target):
+        op, _ = self.code[index]
+        self.code[index] = (op, target)
+
+    def compile_body(self, stmts):
+        self.block(stmts)
+        self.emit('END')
+        return self.code
+
+    def block(self, stmts):
+        for s in stmts:
+            self.stmt(s)
+
+    def stmt(self, stmt):
+        if not stmt:
+            return
+        kind = stmt.kind
+        # STEP counts executed statements (and is where snapshots/pauses happen)
+        self.emit('STEP')
+
+        if kind == 'VarDecl':
+            self.expr(stmt.children[0] if stmt.children else None)
+            self.emit('DECLARE', stmt.value)
+        elif kind == 'Assign':
+            self.expr(stmt.children[0])
+            self.emit('STORE', stmt.value)
+        elif kind == 'If':
+            if len(stmt.children) < 3:
+                return
+            cond, then_node, else_node = stmt.children[0], stmt.children[1], stmt.children[2]
+            self.condition(cond)
+            jump_else = self.emit('JUMP_IF_FALSE')
+            if then_node.kind == 'Then':
+                self.block(then_node.children)
+            jump_end = self.emit('JUMP')
+            self.patch(jump_else, len(self.code))
+            if else_node.kind == 'Else':
+                self.block(else_node.children)
+            self.patch(jump_end, len(self.code))
+        elif kind == 'While':
+            if len(stmt.children) < 2:
+                return
+            cond, body = stmt.children[0], stmt.children[1]
+            # ENTER_LOOP marks a fresh execution of the loop (cycle detection scope)
+            head = len(self.code) + 1
+            self.emit('ENTER_LOOP', head)
+            self.condition(cond)
+            if body.kind == 'Body' and body.children:
+                exit_jump = self.emit('JUMP_IF_FALSE')
+                self.block(body.children)
+                self.emit('LOOP', head)
+                self.patch(exit_jump, len(self.code))
+            else:
+                # empty body: condition is evaluated once, as in the tree walker
+                self.emit('POP')
+        elif kind in ACTION_KINDS:
+            self.emit('ACTION', stmt)
+        elif kind == 'Report':
+            if stmt.children:
+                self.expr(stmt.children[0])
+                self.emit('REPORT')
+        elif kind == 'Return':
+            value = stmt.children[0] if stmt.children else None
+            if (self.tail_calls and self.in_function and value is not None
+                    and value.kind == 'Call' and value.value in self.known):
+                self.args(value)
+                self.emit('TAIL_CALL', (value.value, len(value.children)))
+            else:
+                if value is None:
+                    self.emit('CONST', None)
+                else:
+                    self.expr(value)
+                self.emit('RETURN')
+        elif kind == 'Call':
+            self.call(stmt)
+            self.emit('POP')
+        elif kind == 'CallStmt':
+            if stmt.children:
+                self.call(stmt.children[0])
+                self.emit('POP')
+        # else: unknown statement, ignore
+
+    def expr(self, expr):
+        if not expr:
+            self.emit('CONST', 0)
+            return
+        kind = expr.kind
+
+        if kind == 'Int':
+            self.emit('CONST', expr.value)
+        elif kind == 'Var':
+            self.emit('LOAD', expr.value)
+        elif kind == 'BinOp':
+            self.expr(expr.children[0] if len(expr.children) > 0 else None)
+            self.expr(expr.children[1] if len(expr.children) > 1 else None)
+            self.emit('BINOP', expr.value)
+        elif kind == 'Call':
+            self.call(expr)
+        elif kind == 'Sense':
+            self.emit('SENSE', expr)
+        elif kind == 'Unvisited':
+            self.emit('UNVISITED', 1)
+        elif kind == 'DirtQuery':
+            self.emit('DIRT_QUERY', expr.value)
+        else:
+            self.emit('CONST', 0)
+
+    def condition(self, cond):
+        if not cond:
+            self.emit('CONST', False)
+            return
+        kind = cond.kind
+
+        if kind == 'Sense':
+            self.emit('SENSE', cond)
+        elif kind == 'Unvisited':
+            self.emit('UNVISITED', True)
+        elif kind in ('And', 'Or'):
+            for i in range(2):
+                if len(cond.children) > i:
+                    self.condition(cond.children[i])
+                else:
+                    self.emit('CONST', False)
+            self.emit(kind.upper())
+        elif kind == 'RelOp':
+            self.expr(cond.children[0] if len(cond.children) > 0 else None)
+            self.expr(cond.children[1] if len(cond.children) > 1 else None)
+            self.emit('RELOP', cond.value)
+        elif kind == 'Not':
+            if cond.children:
+                self.condition(cond.children[0])
+                self.emit('NOT')
+            else:
+                self.emit('CONST', False)
+        else:
+            self.emit('CONST', False)
+
+    def call(self, call):
+        if call.value not in self.known:
+            # fail before evaluating arguments, like the tree walker
+            self.emit('UNDEFINED', call.value)
+            return
+        self.args(call)
+        self.emit('CALL', (call.value, len(call.children)))
+
+    def args(self, call):
+        for arg_expr in call.children:
+            self.expr(arg_expr)
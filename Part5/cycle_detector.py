@@ -0,0 +1,81 @@
+"""
+Runaway WHILE detection for the Cleaning-World interpreter.
+At every loop back-edge the relevant interpreter state is fingerprinted; if
+the same state is seen twice during one execution of the loop, the program
+can never leave it and the run is stopped early. A loop is only stopped
+after an exact repeat, never on a fingerprint match alone.
+"""
+
+class NonTerminatingLoop(Exception):
+    """Raised when a WHILE loop returns to a state it has already been in."""
+    def __init__(self, iterations):
+        super().__init__(f"non-terminating loop (state repeated after {iterations} iterations)")
+        self.iterations = iterations
+
+
+class LoopWatch:
+    """Fingerprints seen during one execution of one WHILE loop."""
+    def __init__(self, window):
+        self.window = window
+        self.progress = None  # (len(visited), len(dirt)) when `seen` was started
+        self.seen = {}        # fingerprint -> iteration number
+        self.iterations = 0
+        self.candidate = None  # (iteration, period, exact state) of a match awaiting confirmation
+
+
+class CycleDetector:
+    """
+    Tracks the state a loop iteration depends on.
+
+    visited only grows and dirt only shrinks during a run, so their sizes
+    identify them exactly; a change of either means progress and clears the
+    fingerprints seen so far. The history stack is covered by its length and
+    the PathHistory rolling hash; it is only part of the fingerprint when
+    the program can BACKTRACK (track_history), since otherwise it never
+    influences execution. `window` bounds how many fingerprints are kept per
+    loop between two progress points.
+
+    Without the history the fingerprint is the exact state, so a repeat
+    stops the loop at once. With it, two different paths can share a hash:
+    a match copies the exact state (the whole path) and the loop is only
+    stopped if one period later it is in exactly that state again, which a
+    deterministic program then repeats forever. A collision costs a copy of
+    the path and lets the loop run on.
+    """
+
+    def __init__(self, window=4096, track_history=True):
+        self.window = window
+        self.track_history = track_history
+
+    def enter_loop(self):
+        """Start watching a fresh execution of a WHILE loop."""
+        return LoopWatch(self.window)
+
+    def back_edge(self, watch, state, call_stack):
+        """Record the state at a loop back-edge; raise NonTerminatingLoop on a repeat."""
+        watch.iterations += 1
+        progress = (len(state.visited), len(state.dirt))
+        if progress != watch.progress or len(watch.seen) >= watch.window:
+            watch.progress = progress
+            watch.seen = {}
+            watch.candidate = None
+
+        history = (len(state.history), state.history.hash) if self.track_history else None
+        fingerprint = (
+            state.agent_x, state.agent_y, state.agent_dir, history,
+            tuple(tuple(sorted(frame.locals.items())) for frame in call_stack),
+        )
+        if watch.candidate is not None:
+            iteration, period, exact = watch.candidate
+            if watch.iterations == iteration + period:
+                if (fingerprint, tuple(state.history)) == exact:
+                    raise NonTerminatingLoop(period)
+                watch.candidate = None  # the match was a hash collision
+        first = watch.seen.get(fingerprint)
+        if first is not None:
+            if not self.track_history:
+                raise NonTerminatingLoop(watch.iterations - first)
+            if watch.candidate is None:
+                watch.candidate = (watch.iterations, watch.iterations - first,
+                                   (fingerprint, tuple(state.history)))
+        watch.seen[fingerprint] = watch.iterations
@@ -0,0 +1,363 @@
+"""
+Monte Carlo evaluation of an agent program over randomized variants of its world.
+
+Each seed gives one variant: the WORLD is built as declared, then perturbed
+by a generator seeded with that seed (see VariantSpec): dirt moved to other
+free cells, some obstacles pushed one cell aside, another starting direction.
+Variants run on a process pool. A worker sends back a handful of numbers per
+run (dirt cleaned, steps, blocked moves, exit reached) and the parent folds
+them into running statistics, so no InterpreterState outlives its run and
+memory does not grow with the number of seeds.
+
+    spec = VariantSpec(shuffle_dirt=True, obstacle_shift=10, entry_dirs='NESW')
+    for stats in evaluate(ast, spec, range(1000), report_every=100, max_steps=100000):
+        print(stats.summary())
+
+Usage: python evaluator.py [--seeds A:B] [--workers N] [--shuffle-dirt] [--obstacle-shift P]
+                           [--entry-dirs NESW] [--max-steps N] [--every N] [--json] program.cl
+"""
+
+import json
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from interpreter import Interpreter
+
+DIRECTIONS = 'NESW'
+_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+# distinct values a Distribution keeps before it widens its buckets
+MAX_BUCKETS = 1024
+
+# statements a variant may run when no max_steps is given
+DEFAULT_MAX_STEPS = 100000
+
+
+class VariantSpec:
+    """
+    How a world is varied from seed to seed.
+    shuffle_dirt: every dirt cell moves to a random cell that holds no
+    obstacle (the amount of dirt stays the same; needs a SIZE).
+    obstacle_shift: percent of the obstacles pushed one cell in a random
+    direction; an obstacle stays put if that cell is off the grid, taken, or
+    the entry or exit.
+    entry_dirs: directions the agent may start facing, e.g. 'NESW' (None
+    keeps the declared one).
+    """
+
+    def __init__(self, shuffle_dirt=False, obstacle_shift=0, entry_dirs=None):
+        if not 0 <= obstacle_shift <= 100:
+            raise ValueError(f"obstacle_shift must be a percentage, got {obstacle_shift}")
+        if entry_dirs is not None and (not entry_dirs or set(entry_dirs) - set(DIRECTIONS)):
+            raise ValueError(f"entry_dirs must be some of {DIRECTIONS}, got {entry_dirs!r}")
+        self.shuffle_dirt = shuffle_dirt
+        self.obstacle_shift = obstacle_shift
+        self.entry_dirs = entry_dirs
+
+    def apply(self, state, seed):
+        """Perturb a loaded InterpreterState's world in place."""
+        rng = random.Random(seed)
+        if self.obstacle_shift:
+            self._shift_obstacles(state, rng)
+        if self.shuffle_dirt and state.width and state.height:
+            self._shuffle_dirt(state, rng)
+        if self.entry_dirs:
+            state.agent_dir = rng.choice(self.entry_dirs)
+
+    def _shift_obstacles(self, state, rng):
+        obstacles, dirt = state.obstacles, state.dirt
+        width, height = state.width, state.height
+        ends = {(state.agent_x, state.agent_y), state.entry, state.exit}
+        cells = sorted(obstacles)  # a fixed order, whatever the layer iterates in
+        for x, y in rng.sample(cells, len(cells) * self.obstacle_shift // 100):
+            dx, dy = rng.choice(_STEPS)
+            target = (x + dx, y + dy)
+            if width and height and not (1 <= target[0] <= width and 1 <= target[1] <= height):
+                continue
+            if target in obstacles or target in dirt or target in ends:
+                continue
+            obstacles.discard((x, y))
+            obstacles.add(target)
+
+    def _shuffle_dirt(self, state, rng):
+        # one bulk draw, as for DIRT_RANDOM: drawing as many extra cells as there
+        # are obstacles leaves enough free cells among them
+        width, height = state.width, state.height
+        obstacles, dirt = state.obstacles, state.dirt
+        total = width * height
+        count = len(dirt)
+        picked = rng.sample(range(total), min(total, count + len(obstacles)))
+        cells = [(i % width + 1, i // width + 1) for i in picked]
+        dirt.clear()
+        dirt.update([c for c in cells if c not in obstacles][:count])
+
+
+def run_variant(ast, spec, seed, max_steps=DEFAULT_MAX_STEPS, **interp_options):
+    """
+    Run the program on one seed's variant; returns that run's metrics.
+    max_steps=None lets the run go on for as long as the program does.
+    """
+    try:
+        interp = Interpreter(max_steps=max_steps, **interp_options)
+        interp.load(ast)
+        spec.apply(interp.state, seed)
+        state = interp.resume()
+    except Exception as e:
+        return {'seed': seed, 'error': str(e)}
+    return {
+        'seed': seed,
+        'cleaned_dirt': state.cleaned_dirt,
+        'steps': state.steps,
+        'blocked_moves': state.blocked_moves,
+        'exit_reached': state.exit is not None and state.exit in state.visited,
+        'halt_reason': state.halt_reason,
+    }
+
+
+class Distribution:
+    """
+    Count, mean, percentiles and histogram of integer samples, kept as counts
+    per value. Past MAX_BUCKETS distinct values the buckets double in width
+    (percentiles become bucket lower bounds); count, mean, min and max stay exact.
+    """
+
+    def __init__(self):
+        self.counts = {}  # value // width -> samples
+        self.width = 1
+        self.n = 0
+        self.total = 0
+        self.min = self.max = None
+
+    def add(self, value):
+        self.n += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        key = value // self.width
+        self.counts[key] = self.counts.get(key, 0) + 1
+        while len(self.counts) > MAX_BUCKETS:
+            self.width *= 2
+            merged = {}
+            for key, count in self.counts.items():
+                merged[key // 2] = merged.get(key // 2, 0) + count
+            self.counts = merged
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else None
+
+    def percentile(self, p):
+        """Nearest-rank percentile (0 < p <= 100)."""
+        if not self.n:
+            return None
+        rank = max(1, -(-self.n * p // 100))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return max(key * self.width, self.min)
+        return self.max
+
+    def histogram(self, bins=10):
+        """[(low, high, count)]: `bins` equal ranges from min to max, both ends included."""
+        if not self.n:
+            return []
+        span = max(1, -(-(self.max - self.min + 1) // bins))
+        counts = [0] * bins
+        for key, count in self.counts.items():
+            counts[(max(key * self.width, self.min) - self.min) // span] += count
+        return [(self.min + i * span, min(self.min + (i + 1) * span - 1, self.max), count)
+                for i, count in enumerate(counts) if self.min + i * span <= self.max]
+
+    def summary(self, percentiles=(50, 90, 99), bins=10):
+        return {
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'percentiles': {p: self.percentile(p) for p in percentiles},
+            'histogram': self.histogram(bins),
+        }
+
+
+class EvaluationStats:
+    """Running totals over the finished runs of an evaluation."""
+
+    METRICS = ('cleaned_dirt', 'steps', 'blocked_moves')
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.exit_reached = 0
+        self.halts = {}  # halt reason -> runs stopped by it
+        self.metrics = {name: Distribution() for name in self.METRICS}
+
+    def add(self, result):
+        """Fold one run_variant result in."""
+        if 'error' in result:
+            self.errors += 1
+            return
+        self.runs += 1
+        self.exit_reached += bool(result['exit_reached'])
+        if result['halt_reason']:
+            self.halts[result['halt_reason']] = self.halts.get(result['halt_reason'], 0) + 1
+        for name, dist in self.metrics.items():
+            dist.add(result[name])
+
+    @property
+    def exit_rate(self):
+        return self.exit_reached / self.runs if self.runs else None
+
+    def summary(self, percentiles=(50, 90, 99), bins=10):
+        """JSON-friendly dict of the statistics so far."""
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'exit_rate': self.exit_rate,
+            'halts': dict(self.halts),
+            **{name: dist.summary(percentiles, bins) for name, dist in self.metrics.items()},
+        }
+
+
+# ---------- Worker side ----------
+
+_job = None  # this worker's (ast, spec, interp_options)
+
+
+def _init_worker(ast, spec, interp_options):
+    """Pool initializer: the program and spec are sent once per worker, not once per seed."""
+    global _job
+    _job = (ast, spec, interp_options)
+
+
+def _run_batch(seeds):
+    ast, spec, interp_options = _job
+    return [run_variant(ast, spec, seed, **interp_options) for seed in seeds]
+
+
+# ---------- Parent side ----------
+
+def evaluate(ast, spec, seeds, workers=None, batch_size=16, report_every=None, **interp_options):
+    """
+    Run the program on the variant of every seed and yield the running
+    EvaluationStats (the same object, updated in place): after every
+    report_every finished runs, and once more when all have finished.
+    Seeds go out in batches of batch_size, with at most two batches per
+    worker in flight, so `seeds` may be a long range or a lazy iterable.
+    workers=1 runs in this process. interp_options go to every Interpreter;
+    max_steps defaults to DEFAULT_MAX_STEPS, so a runaway variant cannot
+    stall the pool (pass max_steps=None, with a time_limit, to lift it).
+    """
+    stats = EvaluationStats()
+    seeds = iter(seeds)
+    pending_report = 0
+
+    def batches():
+        while True:
+            batch = [seed for _, seed in zip(range(batch_size), seeds)]
+            if not batch:
+                return
+            yield batch
+
+    def fold(results):
+        nonlocal pending_report
+        for result in results:
+            stats.add(result)
+            pending_report += 1
+            if report_every and pending_report >= report_every:
+                pending_report = 0
+                yield stats
+
+    if workers == 1:
+        for batch in batches():
+            yield from fold([run_variant(ast, spec, seed, **interp_options) for seed in batch])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(ast, spec, interp_options)) as pool:
+            todo = batches()
+            in_flight = set()
+            limit = 2 * (workers or os.cpu_count() or 1)
+            while True:
+                for batch in todo:
+                    in_flight.add(pool.submit(_run_batch, batch))
+                    if len(in_flight) >= limit:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from fold(future.result())
+    if pending_report or not report_every:
+        yield stats
+
+
+def _format(summary):
+    lines = [f"Runs: {summary['runs']}" + (f" ({summary['errors']} failed)" if summary['errors'] else "")]
+    if summary['exit_rate'] is not None:
+        lines.append(f"Exit reached: {summary['exit_rate']:.1%}")
+    for reason, count in summary['halts'].items():
+        lines.append(f"Halted ({reason}): {count}")
+    for name in EvaluationStats.METRICS:
+        dist = summary[name]
+        if dist['mean'] is None:
+            continue
+        pcts = ', '.join(f"p{p} {v}" for p, v in dist['percentiles'].items())
+        lines.append(f"{name}: mean {dist['mean']:.2f}, min {dist['min']}, max {dist['max']}, {pcts}")
+        peak = max(count for _, _, count in dist['histogram'])
+        for low, high, count in dist['histogram']:
+            label = f"{low}" if low == high else f"{low}-{high}"
+            lines.append(f"  {label:>15} | {'#' * (40 * count // peak):<40} {count}")
+    return "\n".join(lines)
+
+
+def _parse_seeds(text):
+    start, _, stop = text.partition(':')
+    return range(int(start), int(stop)) if stop else range(int(start))
+
+
+def main():
+    from run_complete import analyze_program, pop_option
+
+    args = sys.argv[1:]
+    flags = {}
+    for flag in ('--shuffle-dirt', '--json'):
+        flags[flag] = flag in args
+        if flags[flag]:
+            args.remove(flag)
+    seeds = pop_option(args, '--seeds', _parse_seeds)
+    workers = pop_option(args, '--workers', int)
+    obstacle_shift = pop_option(args, '--obstacle-shift', int) or 0
+    entry_dirs = pop_option(args, '--entry-dirs')
+    max_steps = pop_option(args, '--max-steps', int)
+    every = pop_option(args, '--every', int)
+    for name, value in (('--workers', workers), ('--max-steps', max_steps), ('--every', every)):
+        if value is not None and value <= 0:
+            print(f"Error: {name} must be a positive number, got {value}")
+            sys.exit(1)
+    if len(args) != 1:
+        print("Usage: python evaluator.py [--seeds A:B] [--workers N] [--shuffle-dirt] [--obstacle-shift P] "
+              "[--entry-dirs NESW] [--max-steps N] [--every N] [--json] program.cl")
+        sys.exit(1)
+    if not os.path.exists(args[0]):
+        print(f"Error: File not found: {args[0]}")
+        sys.exit(1)
+    try:
+        spec = VariantSpec(flags['--shuffle-dirt'], obstacle_shift, entry_dirs)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if seeds is None:
+        seeds = range(100)
+    if max_steps is None:
+        max_steps = DEFAULT_MAX_STEPS
+
+    ast = analyze_program(os.path.abspath(args[0]))
+    for stats in evaluate(ast, spec, seeds, workers=workers, report_every=every, max_steps=max_steps):
+        summary = stats.summary()
+        print(json.dumps(summary) if flags['--json'] else _format(summary) + "\n")
+
+
+if __name__ == '__main__':
+    main()
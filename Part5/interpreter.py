@@ -3,12 +3,48 @@ AST Interpreter for Cleaning-World Language
 Executes AST trees with function calls, control flow, and variable scoping.
 """
 
+import operator
+import pickle
+import random
+import time
+import zlib
+from collections import OrderedDict, deque
+from itertools import compress, islice, repeat
+
+from compiler import compile_program
+from cycle_detector import CycleDetector, NonTerminatingLoop
+from checkpoint import CheckpointWriter, load_snapshot, pack_snapshot, program_digest, unpack_snapshot
+from world_store import RegionLayer, make_layers
+from path_history import PathHistory
+from pathfinding import DistanceField
+from spatial_index import DirtIndex
+from map_file import DIRT, OBSTACLE, CodeGrid, MapGrid, MapLayer, close_maps
+from action_trace import TraceWriter
+
+# how many statements run between two wall-clock checks of time_limit
+LIMIT_CHECK_INTERVAL = 1024
+
+
 class ReturnValue(Exception):
     """Control flow exception for RETURN statements."""
     def __init__(self, value):
         self.value = value
 
 
+class TailCall(Exception):
+    """Control flow exception for RETURN f(...): the caller's frame is reused for f."""
+    def __init__(self, func_name, args):
+        self.func_name = func_name
+        self.args = args
+
+
+class ExecutionLimit(Exception):
+    """Raised when a run exceeds its step budget or time limit."""
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
 class BreakException(Exception):
     """Control flow exception for breaking out of loops (not used yet, for future)."""
     pass
@@ -19,9 +55,31 @@ class InterpreterState:
     def __init__(self):
         self.visited = set()  # set of (x, y) visited locations
         self.cleaned_dirt = 0  # count of dirt cleaned
+        self.blocked_moves = 0  # MOVEs stopped by the edge of the world or an obstacle
         self.agent_x, self.agent_y = None, None  # agent position
         self.agent_dir = None  # agent direction (N, E, S, W)
         self.outputs = []  # collected REPORT outputs
+        self.memo_hits = 0  # pure-function calls answered from the cache
+        self.memo_misses = 0  # pure-function calls that ran the body
+        self.halt_reason = None  # set when the run was stopped early (e.g. non-terminating loop)
+        self.steps = 0  # statements executed so far
+
+    def summary(self):
+        """JSON-friendly dict of the final state (used by the execution server)."""
+        dirt = getattr(self, 'dirt', None)
+        return {
+            'position': [self.agent_x, self.agent_y],
+            'direction': self.agent_dir,
+            'cleaned_dirt': self.cleaned_dirt,
+            'blocked_moves': self.blocked_moves,
+            'remaining_dirt': len(dirt) if dirt is not None else None,
+            'visited': len(self.visited),
+            'steps': self.steps,
+            'halt_reason': self.halt_reason,
+            'memo_hits': self.memo_hits,
+            'memo_misses': self.memo_misses,
+            'outputs': [str(output) for output in self.outputs],
+        }
 
 
 class CallFrame:
@@ -29,6 +87,44 @@ class CallFrame:
     def __init__(self, func_name, locals_dict):
         self.func_name = func_name
         self.locals = locals_dict  # {var_name: value}
+        # stack mode only: resume point, operand stack and memo keys awaiting the result
+        self.pc = 0
+        self.operands = []
+        self.memo_keys = None
+        self.loop_watches = None  # {loop head pc: LoopWatch} when cycle detection is on
+
+
+def _scatter(buf, indices, value):
+    """buf[i] = value for every index (the loop runs in C, inside map)."""
+    deque(map(buf.__setitem__, indices, repeat(value)), maxlen=0)
+
+
+def _mark_layer(mask, width, height, layer):
+    """
+    Set mask[(y - 1) * width + x - 1] to 1 for a layer's cells inside the
+    grid. Map rows and rectangle rows are marked a slice at a time; only
+    single cells are marked one by one.
+    """
+    while layer is not None:
+        if isinstance(layer, MapLayer):
+            table = bytes(int(code == layer.code) for code in range(256))
+            for py in range(min(height, layer.grid.height)):
+                start = py * width
+                row = layer.grid.row_codes(py)[:width].translate(table)
+                mask[start:start + len(row)] = bytes(map(operator.or_, row, mask[start:start + len(row)]))
+        elif isinstance(layer, RegionLayer):
+            for y, (starts, ends) in layer.rows.items():
+                if 1 <= y <= height:
+                    for a, b in zip(starts, ends):
+                        a, b = max(a, 1), min(b, width)
+                        if a <= b:
+                            mask[(y - 1) * width + a - 1:(y - 1) * width + b] = b'\x01' * (b - a + 1)
+        else:
+            for x, y in layer:
+                if 1 <= x <= width and 1 <= y <= height:
+                    mask[(y - 1) * width + x - 1] = 1
+            return
+        layer = layer.cells
 
 
 class Interpreter:
@@ -38,14 +134,69 @@ class Interpreter:
     - Variables with scoping (global, function local, agent local)
     - Function definitions and calls with parameters
     - Control flow (IF, WHILE, RETURN)
-    - Built-in actions (MOVE, TURN, CLEAN, BACKTRACK, REPORT)
+    - Built-in actions (MOVE, TURN, CLEAN, BACKTRACK, GOTO_DIRT, GOTO_EXIT, REPORT)
     - Arithmetic and boolean expressions
     - Sensing conditions (SENSE, UNVISITED, relational operators, AND/OR)
+    - Memoization of pure function calls in a per-function LRU cache
+    - Tail-call elimination for RETURN f(...)
+
+    memo_size is the number of argument tuples cached per pure function
+    (0 disables memoization).
+    mode is 'tree' (recursive tree walk) or 'stack' (compiled code run on an
+    explicit frame stack, so FUNC recursion depth is not bounded by Python's).
+    detect_cycles stops the run when a WHILE loop revisits an identical state.
+    checkpoint_path/checkpoint_every write a snapshot every N steps (stack
+    mode); see snapshot(), restore(), from_checkpoint() and run_until().
+    max_steps / time_limit (seconds) stop a run that executes too many
+    statements or runs too long; the state is kept with a halt reason.
+    yield_actions (stack mode) pauses before every world action and leaves
+    it in pending_action for a scheduler to perform (see multiagent.py).
+    world_store is 'set' or 'chunked' (tiled bitsets for very large maps,
+    see world_store.py). history_depth bounds how many moves BACKTRACK can
+    undo (None keeps the whole path, 2 bits per move).
+    trace_path records every world action and REPORT of the run to a
+    binary action trace (see action_trace.py) that replays without the program.
+    shared_world (a SharedWorld, see shared_world.py) replaces the WORLD
+    declarations: obstacles and dirt are read from its shared memory grid
+    and only this run's changes are kept here. Any object whose
+    attach(state) sets up the world will do (multiagent.py passes one).
     """
 
-    def __init__(self):
+    def __init__(self, memo_size=128, mode='tree', tail_calls=True, detect_cycles=False,
+                 checkpoint_path=None, checkpoint_every=0, max_steps=None, time_limit=None,
+                 yield_actions=False, world_store='set', history_depth=None, trace_path=None,
+                 shared_world=None):
+        if mode not in ('tree', 'stack'):
+            raise ValueError(f"Unknown interpreter mode: {mode}")
+        if checkpoint_path and mode != 'stack':
+            raise ValueError("checkpointing requires mode='stack'")
+        if checkpoint_path and (checkpoint_every is None or checkpoint_every <= 0):
+            raise ValueError(f"checkpoint_every must be a positive number of steps, got {checkpoint_every}")
+        if yield_actions and mode != 'stack':
+            raise ValueError("yield_actions requires mode='stack'")
+        self.mode = mode
+        self.tail_calls = tail_calls
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every if checkpoint_path else 0
+        self._checkpoint_writer = None
+        self._last_checkpoint_step = None  # step of the snapshot we resumed from / last wrote
+        self._restored = False
+        self._program_digest = None
+        self.trace_path = trace_path
+        self.trace = None  # TraceWriter while a traced run is in progress
+        self.stop_at_step = None  # stack mode: pause before this step (run_until)
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+        self._deadline = None
+        self._next_limit_check = None  # step at which _check_limits runs next (None: no limits)
+        self.paused = False
+        self.yield_actions = yield_actions
+        self.pending_action = None  # action statement the run paused on (yield_actions)
         self.global_vars = {}  # global variables
         self.functions = {}  # {func_name: (params, ret_type, body_ast)}
+        self.pure_functions = set()  # functions the analyzer marked as pure
+        self.memo_size = memo_size
+        self.memo = {}  # {func_name: OrderedDict(args_tuple -> result)}, LRU order
         self.call_stack = []  # CallFrame list; call_stack[0] is outermost (global)
         self.state = InterpreterState()
         self.return_value = None
@@ -54,18 +205,42 @@ class Interpreter:
         # width/height are 1-based coordinates matching source programs
         self.state.width = None
         self.state.height = None
-        self.state.dirt = set()        # set of (x,y) positions with dirt
-        self.state.obstacles = set()   # set of (x,y) obstacle positions
+        # visited / dirt / obstacle cells: sets of (x,y), or set-like chunked layers
+        # (dirt and obstacles become RegionLayers when the world declares rectangles,
+        # MapLayers over a MAP_FILE)
+        self.world_store = world_store
+        self.shared_world = shared_world
+        # close the map files behind the world when a run ends (off when the
+        # world outlives the run, e.g. shared by the multi-agent runtime)
+        self.owns_maps = True
+        self.state.visited, self.state.dirt, self.state.obstacles = make_layers(world_store)
         self.state.entry = None        # (x,y)
         self.state.exit = None         # (x,y)
-        # history of positions for BACKTRACK
-        self.state.history = []
+        # path of positions for BACKTRACK (packed move codes)
+        self.state.history = PathHistory(history_depth)
+        # handlers for world actions, shared by both execution modes
+        self._actions = {
+            'Move': self._execute_move,
+            'Turn': self._execute_turn,
+            'Clean': self._execute_clean,
+            'Backtrack': self._execute_backtrack,
+            'Goto': self._execute_goto,
+        }
+        self._distance_fields = {}  # GOTO target -> DistanceField
+        self.dirt_index = None      # DirtIndex over state.dirt, built on the first dirt query
+        self._code = {}  # compiled code per function (stack mode)
+        self.cycle_detector = CycleDetector() if detect_cycles else None
 
     def execute(self, ast):
         """
         Main entry point. Execute the program AST.
         Returns the interpreter state (outputs, visited, cleaned_dirt, etc).
         """
+        self.load(ast)
+        return self._run()
+
+    def load(self, ast):
+        """Initialize world, functions and the agent entry point without running."""
         if ast.kind != 'Program':
             raise RuntimeError(f"Expected Program, got {ast.kind}")
 
@@ -78,7 +253,9 @@ class Interpreter:
         agent = ast.children[2] if len(ast.children) > 2 else None
 
         # Phase 1: Initialize world
-        if world:
+        if self.shared_world is not None:
+            self.shared_world.attach(self.state)
+        elif world:
             self._init_world(world)
 
         # Phase 2: Register functions (don't execute yet)
@@ -86,18 +263,178 @@ class Interpreter:
             for func_node in functions_node.children:
                 self._register_function(func_node)
 
-        # Phase 3: Execute agent
-        if agent:
-            self._execute_agent(agent)
-
+        # Phase 3: Prepare agent
+        if self.cycle_detector:
+            self.cycle_detector.track_history = self._contains_kind(ast, 'Backtrack')
+        self._agent = agent if agent and agent.kind == 'Agent' else None
+        if self.mode == 'stack':
+            self._program_digest = program_digest(ast)
+            self._code = compile_program(self.functions, self._agent.children if self._agent else [],
+                                         self.tail_calls)
+
+    def _run(self):
+        """Run (or resume) the agent; early-stop conditions become a halt reason."""
+        self.paused = False
+        self.pending_action = None
+        if self.time_limit is not None:
+            self._deadline = time.monotonic() + self.time_limit
+        if self.max_steps is not None or self._deadline is not None:
+            self._next_limit_check = self.state.steps
+        if self.checkpoint_path and self._checkpoint_writer is None:
+            self._checkpoint_writer = CheckpointWriter(self.checkpoint_path, append=self._restored)
+        if self.trace_path and self.trace is None:
+            self.trace = TraceWriter(self.trace_path, self.state)
+            self._untraced_actions = self._actions
+            self._actions = self.trace.wrap(self, self._actions)
+        try:
+            if self.mode == 'stack':
+                self._run_stack_machine()
+            elif self._agent:
+                self._execute_agent(self._agent)
+        except NonTerminatingLoop as e:
+            self.state.halt_reason = 'non-terminating loop'
+            self.state.outputs.append(f"[HALT] Stopped: {e}")
+        except ExecutionLimit as e:
+            self.state.halt_reason = e.reason
+            self.state.outputs.append(f"[HALT] Stopped: {e}")
+        finally:
+            if self._checkpoint_writer and not self.paused:
+                self._checkpoint_writer.close()
+                self._checkpoint_writer = None
+            if self.trace and not self.paused:
+                self.trace.close(self.state)
+                self.trace = None
+                self._actions = self._untraced_actions
+            if self.owns_maps and not self.paused:
+                self.close_maps()
         return self.state
 
+    def close_maps(self):
+        """Unmap the map files (or shared grid) behind the world's dirt and obstacles."""
+        close_maps(self.state.dirt, self.state.obstacles)
+
+    # ---------- Snapshots (stack mode) ----------
+
+    def snapshot(self):
+        """Serialize the full execution state (world, frames, pcs, caches) to compact bytes."""
+        if self.mode != 'stack':
+            raise RuntimeError("snapshots require mode='stack'")
+        data = {
+            'state': vars(self.state),
+            'frames': [vars(frame) for frame in self.call_stack],
+            'memo': self.memo,
+            'cycle_detector': self.cycle_detector,
+        }
+        payload = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        return pack_snapshot(self._program_digest, payload)
+
+    def restore(self, ast, blob):
+        """
+        Load a snapshot of the same program; continue with resume() or run_until().
+        The mode, the snapshot's signature (see checkpoint.py) and its program
+        digest are checked before the payload is unpickled, so only snapshots
+        written with this installation's key are ever unpickled.
+        """
+        if self.mode != 'stack':
+            raise RuntimeError("snapshots require mode='stack'")
+        digest, payload = unpack_snapshot(blob)
+        if digest != program_digest(ast):
+            raise ValueError("Snapshot was taken from a different program")
+        data = pickle.loads(zlib.decompress(payload))
+        self.load(ast)
+        self.close_maps()  # the snapshot brings its own world
+
+        self.state = InterpreterState()
+        self.state.__dict__.update(data['state'])
+        self.call_stack = []
+        for frame_data in data['frames']:
+            frame = CallFrame(frame_data['func_name'], frame_data['locals'])
+            frame.__dict__.update(frame_data)
+            self.call_stack.append(frame)
+        self.global_vars = self.call_stack[0].locals
+        self.memo = data['memo']
+        self.cycle_detector = data['cycle_detector']
+        self._distance_fields = {}
+        self.dirt_index = None
+        self._last_checkpoint_step = self.state.steps
+        self._restored = True
+
+    @classmethod
+    def from_checkpoint(cls, ast, path, step=None, **options):
+        """
+        Interpreter restored from the latest snapshot in `path` taken at or
+        before `step` (the last one when step is None). If no snapshot is early
+        enough, the program is loaded from the start. Snapshots not written
+        with this installation's key are rejected (see restore).
+        """
+        options['mode'] = 'stack'
+        interp = cls(**options)
+        _, blob = load_snapshot(path, step)
+        if blob is None:
+            interp.load(ast)
+        else:
+            interp.restore(ast, blob)
+        return interp
+
+    def resume(self):
+        """Continue a restored or paused run to the end."""
+        self.stop_at_step = None
+        return self._run()
+
+    def run_until(self, step):
+        """Run until `step` statements have executed (or the program ends) and pause there."""
+        if self.mode != 'stack':
+            raise RuntimeError("run_until requires mode='stack'")
+        self.stop_at_step = step
+        return self._run()
+
+    def _check_limits(self):
+        """Stop the run if the step budget or the time limit is used up."""
+        steps = self.state.steps
+        if self.max_steps is not None and steps >= self.max_steps:
+            raise ExecutionLimit('step limit', f"step limit of {self.max_steps} reached")
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise ExecutionLimit('time limit', f"time limit of {self.time_limit}s exceeded")
+        if self._deadline is not None:
+            next_check = steps + LIMIT_CHECK_INTERVAL
+            if self.max_steps is not None:
+                next_check = min(next_check, self.max_steps)
+        else:
+            next_check = self.max_steps
+        self._next_limit_check = next_check
+
+    def perform_action(self, stmt):
+        """Carry out a world action statement (MOVE, TURN, CLEAN, BACKTRACK, GOTO_*)."""
+        self._actions[stmt.kind](stmt)
+
+    def _write_checkpoint(self):
+        self._last_checkpoint_step = self.state.steps
+        self._checkpoint_writer.write(self.state.steps, self.snapshot())
+
+    def _contains_kind(self, node, kind):
+        """True if any AST node below `node` has the given kind."""
+        pending = [node]
+        while pending:
+            n = pending.pop()
+            if n is None or not hasattr(n, 'kind'):
+                continue
+            if n.kind == kind:
+                return True
+            pending.extend(n.children)
+        return False
+
     def _init_world(self, world_ast):
         """Extract world dimensions and initial state."""
         if world_ast.kind != 'WorldDef':
             return
 
+        # a map file is the base layer everything else is declared on top of
+        for child in world_ast.children:
+            if child.kind == 'MapFile':
+                self._load_map(child.value, world_ast)
+
         # Extract size, entry, exit, dirt, obstacles from world_ast.children
+        random_fills = []
         for child in world_ast.children:
             if child.kind == 'Size':
                 # Size: (width, height)
@@ -109,9 +446,9 @@ class Interpreter:
                     self.state.agent_x, self.state.agent_y, dir_str = child.value[0], child.value[1], child.value[2]
                     self.state.agent_dir = dir_str
                     self.state.entry = (self.state.agent_x, self.state.agent_y)
-                    # mark visited and history
+                    # mark visited and start the history there
                     self.state.visited.add((self.state.agent_x, self.state.agent_y))
-                    self.state.history.append((self.state.agent_x, self.state.agent_y))
+                    self.state.history.reset((self.state.agent_x, self.state.agent_y))
             elif child.kind == 'Exit':
                 if isinstance(child.value, tuple) and len(child.value) >= 2:
                     self.state.exit = (child.value[0], child.value[1])
@@ -132,6 +469,16 @@ class Interpreter:
                                 self.state.obstacles.add((v[0], v[1]))
                     elif isinstance(child.value, tuple) and len(child.value) >= 2:
                         self.state.obstacles.add((child.value[0], child.value[1]))
+            elif child.kind in ('DirtRect', 'ObstacleRect'):
+                # regions are stored as row intervals, not expanded into cells
+                layer = 'dirt' if child.kind == 'DirtRect' else 'obstacles'
+                cells = getattr(self.state, layer)
+                if not isinstance(cells, RegionLayer):
+                    cells = RegionLayer(cells)
+                    setattr(self.state, layer, cells)
+                cells.add_rect(*child.value)
+            elif child.kind in ('DirtRandom', 'ObstacleRandom'):
+                random_fills.append(child)
 
         # Ensure agent has sensible defaults if ENTRY was not provided
         if self.state.agent_x is None or self.state.agent_y is None or self.state.agent_dir is None:
@@ -142,7 +489,60 @@ class Interpreter:
                 self.state.agent_dir = 'N'
             # mark visited/history for default
             self.state.visited.add((self.state.agent_x, self.state.agent_y))
-            self.state.history.append((self.state.agent_x, self.state.agent_y))
+            self.state.history.reset((self.state.agent_x, self.state.agent_y))
+
+        # random fills go last: they need the size and must avoid the entry, exit and other cells
+        if random_fills:
+            self._random_fills(random_fills)
+
+    def _load_map(self, path, world_ast):
+        """MapFile: the mapped file backs the obstacle and dirt layers (and gives the SIZE if missing)."""
+        size = next((c.value for c in world_ast.children if c.kind == 'Size'), (None, None))
+        grid = MapGrid(path, size[0], size[1])
+        self.state.obstacles = MapLayer(self.state.obstacles, grid, OBSTACLE)
+        self.state.dirt = MapLayer(self.state.dirt, grid, DIRT)
+        self.state.width, self.state.height = grid.width, grid.height
+
+    def _random_fills(self, decls):
+        """
+        DirtRandom / ObstacleRandom: value is (percent, seed). Each fill adds
+        exactly percent% of the SIZE grid's cells (or every cell it may use,
+        if fewer are left), picked with a generator seeded by `seed` among
+        the cells holding no obstacle or dirt yet; obstacles also skip the
+        entry, the exit and the start. The picks go into one CodeGrid that
+        then backs the dirt and obstacle layers, so the cost grows with the
+        cells placed and the per-cell work runs in C (sample, compress, map).
+        """
+        state = self.state
+        width, height = state.width, state.height
+        if not width or not height:
+            return
+        total = width * height
+        grid = CodeGrid(width, height)
+        # one byte per cell, nonzero where a fill may not go
+        taken = bytearray(total)
+        _mark_layer(taken, width, height, state.obstacles)
+        _mark_layer(taken, width, height, state.dirt)
+        ends = [(state.agent_x, state.agent_y), state.entry, state.exit]
+        ends = [(y - 1) * width + x - 1 for x, y in filter(None, ends) if 1 <= x <= width and 1 <= y <= height]
+        for decl in decls:
+            percent, seed = decl.value
+            code = DIRT if decl.kind == 'DirtRandom' else OBSTACLE
+            blocked = taken
+            if code == OBSTACLE:
+                blocked = bytearray(taken)
+                for i in ends:
+                    blocked[i] = 1
+            free = blocked.count(0)
+            count = min(total * percent // 100, free)
+            # a uniform draw of count + (blocked cells) indices holds at least
+            # count free ones; the first count of them are a uniform pick
+            picked = random.Random(seed).sample(range(total), min(total, count + total - free))
+            chosen = list(islice(compress(picked, map(operator.not_, map(blocked.__getitem__, picked))), count))
+            _scatter(grid.cells, chosen, code)
+            _scatter(taken, chosen, 1)
+        state.obstacles = MapLayer(state.obstacles, grid, OBSTACLE)
+        state.dirt = MapLayer(state.dirt, grid, DIRT)
 
     def _register_function(self, func_node):
         """Register a function definition without executing it."""
@@ -153,6 +553,7 @@ class Interpreter:
         params = []
         ret_type = 'void'
         body = None
+        pure = False
 
         # Extract params, return type, body from function node structure
         for child in func_node.children:
@@ -165,8 +566,14 @@ class Interpreter:
                 ret_type = child.value if child.value else 'void'
             elif child.kind == 'Body':
                 body = child.children
+            elif child.kind == 'Pure':
+                pure = bool(child.value)
 
         self.functions[func_name] = (params, ret_type, body)
+        if pure:
+            self.pure_functions.add(func_name)
+        else:
+            self.pure_functions.discard(func_name)
 
     def _execute_agent(self, agent_ast):
         """Execute the agent's statement list."""
@@ -184,6 +591,9 @@ class Interpreter:
         if not stmt:
             return
 
+        if self._next_limit_check is not None and self.state.steps >= self._next_limit_check:
+            self._check_limits()
+        self.state.steps += 1
         kind = stmt.kind
 
         if kind == 'VarDecl':
@@ -194,20 +604,17 @@ class Interpreter:
             self._execute_if(stmt)
         elif kind == 'While':
             self._execute_while(stmt)
-        elif kind == 'Move':
-            self._execute_move(stmt)
-        elif kind == 'Turn':
-            self._execute_turn(stmt)
-        elif kind == 'Clean':
-            self._execute_clean(stmt)
-        elif kind == 'Backtrack':
-            self._execute_backtrack(stmt)
+        elif kind in self._actions:
+            self._actions[kind](stmt)
         elif kind == 'Report':
             self._execute_report(stmt)
         elif kind == 'Return':
             self._execute_return(stmt)
         elif kind == 'Call':
             self._eval_call(stmt)
+        elif kind == 'CallStmt':
+            if stmt.children:
+                self._eval_call(stmt.children[0])
         # else: unknown statement, ignore
 
     def _execute_var_decl(self, stmt):
@@ -216,7 +623,8 @@ class Interpreter:
         init_val = 0
         if stmt.children:
             init_val = self._eval_expr(stmt.children[0])
-        self._set_var(var_name, init_val)
+        # VAR always declares in the current scope (it may shadow a caller's variable)
+        self.call_stack[-1].locals[var_name] = init_val
 
     def _execute_assign(self, stmt):
         """Assign: name (variable), children[0] is expression."""
@@ -257,6 +665,7 @@ class Interpreter:
 
         cond_node = stmt.children[0]
         body_node = stmt.children[1]
+        watch = self.cycle_detector.enter_loop() if self.cycle_detector else None
 
         while self._eval_condition(cond_node):
             if body_node.kind == 'Body' and body_node.children:
@@ -266,10 +675,11 @@ class Interpreter:
                         return
             else:
                 break
+            if watch is not None:
+                self.cycle_detector.back_edge(watch, self.state, self.call_stack)
 
-    def _execute_move(self, stmt):
-        """Mock MOVE action."""
-        # compute proposed new position based on current direction
+    def cell_ahead(self):
+        """Cell in front of the agent."""
         dir_map = {
             'N': (0, -1),
             'E': (1, 0),
@@ -277,17 +687,23 @@ class Interpreter:
             'W': (-1, 0),
         }
         dx, dy = dir_map.get(self.state.agent_dir, (0, 0))
-        new_x = self.state.agent_x + dx
-        new_y = self.state.agent_y + dy
+        return self.state.agent_x + dx, self.state.agent_y + dy
+
+    def _execute_move(self, stmt):
+        """Mock MOVE action."""
+        # compute proposed new position based on current direction
+        new_x, new_y = self.cell_ahead()
 
         # Check bounds if known
         if self.state.width is not None and self.state.height is not None:
             if not (1 <= new_x <= self.state.width and 1 <= new_y <= self.state.height):
+                self.state.blocked_moves += 1
                 self.state.outputs.append(f"[MOVE] Blocked - out of bounds at ({new_x},{new_y})")
                 return
 
         # Check obstacles
         if (new_x, new_y) in self.state.obstacles:
+            self.state.blocked_moves += 1
             self.state.outputs.append(f"[MOVE] Blocked by obstacle at ({new_x},{new_y})")
             return
 
@@ -316,6 +732,8 @@ class Interpreter:
         pos = (self.state.agent_x, self.state.agent_y)
         if pos in self.state.dirt:
             self.state.dirt.remove(pos)
+            if self.dirt_index is not None:
+                self.dirt_index.discard(pos)
             self.state.cleaned_dirt += 1
             self.state.outputs.append(f"[CLEAN] Dirt cleaned at {pos}. Total: {self.state.cleaned_dirt}")
         else:
@@ -327,23 +745,74 @@ class Interpreter:
             self.state.outputs.append("[BACKTRACK] No previous position to backtrack to")
             return
         # pop current position
-        self.state.history.pop()
-        prev = self.state.history[-1]
-        self.state.agent_x, self.state.agent_y = prev[0], prev[1]
+        history = self.state.history
+        history.pop()
+        self.state.agent_x, self.state.agent_y = history.x, history.y
         self.state.outputs.append(f"[BACKTRACK] Agent backtracked to ({self.state.agent_x},{self.state.agent_y})")
 
+    def _execute_goto(self, stmt):
+        """Goto: value is DIRT or EXIT; walk a shortest path to the nearest dirt / the exit."""
+        target = stmt.value
+        state = self.state
+        if state.width is None or state.height is None:
+            state.outputs.append(f"[GOTO {target}] World size unknown")
+            return
+        path = self._distance_field(target).path_from((state.agent_x, state.agent_y))
+        if path is None:
+            state.outputs.append(f"[GOTO {target}] No reachable {target.lower()}")
+            return
+        # each step is a MOVE: visited and BACKTRACK history are updated as usual
+        for direction, cell in path:
+            state.agent_dir = direction
+            state.visited.add(cell)
+            state.history.append(cell)
+        if path:
+            state.agent_x, state.agent_y = path[-1][1]
+        state.outputs.append(f"[GOTO {target}] Agent moved to ({state.agent_x},{state.agent_y}) "
+                             f"in {len(path)} steps facing {state.agent_dir}")
+
+    def _distance_field(self, target):
+        """
+        Cached distance field to the nearest dirt or to the exit. Obstacles never
+        change, so the exit field lives for the whole run; dirt only shrinks (CLEAN),
+        so its count tells whether the dirt field is still current.
+        """
+        state = self.state
+        stamp = len(state.dirt) if target == 'DIRT' else None
+        field = self._distance_fields.get(target)
+        if field is None or field.stamp != stamp:
+            if target == 'DIRT':
+                cells = state.dirt
+            else:
+                cells = [state.exit] if state.exit else []
+            field = self._distance_fields[target] = DistanceField(cells, self._passable, stamp)
+        return field
+
+    def _passable(self, cell):
+        x, y = cell
+        return 1 <= x <= self.state.width and 1 <= y <= self.state.height and cell not in self.state.obstacles
+
     def _execute_report(self, stmt):
         """Report: children[0] is expression to report."""
         if stmt.children:
-            val = self._eval_expr(stmt.children[0])
-            self.state.outputs.append(f"[REPORT] {val}")
+            self._report(self._eval_expr(stmt.children[0]))
+
+    def _report(self, value):
+        self.state.outputs.append(f"[REPORT] {value}")
+        if self.trace is not None:
+            self.trace.report(self.state, value)
 
     def _execute_return(self, stmt):
         """Return: children[0] is expression (may be None for void)."""
         # Evaluate return expression (if any) and raise a ReturnValue
         value = None
         if stmt.children:
-            value = self._eval_expr(stmt.children[0])
+            expr = stmt.children[0]
+            # RETURN f(...) inside a function: hand f to the caller's call loop
+            if (self.tail_calls and expr is not None and expr.kind == 'Call'
+                    and len(self.call_stack) > 1 and expr.value in self.functions):
+                raise TailCall(expr.value, [self._eval_expr(a) for a in expr.children])
+            value = self._eval_expr(expr)
         raise ReturnValue(value)
 
     def _eval_expr(self, expr):
@@ -367,15 +836,50 @@ class Interpreter:
             # True if current agent cell has not been visited yet
             pos = (self.state.agent_x, self.state.agent_y)
             return 1 if pos not in self.state.visited else 0
+        elif kind == 'DirtQuery':
+            return self._dirt_query(expr.value)
         else:
             return 0
 
+    def _dirt_query(self, query):
+        """
+        DIRT_COUNT: dirt cells left. DIRT_DIST: Manhattan distance to the nearest
+        dirt. DIRT_DIR: way to it relative to the agent, 0 ahead, 1 right,
+        2 behind, 3 left (along the longer axis; 0 on the dirt itself).
+        DIST and DIR are -1 when no dirt is left.
+        """
+        state = self.state
+        if query == 'COUNT':
+            return len(state.dirt)
+        index = self.dirt_index
+        if index is None or index.count != len(state.dirt):
+            # first query, or the dirt changed behind the index's back
+            index = self.dirt_index = DirtIndex(state.dirt)
+        found = index.nearest((state.agent_x, state.agent_y))
+        if found is None:
+            return -1
+        distance, (x, y) = found
+        if query == 'DIST':
+            return distance
+        if distance == 0:
+            return 0
+        dx, dy = x - state.agent_x, y - state.agent_y
+        if abs(dx) >= abs(dy):
+            heading = 'E' if dx > 0 else 'W'
+        else:
+            heading = 'S' if dy > 0 else 'N'
+        dirs = ['N', 'E', 'S', 'W']
+        return (dirs.index(heading) - dirs.index(state.agent_dir)) % 4
+
     def _eval_binop(self, expr):
         """BinOp: value is operator, children are [left, right]."""
         op = expr.value
         left = self._eval_expr(expr.children[0]) if len(expr.children) > 0 else 0
         right = self._eval_expr(expr.children[1]) if len(expr.children) > 1 else 0
+        return self._apply_binop(op, left, right)
 
+    def _apply_binop(self, op, left, right):
+        """Apply an arithmetic operator to two evaluated operands."""
         if op == '+':
             return left + right
         elif op == '-':
@@ -419,7 +923,10 @@ class Interpreter:
         op = cond.value
         left = self._eval_expr(cond.children[0]) if len(cond.children) > 0 else 0
         right = self._eval_expr(cond.children[1]) if len(cond.children) > 1 else 0
+        return self._apply_relop(op, left, right)
 
+    def _apply_relop(self, op, left, right):
+        """Apply a relational operator to two evaluated operands."""
         if op == 'LT':
             return left < right
         elif op == 'GT':
@@ -444,10 +951,7 @@ class Interpreter:
             return 1 if self.state.exit == pos else 0
         if st == 'OBSTACLE':
             # check cell in front of agent
-            dir_map = {'N': (0, -1), 'E': (1, 0), 'S': (0, 1), 'W': (-1, 0)}
-            dx, dy = dir_map.get(self.state.agent_dir, (0, 0))
-            check = (self.state.agent_x + dx, self.state.agent_y + dy)
-            return 1 if check in self.state.obstacles else 0
+            return 1 if self.cell_ahead() in self.state.obstacles else 0
         return 0
 
     def _eval_call(self, call):
@@ -457,37 +961,228 @@ class Interpreter:
         if func_name not in self.functions:
             raise RuntimeError(f"Undefined function: {func_name}")
 
-        params, ret_type, body = self.functions[func_name]
-
         # Evaluate arguments
         args = []
         for arg_expr in call.children:
             args.append(self._eval_expr(arg_expr))
 
+        return self._call_function(func_name, args)
+
+    def _call_function(self, func_name, args):
+        """Run a function body; tail calls loop here instead of nesting Python frames."""
+        pending = []  # (func_name, key) of pure calls resolved by this chain's result
+        while True:
+            params, ret_type, body = self.functions[func_name]
+            local_scope = self._bind_args(func_name, params, args)
+
+            # Pure functions: answer repeated argument tuples from the cache
+            key = self._memo_key(func_name, args)
+            if key is not None:
+                hit, result = self._memo_lookup(func_name, key)
+                if hit:
+                    break
+                pending.append((func_name, key))
+
+            # Push function frame
+            self.call_stack.append(CallFrame(func_name, local_scope))
+
+            # Execute function body and catch ReturnValue to get return expression
+            result = 0
+            try:
+                if body:
+                    for stmt in body:
+                        self._execute_stmt(stmt)
+            except ReturnValue as rv:
+                result = rv.value if rv.value is not None else 0
+            except TailCall as tc:
+                func_name, args = tc.func_name, tc.args
+                continue
+            finally:
+                # Pop function frame
+                self.call_stack.pop()
+            break
+
+        for name, key in pending:
+            self._memo_store(name, key, result)
+        return result
+
+    def _bind_args(self, func_name, params, args):
+        """Create a function's local scope with parameters bound to arguments."""
         if len(args) != len(params):
             raise RuntimeError(f"Function {func_name} expects {len(params)} args, got {len(args)}")
-
-        # Create function frame with parameters bound to arguments
-        local_scope = {}
-        for param_name, arg_val in zip(params, args):
-            local_scope[param_name] = arg_val
-
-        # Push function frame
-        self.call_stack.append(CallFrame(func_name, local_scope))
-
-        # Execute function body and catch ReturnValue to get return expression
-        result = 0
-        try:
-            if body:
-                for stmt in body:
-                    self._execute_stmt(stmt)
-        except ReturnValue as rv:
-            result = rv.value if rv.value is not None else 0
-
-        # Pop function frame
-        self.call_stack.pop()
-
-        return result
+        return dict(zip(params, args))
+
+    def _memo_key(self, func_name, args):
+        """Cache key for a call, or None when the call is not memoized."""
+        if func_name in self.pure_functions and self.memo_size > 0:
+            return tuple(args)
+        return None
+
+    def _memo_lookup(self, func_name, key):
+        """Return (hit, result) for a pure call and update the hit/miss counters."""
+        cache = self.memo.get(func_name)
+        if cache is not None and key in cache:
+            cache.move_to_end(key)
+            self.state.memo_hits += 1
+            return True, cache[key]
+        self.state.memo_misses += 1
+        return False, None
+
+    def _memo_store(self, func_name, key, result):
+        """Cache a pure call result, evicting the least recently used entry."""
+        cache = self.memo.get(func_name)
+        if cache is None:
+            cache = self.memo[func_name] = OrderedDict()
+        cache[key] = result
+        if len(cache) > self.memo_size:
+            cache.popitem(last=False)
+
+    def _run_stack_machine(self):
+        """
+        Run compiled code on the explicit frame stack (stack mode).
+        Each CallFrame keeps its own pc and operand stack, so calls and returns
+        only push/pop frames and never recurse in Python.
+        """
+        stack = self.call_stack
+        frame = stack[-1]
+        code = self._code[frame.func_name]
+        ops = frame.operands
+        pc = frame.pc
+        state = self.state
+
+        while True:
+            op, arg = code[pc]
+            pc += 1
+
+            if op == 'STEP':
+                if self.stop_at_step is not None and state.steps >= self.stop_at_step:
+                    frame.pc = pc - 1
+                    self.paused = True
+                    return
+                if (self.checkpoint_every and state.steps % self.checkpoint_every == 0
+                        and state.steps != self._last_checkpoint_step):
+                    frame.pc = pc - 1
+                    self._write_checkpoint()
+                if self._next_limit_check is not None and state.steps >= self._next_limit_check:
+                    frame.pc = pc - 1
+                    self._check_limits()
+                state.steps += 1
+            elif op == 'CONST':
+                ops.append(arg)
+            elif op == 'LOAD':
+                ops.append(self._get_var(arg))
+            elif op == 'STORE':
+                self._set_var(arg, ops.pop())
+            elif op == 'DECLARE':
+                frame.locals[arg] = ops.pop()
+            elif op == 'BINOP':
+                right = ops.pop()
+                ops.append(self._apply_binop(arg, ops.pop(), right))
+            elif op == 'RELOP':
+                right = ops.pop()
+                ops.append(self._apply_relop(arg, ops.pop(), right))
+            elif op == 'JUMP_IF_FALSE':
+                if not ops.pop():
+                    pc = arg
+            elif op == 'JUMP':
+                pc = arg
+            elif op == 'LOOP':
+                if self.cycle_detector:
+                    frame.pc = pc
+                    self.cycle_detector.back_edge(frame.loop_watches[arg], state, stack)
+                pc = arg
+            elif op == 'ENTER_LOOP':
+                if self.cycle_detector:
+                    if frame.loop_watches is None:
+                        frame.loop_watches = {}
+                    frame.loop_watches[arg] = self.cycle_detector.enter_loop()
+            elif op == 'ACTION':
+                frame.pc = pc
+                if self.yield_actions:
+                    # the scheduler performs the action, then resumes after it
+                    self.pending_action = arg
+                    self.paused = True
+                    return
+                self._actions[arg.kind](arg)
+            elif op == 'SENSE':
+                ops.append(self._eval_sense(arg))
+            elif op == 'DIRT_QUERY':
+                ops.append(self._dirt_query(arg))
+            elif op == 'UNVISITED':
+                unvisited = (state.agent_x, state.agent_y) not in state.visited
+                ops.append(unvisited if arg is True else (1 if unvisited else 0))
+            elif op == 'NOT':
+                ops.append(not ops.pop())
+            elif op == 'AND':
+                right = ops.pop()
+                ops.append(ops.pop() and right)
+            elif op == 'OR':
+                right = ops.pop()
+                ops.append(ops.pop() or right)
+            elif op == 'REPORT':
+                self._report(ops.pop())
+            elif op == 'POP':
+                ops.pop()
+            elif op == 'CALL' or op == 'TAIL_CALL':
+                func_name, argc = arg
+                args = ops[len(ops) - argc:]
+                del ops[len(ops) - argc:]
+                local_scope = self._bind_args(func_name, self.functions[func_name][0], args)
+                memo_keys = frame.memo_keys if op == 'TAIL_CALL' else None
+
+                # Pure functions: answer repeated argument tuples from the cache
+                key = self._memo_key(func_name, args)
+                if key is not None:
+                    hit, result = self._memo_lookup(func_name, key)
+                    if hit and op == 'CALL':
+                        ops.append(result)
+                        continue
+                    if hit:
+                        # cached tail call: return the result from this frame
+                        ops.append(result)
+                        pc = self._return_from_frame('RETURN', pc)
+                        frame = stack[-1]
+                        code = self._code[frame.func_name]
+                        ops = frame.operands
+                        continue
+                    memo_keys = (memo_keys or []) + [(func_name, key)]
+
+                callee = CallFrame(func_name, local_scope)
+                callee.memo_keys = memo_keys
+                if op == 'TAIL_CALL':
+                    stack[-1] = callee
+                else:
+                    frame.pc = pc
+                    stack.append(callee)
+                frame = callee
+                code = self._code[func_name]
+                ops = frame.operands
+                pc = 0
+            elif op == 'RETURN' or op == 'END':
+                if len(stack) == 1:
+                    # agent body finished; RETURN outside a function fails as in tree mode
+                    frame.pc = pc - 1
+                    if op == 'RETURN':
+                        raise ReturnValue(ops.pop())
+                    return
+                pc = self._return_from_frame(op, pc)
+                frame = stack[-1]
+                code = self._code[frame.func_name]
+                ops = frame.operands
+            elif op == 'UNDEFINED':
+                raise RuntimeError(f"Undefined function: {arg}")
+
+    def _return_from_frame(self, op, pc):
+        """Pop the current stack-mode frame, hand its result to the caller and return the caller's pc."""
+        frame = self.call_stack.pop()
+        value = frame.operands.pop() if op == 'RETURN' else None
+        result = value if value is not None else 0
+        if frame.memo_keys:
+            for name, key in frame.memo_keys:
+                self._memo_store(name, key, result)
+        caller = self.call_stack[-1]
+        caller.operands.append(result)
+        return caller.pc
 
     def _get_var(self, name):
         """Look up a variable in current scope (innermost to outermost)."""
@@ -0,0 +1,274 @@
+"""
+Worlds read from raster map files: MAP_FILE("floor.pgm");
+
+The file is memory-mapped and used in place. A cell's contents are read
+from the mapped bytes when asked for, so loading parses only the header
+and builds no per-cell objects. Supported formats:
+- binary PGM (P5, 8-bit): black (0) is an obstacle, white (maxval) is free
+  floor and any gray level in between is dirt
+- binary PBM (P4): black (1) is an obstacle, white is free floor
+- anything else is a raw byte grid, one byte per cell row by row, with
+  0 free, 1 obstacle, 2 dirt; the world's SIZE gives its dimensions
+Pixel (0, 0) is cell (1, 1). The mapping is copy-on-write: CLEAN clears
+dirt in memory, never in the file.
+"""
+
+import mmap
+import os
+
+FREE, OBSTACLE, DIRT = 0, 1, 2
+
+# PBM byte -> the codes of its 8 pixels (most significant bit first)
+_PBM_CODES = [bytes((byte >> (7 - i)) & 1 for i in range(8)) for byte in range(256)]
+
+
+def resolve_map_paths(ast, base_dir, root=None):
+    """
+    Make relative MAP_FILE paths in a program AST relative to `base_dir` (the source's folder).
+    root: if given, every map must be a regular file under this directory
+    (links followed, so the file checked is the one opened); ValueError otherwise.
+    """
+    if root is not None:
+        root = os.path.realpath(root)
+    world = ast.children[0] if ast is not None and ast.children else None
+    for child in getattr(world, 'children', []):
+        if child.kind != 'MapFile':
+            continue
+        given = child.value
+        if not os.path.isabs(child.value):
+            child.value = os.path.normpath(os.path.join(base_dir, child.value))
+        if root is not None:
+            path = os.path.realpath(child.value)
+            if os.path.commonpath([root, path]) != root:
+                raise ValueError(f"MAP_FILE path is outside the allowed directory: {given}")
+            if not os.path.isfile(path):
+                raise ValueError(f"MAP_FILE is not a regular file: {given}")
+            child.value = path
+
+
+class MapGrid:
+    """A mapped map file; code(px, py) tells what pixel (px, py) holds (0-based)."""
+
+    def __init__(self, path, width=None, height=None):
+        self.path = path
+        self.width, self.height = width, height
+        self.writes = {}  # offset -> byte written since loading (replayed after unpickling)
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                # mmap cannot map an empty file
+                size = f"a {self.width}x{self.height} map" if self.width and self.height else "any map"
+                raise ValueError(f"{self.path}: file is shorter than {size}")
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+        for offset, byte in self.writes.items():
+            self.mm[offset] = byte
+
+    def _read_header(self):
+        magic = self.mm[:2]
+        if magic == b'P5':
+            (width, height, maxval), self.offset = self._header(3)
+            if maxval > 255:
+                raise ValueError(f"{self.path}: only 8-bit PGM maps are supported")
+            self.format, self.row_bytes = 'pgm', width
+            self.table = bytes(OBSTACLE if v == 0 else FREE if v >= maxval else DIRT for v in range(256))
+            self.free_byte = maxval
+        elif magic == b'P4':
+            (width, height), self.offset = self._header(2)
+            self.format, self.row_bytes = 'pbm', (width + 7) // 8
+        else:
+            if not self.width or not self.height:
+                raise ValueError(f"{self.path}: a raw map needs a SIZE in the world")
+            width, height = self.width, self.height
+            self.format, self.offset, self.row_bytes = 'raw', 0, width
+            self.table = bytes(v if v in (OBSTACLE, DIRT) else FREE for v in range(256))
+            self.free_byte = FREE
+        if (self.width, self.height) not in ((None, None), (width, height)):
+            raise ValueError(f"{self.path}: map is {width}x{height} but the world SIZE is "
+                             f"{self.width}x{self.height}")
+        self.width, self.height = width, height
+        if len(self.mm) < self.offset + self.row_bytes * height:
+            raise ValueError(f"{self.path}: file is shorter than a {width}x{height} map")
+
+    def _header(self, count):
+        """The `count` integers after the magic number, and where pixel data starts."""
+        mm = self.mm
+        values = []
+        pos = 2
+        while len(values) < count:
+            c = mm[pos:pos + 1]
+            if c == b'#':
+                pos = mm.find(b'\n', pos)
+                if pos < 0:
+                    break
+            elif c.isspace():
+                pos += 1
+            elif c.isdigit():
+                end = pos
+                while mm[end:end + 1].isdigit():
+                    end += 1
+                values.append(int(mm[pos:end]))
+                pos = end
+            else:
+                break
+        if len(values) < count:
+            raise ValueError(f"{self.path}: malformed header")
+        return values, pos + 1  # a single whitespace byte ends the header
+
+    def code(self, px, py):
+        if self.format == 'pbm':
+            byte = self.mm[self.offset + py * self.row_bytes + (px >> 3)]
+            return (byte >> (7 - (px & 7))) & 1
+        return self.table[self.mm[self.offset + py * self.row_bytes + px]]
+
+    def set_free(self, px, py):
+        if self.format == 'pbm':
+            offset = self.offset + py * self.row_bytes + (px >> 3)
+            byte = self.mm[offset] & ~(0x80 >> (px & 7))
+        else:
+            offset = self.offset + py * self.row_bytes + px
+            byte = self.free_byte
+        self.mm[offset] = byte
+        self.writes[offset] = byte
+
+    def row_codes(self, py):
+        """Codes of one pixel row, as bytes."""
+        start = self.offset + py * self.row_bytes
+        row = self.mm[start:start + self.row_bytes]
+        if self.format == 'pbm':
+            return b''.join(_PBM_CODES[byte] for byte in row)[:self.width]
+        return row.translate(self.table)
+
+    def count(self, code):
+        return sum(self.row_codes(py).count(code) for py in range(self.height))
+
+    def close(self):
+        """Unmap the file; the layers over this grid cannot be read afterwards."""
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def __getstate__(self):
+        # the mapping itself cannot be pickled: keep the path and the writes
+        state = dict(self.__dict__)
+        del state['mm']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+
+class CodeGrid:
+    """
+    A grid of cell codes built in memory, one byte per cell (the raw map
+    codes); used by MapLayer like a MapGrid. The interpreter's random fills
+    write their cells into one, so a fill of a million cells makes no
+    per-cell objects.
+    """
+
+    path = '<generated>'
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.cells = bytearray(width * height)  # all FREE
+
+    def code(self, px, py):
+        return self.cells[py * self.width + px]
+
+    def set_free(self, px, py):
+        self.cells[py * self.width + px] = FREE
+
+    def row_codes(self, py):
+        """Codes of one row, as bytes."""
+        start = py * self.width
+        return bytes(self.cells[start:start + self.width])
+
+    def count(self, code):
+        return self.cells.count(code)
+
+    def close(self):
+        pass
+
+
+def close_maps(*layers):
+    """Close the grids behind any MapLayers among `layers` (also ones wrapped in others)."""
+    for layer in layers:
+        while layer is not None:
+            if isinstance(layer, MapLayer):
+                layer.grid.close()
+            layer = getattr(layer, 'cells', None)
+
+
+class MapLayer:
+    """
+    Set-like layer over the map cells holding `code`, plus cells added on
+    top of the map (kept in `cells`, any world store). Removing a map cell
+    marks it free in the mapping.
+    """
+
+    def __init__(self, cells, grid, code):
+        self.cells = cells
+        self.grid = grid
+        self.code = code
+        self.map_count = grid.count(code)
+
+    def _on_map(self, cell):
+        x, y = cell
+        grid = self.grid
+        return 1 <= x <= grid.width and 1 <= y <= grid.height and grid.code(x - 1, y - 1) == self.code
+
+    def __contains__(self, cell):
+        return self._on_map(cell) or cell in self.cells
+
+    def add(self, cell):
+        if not self._on_map(cell):
+            self.cells.add(cell)
+
+    def update(self, cells):
+        self.cells.update([c for c in cells if not self._on_map(c)])
+
+    def discard(self, cell):
+        if self._on_map(cell):
+            self.grid.set_free(cell[0] - 1, cell[1] - 1)
+            self.map_count -= 1
+        else:
+            self.cells.discard(cell)
+
+    def remove(self, cell):
+        if cell not in self:
+            raise KeyError(cell)
+        self.discard(cell)
+
+    def clear(self):
+        for cell in list(self._map_cells()):
+            self.discard(cell)
+        self.cells.clear()
+
+    def __len__(self):
+        return self.map_count + len(self.cells)
+
+    def __bool__(self):
+        return self.map_count > 0 or bool(self.cells)
+
+    def _map_cells(self):
+        code = bytes((self.code,))
+        for py in range(self.grid.height):
+            row = self.grid.row_codes(py)
+            px = row.find(code)
+            while px >= 0:
+                yield px + 1, py + 1
+                px = row.find(code, px + 1)
+
+    def __iter__(self):
+        yield from self._map_cells()
+        yield from self.cells
+
+    def __repr__(self):
+        return f"MapLayer({self.grid.path!r}, {len(self)} cells)"
@@ -0,0 +1,233 @@
+"""
+Multi-agent runtime: several AGENT bodies cleaning one shared world.
+
+Each agent is a stack-mode Interpreter that pauses before every world action
+(yield_actions), so agents behave as cooperative tasks without threads. On
+every tick the scheduler resumes each live agent in index order until its
+next action (or until it has run `quantum` statements) and performs that
+action on the shared world. Dirt and obstacles are shared sets; position,
+direction, visited cells and history stay per agent.
+
+Collisions resolve deterministically: agents act in index order, so a lower
+index wins a contested cell, and a MOVE or BACKTRACK into a cell held by
+another agent is blocked. Agents may start on the same cell (e.g. the ENTRY).
+GOTO_DIRT / GOTO_EXIT walk their whole path as one action and plan around
+obstacles only, not around other agents.
+
+Usage: python multiagent.py [--agents N] [--max-ticks N] [--quantum N] [--print] world.cl [agent.cl ...]
+"""
+
+import copy
+import os
+import sys
+
+from interpreter import Interpreter
+from map_file import close_maps
+from spatial_index import DirtIndex
+
+
+class AgentTask:
+    """One scheduled agent."""
+    def __init__(self, index, name, interp):
+        self.index = index
+        self.name = name
+        self.interp = interp
+        self.done = False
+        self.error = None
+        self.actions = 0  # world actions performed (blocked ones included)
+
+
+class _RuntimeWorld:
+    """
+    The runtime's world, built once by the first agent's Interpreter. Later
+    agents attach to it (Interpreter(shared_world=...)) instead of running
+    the WORLD declarations again: they share its dirt and obstacle layers.
+    """
+
+    def __init__(self, state):
+        self.width, self.height = state.width, state.height
+        self.dirt, self.obstacles = state.dirt, state.obstacles
+        self.entry, self.exit = state.entry, state.exit
+        self.start = (state.agent_x, state.agent_y, state.agent_dir)
+
+    def attach(self, state):
+        state.width, state.height = self.width, self.height
+        state.dirt, state.obstacles = self.dirt, self.obstacles
+        state.entry, state.exit = self.entry, self.exit
+        state.agent_x, state.agent_y, state.agent_dir = self.start
+        state.visited.add((state.agent_x, state.agent_y))
+        state.history.reset((state.agent_x, state.agent_y))
+
+
+class MultiAgentRuntime:
+    """
+    Tick scheduler over one world. Add agents with add_agent(), then run().
+    interp_options are passed to every agent's Interpreter (e.g. memo_size);
+    the agents always run in stack mode without cycle detection, since other
+    agents change the world between an agent's loop iterations.
+    """
+
+    def __init__(self, world_ast, quantum=1000, max_ticks=100000, **interp_options):
+        self.world = world_ast
+        self.quantum = quantum
+        self.max_ticks = max_ticks
+        self.interp_options = dict(interp_options, mode='stack', yield_actions=True, detect_cycles=False)
+        self.agents = []
+        self._world = None     # _RuntimeWorld, built by the first agent
+        self.dirt = None       # shared with every agent's state
+        self.obstacles = None
+        self.dirt_index = None  # shared DIRT_DIST / DIRT_DIR index
+        self.occupancy = {}    # (x, y) -> number of agents on the cell
+        self.ticks = 0
+        self.collisions = 0
+        self.halt_reason = None
+
+    def add_agent(self, ast, start=None, name=None):
+        """
+        Add the AGENT (and FUNCs) of a program AST; its own WORLD is ignored.
+        start is (x, y, direction); the world's ENTRY is used when omitted.
+        The world is built for the first agent only; the others attach to it.
+        """
+        program = copy.copy(ast)
+        program.children = [self.world] + list(ast.children[1:])
+        if self._world is None:
+            interp = Interpreter(**self.interp_options)
+        else:
+            interp = Interpreter(**dict(self.interp_options, shared_world=self._world))
+        interp.load(program)
+        interp.owns_maps = False  # the runtime closes the shared world's map in run()
+
+        state = interp.state
+        if self._world is None:
+            self._world = _RuntimeWorld(state)
+            self.dirt, self.obstacles = state.dirt, state.obstacles
+            self.dirt_index = DirtIndex(self.dirt)
+        interp.dirt_index = self.dirt_index
+        if start is not None:
+            x, y, direction = start
+            if (x, y) in self.obstacles:
+                raise ValueError(f"Agent start ({x},{y}) is an obstacle")
+            state.agent_x, state.agent_y, state.agent_dir = x, y, direction
+            state.visited.clear()
+            state.visited.add((x, y))
+            state.history.reset((x, y))
+        if state.agent_x is None:
+            raise ValueError("Agent has no start position (world has no ENTRY)")
+
+        pos = (state.agent_x, state.agent_y)
+        self.occupancy[pos] = self.occupancy.get(pos, 0) + 1
+        task = AgentTask(len(self.agents), name or f"agent{len(self.agents)}", interp)
+        self.agents.append(task)
+        return task
+
+    def run(self):
+        """Tick until every agent has finished or max_ticks is reached, then close the world's map."""
+        try:
+            while self.tick():
+                if self.ticks >= self.max_ticks:
+                    self.halt_reason = 'tick limit'
+                    break
+        finally:
+            close_maps(self.dirt, self.obstacles)
+        return self
+
+    def tick(self):
+        """Give every live agent one turn; returns how many agents are still live."""
+        live = 0
+        for task in self.agents:
+            if task.done:
+                continue
+            interp = task.interp
+            try:
+                interp.run_until(interp.state.steps + self.quantum)
+            except Exception as e:
+                task.done, task.error = True, str(e)
+                continue
+            if interp.pending_action is not None:
+                self._perform(task, interp.pending_action)
+            elif not interp.paused:
+                task.done = True
+                continue
+            live += 1
+        self.ticks += 1
+        return live
+
+    def _perform(self, task, action):
+        """Carry out one agent's action, unless it would move onto another agent."""
+        interp = task.interp
+        state = interp.state
+        task.actions += 1
+
+        target = None
+        if action.kind == 'Move':
+            target = interp.cell_ahead()
+        elif action.kind == 'Backtrack':
+            target = state.history.previous()
+        if target is not None and self.occupancy.get(target):
+            self.collisions += 1
+            state.outputs.append(f"[{action.kind.upper()}] Blocked by another agent at ({target[0]},{target[1]})")
+            return
+
+        before = (state.agent_x, state.agent_y)
+        interp.perform_action(action)
+        after = (state.agent_x, state.agent_y)
+        if after != before:
+            self.occupancy[before] -= 1
+            if not self.occupancy[before]:
+                del self.occupancy[before]
+            self.occupancy[after] = self.occupancy.get(after, 0) + 1
+
+    def summary(self):
+        return {
+            'ticks': self.ticks,
+            'halt_reason': self.halt_reason,
+            'collisions': self.collisions,
+            'remaining_dirt': len(self.dirt) if self.dirt is not None else 0,
+            'cleaned_dirt': sum(task.interp.state.cleaned_dirt for task in self.agents),
+            'agents': [dict(task.interp.state.summary(), name=task.name, actions=task.actions,
+                            error=task.error) for task in self.agents],
+        }
+
+
+def main():
+    from run_complete import analyze_program, pop_option
+
+    args = sys.argv[1:]
+    do_print = '--print' in args
+    if do_print:
+        args.remove('--print')
+    count = pop_option(args, '--agents', int)
+    max_ticks = pop_option(args, '--max-ticks', int) or 100000
+    quantum = pop_option(args, '--quantum', int) or 1000
+    if not args:
+        print("Usage: python multiagent.py [--agents N] [--max-ticks N] [--quantum N] [--print] "
+              "world.cl [agent.cl ...]")
+        sys.exit(1)
+    for filename in args:
+        if not os.path.exists(filename):
+            print(f"Error: File not found: {filename}")
+            sys.exit(1)
+
+    filenames = [os.path.abspath(f) for f in args]
+    programs = [analyze_program(f) for f in filenames]
+    runtime = MultiAgentRuntime(programs[0].children[0], quantum=quantum, max_ticks=max_ticks)
+    for i in range(count or len(programs)):
+        runtime.add_agent(programs[i % len(programs)],
+                          name=f"{os.path.basename(filenames[i % len(programs)])}#{i}")
+    runtime.run()
+
+    summary = runtime.summary()
+    print(f"Ticks: {summary['ticks']}" + (f" (stopped: {summary['halt_reason']})" if summary['halt_reason'] else ""))
+    print(f"Dirt cleaned: {summary['cleaned_dirt']}, remaining: {summary['remaining_dirt']}")
+    print(f"Blocked by other agents: {summary['collisions']}")
+    for task, agent in zip(runtime.agents, summary['agents']):
+        status = f"error: {agent['error']}" if agent['error'] else ('done' if task.done else 'running')
+        print(f"  {agent['name']}: at ({agent['position'][0]}, {agent['position'][1]}) facing {agent['direction']}, "
+              f"cleaned {agent['cleaned_dirt']}, {agent['actions']} actions, {agent['steps']} steps, {status}")
+        if do_print:
+            for i, output in enumerate(agent['outputs'], 1):
+                print(f"      {i}. {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Compact BACKTRACK history.
+The agent's path is kept as its oldest reachable cell plus one 2-bit
+direction code per successful MOVE, packed four to a byte, instead of a
+list of (x, y) tuples. With max_depth set, only the last max_depth moves are
+kept (a ring buffer of fixed size), so BACKTRACK can undo at most that many.
+"""
+
+# direction codes and the step each one stands for
+_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))  # N, E, S, W
+_CODES = {step: code for code, step in enumerate(_STEPS)}
+
+# Rolling hash of the code sequence (invertible, so a pop is O(1) too)
+_HASH_MOD = (1 << 61) - 1
+_HASH_BASE = 1000003
+_HASH_BASE_INV = pow(_HASH_BASE, -1, _HASH_MOD)
+
+
+class PathHistory:
+    """
+    Positions visited by successful MOVEs, newest last, for BACKTRACK.
+    len() counts positions like the list it replaces (start cell included);
+    (x, y) is the newest position and `hash` identifies the kept path.
+    """
+
+    def __init__(self, max_depth=None):
+        if max_depth is not None and max_depth < 1:
+            raise ValueError("max_depth must be at least 1")
+        self.max_depth = max_depth
+        self._codes = bytearray((max_depth + 3) // 4) if max_depth else bytearray()
+        self._first = 0    # slot of the oldest kept code (ring buffer)
+        self._count = 0    # codes kept
+        self.x = self.y = None
+        self.hash = 0
+
+    def reset(self, pos):
+        """Start a new path at `pos` (world entry)."""
+        self._first = self._count = 0
+        self.x, self.y = pos
+        self.hash = 0
+
+    def __len__(self):
+        return 0 if self.x is None else self._count + 1
+
+    def _slot(self, i):
+        if self.max_depth:
+            return (self._first + i) % self.max_depth
+        return i
+
+    def _get(self, slot):
+        return (self._codes[slot >> 2] >> ((slot & 3) << 1)) & 3
+
+    def _set(self, slot, code):
+        shift = (slot & 3) << 1
+        byte = slot >> 2
+        self._codes[byte] = (self._codes[byte] & ~(3 << shift)) | (code << shift)
+
+    def append(self, pos):
+        """Record a move to the neighbouring cell `pos`."""
+        code = _CODES.get((pos[0] - self.x, pos[1] - self.y))
+        if code is None:
+            raise ValueError(f"History step from ({self.x},{self.y}) to {pos} is not a single move")
+        if self.max_depth and self._count == self.max_depth:
+            # drop the oldest move to make room (the oldest reachable cell moves on)
+            oldest = self._get(self._first)
+            self.hash = (self.hash - (oldest + 1) * pow(_HASH_BASE, self._count - 1, _HASH_MOD)) % _HASH_MOD
+            self._first = (self._first + 1) % self.max_depth
+            self._count -= 1
+        slot = self._slot(self._count)
+        if not self.max_depth and (slot >> 2) >= len(self._codes):
+            self._codes.append(0)
+        self._set(slot, code)
+        self._count += 1
+        self.x, self.y = pos
+        self.hash = (self.hash * _HASH_BASE + code + 1) % _HASH_MOD
+
+    def pop(self):
+        """Undo the newest move; (x, y) becomes the previous position. No memory is released or allocated."""
+        self._count -= 1
+        code = self._get(self._slot(self._count))
+        dx, dy = _STEPS[code]
+        self.x -= dx
+        self.y -= dy
+        self.hash = ((self.hash - code - 1) * _HASH_BASE_INV) % _HASH_MOD
+
+    def previous(self):
+        """Position a BACKTRACK would return to, or None."""
+        if not self._count:
+            return None
+        dx, dy = _STEPS[self._get(self._slot(self._count - 1))]
+        return self.x - dx, self.y - dy
+
+    def __iter__(self):
+        """Kept positions, oldest first."""
+        if self.x is None:
+            return
+        steps = [_STEPS[self._get(self._slot(i))] for i in range(self._count)]
+        x = self.x - sum(dx for dx, _ in steps)
+        y = self.y - sum(dy for _, dy in steps)
+        yield x, y
+        for dx, dy in steps:
+            x += dx
+            y += dy
+            yield x, y
+
+    def memory_bytes(self):
+        return len(self._codes)
+
+    def to_dict(self):
+        """Plain (JSON-friendly) fields of the history; from_dict() rebuilds it."""
+        return {'max_depth': self.max_depth, 'codes': self._codes.hex(), 'first': self._first,
+                'count': self._count, 'x': self.x, 'y': self.y, 'hash': self.hash}
+
+    @classmethod
+    def from_dict(cls, fields):
+        history = cls(fields['max_depth'])
+        history._codes = bytearray.fromhex(fields['codes'])
+        history._first, history._count = fields['first'], fields['count']
+        history.x, history.y = fields['x'], fields['y']
+        history.hash = fields['hash']
+        return history
@@ -0,0 +1,62 @@
+"""
+Shortest paths for the GOTO_DIRT / GOTO_EXIT builtins.
+A DistanceField holds breadth-first distances from every cell to the
+nearest target cell (multi-source BFS over passable cells). It is expanded
+lazily, only as far as the queried cells need, and kept between queries so
+repeated GOTOs to the same targets reuse the work.
+"""
+
+from collections import deque
+
+# neighbour order also breaks ties between equally short paths
+STEPS = (('N', 0, -1), ('E', 1, 0), ('S', 0, 1), ('W', -1, 0))
+
+
+class DistanceField:
+    """
+    Distances to the nearest of `targets`. passable(cell) tells which cells
+    may be walked through. `stamp` is whatever the owner uses to decide the
+    field is stale (e.g. the remaining dirt count).
+    """
+
+    def __init__(self, targets, passable, stamp=None):
+        self.passable = passable
+        self.stamp = stamp
+        self.dist = {}
+        self.frontier = deque()
+        for cell in targets:
+            if cell not in self.dist and passable(cell):
+                self.dist[cell] = 0
+                self.frontier.append(cell)
+
+    def distance(self, cell):
+        """Steps from `cell` to the nearest target, or None if none is reachable."""
+        dist = self.dist
+        frontier = self.frontier
+        passable = self.passable
+        while cell not in dist and frontier:
+            x, y = frontier.popleft()
+            d = dist[(x, y)] + 1
+            for _, dx, dy in STEPS:
+                nxt = (x + dx, y + dy)
+                if nxt not in dist and passable(nxt):
+                    dist[nxt] = d
+                    frontier.append(nxt)
+        return dist.get(cell)
+
+    def path_from(self, cell):
+        """[(direction, (x, y)), ...] of a shortest walk from `cell` to a target, or None."""
+        d = self.distance(cell)
+        if d is None:
+            return None
+        path = []
+        x, y = cell
+        while d > 0:
+            # every neighbour one step closer was settled before `cell` was
+            for name, dx, dy in STEPS:
+                if self.dist.get((x + dx, y + dy)) == d - 1:
+                    x, y = x + dx, y + dy
+                    path.append((name, (x, y)))
+                    break
+            d -= 1
+        return path
@@ -0,0 +1,189 @@
+"""
+Embeddable pipeline: Lexer → Parser → Analyzer → Interpreter as one object
+that returns structured results instead of printing.
+
+One Pipeline can be shared by the threads of a pool. Each thread gets its own
+lexer and parser on first use, syntax errors are collected per thread, and
+every run builds its own analyzer and interpreter. Nothing here changes the
+working directory or redirects stdout.
+
+    pipeline = Pipeline(mode='stack', max_steps=100000)
+    with ThreadPoolExecutor() as pool:
+        for result in pool.map(pipeline.run, sources):
+            print(result.summary())
+"""
+
+import os
+import sys
+import threading
+
+# Part3&4 holds the parser and analyzer packages. It is a script folder, not an
+# installable package, so importing this module adds it to sys.path (once), as
+# run_complete did before; callers that set up the path themselves lose nothing.
+part3_4_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Part3&4'))
+if part3_4_dir not in sys.path:
+    sys.path.insert(0, part3_4_dir)
+
+from parser import parser as parser_module
+from semantics_analyzer.semantic import SemanticAnalyzer
+from semantics_analyzer.cost import admission_errors
+
+from interpreter import Interpreter
+from map_file import resolve_map_paths
+
+
+def run_interpreter(ast, resume_from=None, seek_step=None, **interp_options):
+    """
+    Run an AST and return the final state.
+    resume_from: checkpoint file to continue from (its latest snapshot, or the
+    latest one at or before seek_step). seek_step: stop after that many steps,
+    replaying deterministically from the nearest snapshot.
+    """
+    if resume_from:
+        interpreter = Interpreter.from_checkpoint(ast, resume_from, seek_step, **interp_options)
+    elif seek_step is not None:
+        interp_options['mode'] = 'stack'
+        interpreter = Interpreter(**interp_options)
+        interpreter.load(ast)
+    else:
+        return Interpreter(**interp_options).execute(ast)
+    if seek_step is not None:
+        return interpreter.run_until(seek_step)
+    return interpreter.resume()
+
+
+class PipelineResult:
+    """
+    Outcome of one run. stage is where it stopped: 'parse', 'analyze',
+    'admission', 'run' (the interpreter raised) or 'done'. errors are that
+    stage's syntax errors, semantic errors, rejection reasons or exception
+    message; warnings are lexical errors (the lexer skips the character).
+    """
+
+    def __init__(self, stage, errors=None, warnings=None, cst=None, ast=None, cost_profile=None,
+                 state=None):
+        self.stage = stage
+        self.errors = errors or []
+        self.warnings = warnings or []
+        self.cst = cst
+        self.ast = ast
+        self.cost_profile = cost_profile
+        self.state = state
+
+    @property
+    def ok(self):
+        return self.stage == 'done'
+
+    def summary(self):
+        """JSON-friendly dict of the result."""
+        return {
+            'ok': self.ok,
+            'stage': self.stage,
+            'errors': [str(err) for err in self.errors],
+            'warnings': list(self.warnings),
+            'state': self.state.summary() if self.state is not None else None,
+        }
+
+
+class Pipeline:
+    """
+    Runs programs through every stage; safe to use from many threads at once.
+    scanner / engine: as for parser.parse ('fast' or 'ply'; 'lalr' or 'descent').
+    Both scanners give the same tokens; neither keeps tables between parses
+    (see parser.new_lexer), and 'fast' is quicker.
+    Keyword options are defaults for every run: Interpreter options (mode,
+    max_steps, memo_size, ...) and max_cost / check_cost (see run).
+    """
+
+    def __init__(self, scanner='fast', engine='lalr', **options):
+        self.scanner = scanner
+        self.engine = engine
+        self.options = options
+        self._local = threading.local()
+        # the creating thread's lexer and parser (this also loads the parse tables)
+        self._front_end()
+
+    def _front_end(self):
+        """This thread's (lexer, LALR parser)."""
+        local = self._local
+        if not hasattr(local, 'lexer'):
+            local.lexer = parser_module.new_lexer(self.scanner)
+            local.parser = parser_module.new_lalr_parser() if self.engine == 'lalr' else None
+        return local.lexer, local.parser
+
+    def parse(self, text):
+        """Return (cst, syntax errors, lexical errors); cst is None if there are syntax errors."""
+        lexer, lalr_parser = self._front_end()
+        lexer.errors = []
+        cst, errors = parser_module.parse_with_errors(text=text, engine=self.engine, lexer=lexer,
+                                                      lalr_parser=lalr_parser)
+        return (None if errors else cst), errors, lexer.errors
+
+    def run(self, source=None, path=None, base_dir=None, front_end=None, map_root=None, **options):
+        """
+        Run program text (or the file at path) and return a PipelineResult.
+        base_dir: directory MAP_FILE paths are relative to (default: the
+        program file's directory, or the working directory for source text).
+        map_root: MAP_FILE paths must name regular files under this directory
+        (it is also the default base_dir for source text); programs with
+        other maps stop at the 'analyze' stage.
+        front_end: parse and analyze with this instead of the thread's parser
+        and a new analyzer; anything with analyze(text) -> (cst, ast, errors)
+        and a cost_profile, e.g. an incremental.IncrementalFrontEnd kept
+        between runs of the same file.
+        max_cost: statement budget. Programs whose static cost profile shows a
+        loop that never ends, or a statement bound over the budget, are
+        rejected without running; the others run with max_steps capped at
+        the budget. check_cost: reject never-ending loops without a budget.
+        Other options go to run_interpreter/Interpreter, over the defaults.
+        """
+        options = dict(self.options, **options)
+        max_cost = options.pop('max_cost', None)
+        check_cost = options.pop('check_cost', False) or max_cost is not None
+        if path is None and source is None:
+            raise ValueError("provide source or path")
+        if path is not None and base_dir is None:
+            base_dir = os.path.dirname(os.path.abspath(path))
+        if base_dir is None:
+            base_dir = map_root
+
+        try:
+            if path is not None:
+                with open(path, 'r') as f:
+                    source = f.read()
+            if front_end is None:
+                cst, errors, warnings = self.parse(source)
+            else:
+                cst, ast, errors = front_end.analyze(source)
+                warnings = []
+        except Exception as e:
+            return PipelineResult('parse', [str(e)])
+        if cst is None:
+            return PipelineResult('parse', errors or ["Syntax error"], warnings)
+
+        try:
+            if front_end is None:
+                analyzer = SemanticAnalyzer()
+                ast, errors = analyzer.analyze(cst)
+                profile = analyzer.cost_profile
+            else:
+                profile = front_end.cost_profile
+            if not errors and base_dir is not None:
+                resolve_map_paths(ast, base_dir, map_root)
+        except Exception as e:
+            return PipelineResult('analyze', [str(e)], warnings, cst)
+        if errors:
+            return PipelineResult('analyze', errors, warnings, cst)
+
+        if check_cost:
+            rejected = admission_errors(profile, max_cost)
+            if rejected:
+                return PipelineResult('admission', rejected, warnings, cst, ast, profile)
+            if max_cost is not None and (options.get('max_steps') is None or options['max_steps'] > max_cost):
+                options['max_steps'] = max_cost
+
+        try:
+            state = run_interpreter(ast, **options)
+        except Exception as e:
+            return PipelineResult('run', [str(e)], warnings, cst, ast, profile)
+        return PipelineResult('done', [], warnings, cst, ast, profile, state)
@@ -5,93 +5,107 @@ Run a .cl program from source through all stages and display results.
 
 import sys
 import os
+import time
 import contextlib
 
-# Add Part3&4 to path so modules can be found
-part3_4_dir = os.path.join(os.path.dirname(__file__), '..', 'Part3&4')
-if part3_4_dir not in sys.path:
-    sys.path.insert(0, part3_4_dir)
+# pipeline puts Part3&4 on the import path
+from pipeline import Pipeline
+from parser.parser import write_cst_to_file
+from incremental import IncrementalFrontEnd
+from map_file import resolve_map_paths
 
-# Now we can import from Part3&4 directly
-os.chdir(part3_4_dir)  # Change to Part3&4 so parser can find lexer, etc.
-from parser.parser import parse
-from semantics_analyzer.semantic import analyze_cst
+_pipeline = None  # the Pipeline this module runs programs with, created on first use
 
-# Return to Part5 and import interpreter
-os.chdir(os.path.join(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.dirname(__file__))
-from interpreter import Interpreter
 
+def _shared_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = Pipeline()
+    return _pipeline
 
-def run_complete_pipeline(filename, do_print=False):
+
+def run_complete_pipeline(filename=None, do_print=False, source=None, max_cost=None, show_cost=False,
+                          check_cost=False, **interp_options):
     """
-    Execute complete pipeline on a .cl file.
-    Returns (success, cst, ast, errors, state).
+    Execute complete pipeline on a .cl file (or on `source` text, if given).
+    Extra keyword arguments go to run_interpreter/Interpreter (e.g. memo_size).
+    max_cost: statement budget. Programs whose static cost profile shows a
+    loop that never ends, or a statement bound over the budget, are rejected
+    without running; the others run with max_steps capped at the budget.
+    check_cost: reject never-ending loops even without a budget.
+    show_cost: print the cost profile (with do_print); it does not reject anything.
+    Returns (success, cst, ast, errors, state); see pipeline.Pipeline for an
+    API that returns structured results and is safe to use from threads.
     """
+    result = _shared_pipeline().run(source, path=filename if source is None else None,
+                                    base_dir=os.path.dirname(os.path.abspath(filename)) if filename else None,
+                                    max_cost=max_cost, check_cost=check_cost, **interp_options)
+    cst_path = None
+    if filename and source is None and result.cst is not None:
+        cst_path = write_cst_to_file(result.cst, filename, quiet=True)
     if do_print:
-        print("=" * 70)
-        print(f"Running: {filename}")
-        print("=" * 70)
+        _print_stages(filename, result, show_cost, cst_path)
+    return result.ok, result.cst, result.ast, result.errors, result.state
+
+
+def _print_stages(filename, result, show_cost, cst_path=None):
+    """Report each pipeline stage the run went through."""
+    print("=" * 70)
+    print(f"Running: {filename or '<source>'}")
+    print("=" * 70)
 
     # Step 1: Parse
-    if do_print:
-        print("\n[1] LEXER + PARSER")
-    try:
-        if do_print:
-            cst = parse(filename=filename)
-        else:
-            # suppress parser output when running silently
-            with open(os.devnull, 'w') as devnull:
-                with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-                    cst = parse(filename=filename)
-        if do_print:
-            print("✓ Parse successful")
-    except Exception as e:
-        if do_print:
-            print(f"✗ Parse failed: {e}")
-        return False, None, None, None, None
+    print("\n[1] LEXER + PARSER")
+    for warning in result.warnings:
+        print(warning)
+    if result.stage == 'parse':
+        print(f"✗ Parse failed ({len(result.errors)}):")
+        for err in result.errors:
+            print(f"  - {err}")
+        return
+    if cst_path:
+        print(f"CST written to: {cst_path}")
+    print("✓ Parse successful")
 
     # Step 2: Semantic Analysis
-    try:
-        if do_print:
-            print("\n[2] SEMANTIC ANALYZER")
-        if do_print:
-            ast, errors = analyze_cst(cst)
-        else:
-            with open(os.devnull, 'w') as devnull:
-                with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-                    ast, errors = analyze_cst(cst)
-        if errors:
-            if do_print:
-                print(f"✗ Semantic errors ({len(errors)}):")
-                for err in errors:
-                    print(f"  - {err}")
-            return False, cst, None, errors, None
-        if do_print:
-            print("✓ Semantic analysis successful")
-    except Exception as e:
-        if do_print:
-            print(f"✗ Analysis failed: {e}")
-        return False, cst, None, None, None
+    print("\n[2] SEMANTIC ANALYZER")
+    if result.stage == 'analyze':
+        print(f"✗ Semantic errors ({len(result.errors)}):")
+        for err in result.errors:
+            print(f"  - {err}")
+        return
+    print("✓ Semantic analysis successful")
+
+    # Step 2b: admission by static cost
+    if show_cost:
+        print(format_cost(result.cost_profile))
+    if result.stage == 'admission':
+        print(f"✗ Rejected ({len(result.errors)}):")
+        for reason in result.errors:
+            print(f"  - {reason}")
+        return
 
     # Step 3: Interpret
-    try:
-        if do_print:
-            print("\n[3] INTERPRETER")
-        interpreter = Interpreter()
-        if do_print:
-            state = interpreter.execute(ast)
-            print("✓ Execution successful")
-        else:
-            with open(os.devnull, 'w') as devnull:
-                with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-                    state = interpreter.execute(ast)
-    except Exception as e:
-        if do_print:
-            print(f"✗ Execution failed: {e}")
-        return False, cst, ast, errors, None
+    print("\n[3] INTERPRETER")
+    if result.stage == 'run':
+        print(f"✗ Execution failed: {result.errors[0]}")
+        return
+    print("✓ Execution successful")
 
-    return True, cst, ast, errors, state
+
+def format_cost(profile):
+    """Readable summary of a static cost profile."""
+    bound = profile['statement_bound']
+    depth = profile['max_call_depth']
+    lines = ["Static cost:",
+             f"  Max nesting: {profile['max_nesting']}",
+             f"  Max call depth: {'unbounded (recursion)' if depth is None else depth}",
+             f"  Statement bound: {'unknown' if bound is None else bound}"]
+    for cycle in profile['recursion']:
+        lines.append(f"  Recursion: {' -> '.join(cycle + cycle[:1])}")
+    for loop in profile['invariant_loops']:
+        lines.append(f"  Loop WHILE {loop['condition']} in {loop['where']}: {loop['verdict']}")
+    return "\n".join(lines)
 
 
 def print_results(success, cst, ast, errors, state, output_path=None, do_print=False):
@@ -120,6 +134,11 @@ def print_results(success, cst, ast, errors, state, output_path=None, do_print=F
         lines.append(f"  Position: ({state.agent_x}, {state.agent_y})")
         lines.append(f"  Direction: {state.agent_dir}")
         lines.append(f"  Dirt cleaned: {state.cleaned_dirt}")
+        lines.append(f"  Steps: {state.steps}")
+        if state.halt_reason:
+            lines.append(f"  Halted: {state.halt_reason}")
+        if state.memo_hits or state.memo_misses:
+            lines.append(f"  Pure-call cache: {state.memo_hits} hits, {state.memo_misses} misses")
 
         if state.outputs:
             lines.append("")
@@ -142,9 +161,114 @@ def print_results(success, cst, ast, errors, state, output_path=None, do_print=F
             print(f"Could not write output file {output_path}: {e}")
 
 
+def output_path_for(filename):
+    """Path of the results file written for a program (Part5/output/<name>_output.txt)."""
+    out_dir = os.path.join(os.path.dirname(__file__), 'output')
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+    except Exception:
+        pass
+    base = os.path.basename(filename)
+    return os.path.join(out_dir, os.path.splitext(base)[0] + '_output.txt')
+
+
+def watch_directory(directory, interval=0.25, do_print=False, show_cost=False, **run_options):
+    """
+    Long-lived mode: poll `directory` for .cl files and re-run only the
+    programs whose source changed. Parser tables, the per-file incremental
+    front ends (tokens, CSTs, ASTs) and imported modules stay warm between runs.
+    show_cost and run_options (max_cost, check_cost, Interpreter options) are
+    as for run_complete_pipeline.
+    """
+    front_ends = {}  # path -> IncrementalFrontEnd
+    seen = {}        # path -> (mtime_ns, size) at the last run
+    print(f"Watching {directory} for .cl changes (Ctrl+C to stop)")
+    try:
+        while True:
+            current = {}
+            for entry in os.scandir(directory):
+                if entry.name.endswith('.cl') and entry.is_file():
+                    st = entry.stat()
+                    current[entry.path] = (st.st_mtime_ns, st.st_size)
+            for path in sorted(current):
+                if seen.get(path) != current[path]:
+                    _rerun_watched(path, front_ends, do_print, show_cost, run_options)
+            for path in set(front_ends) - set(current):
+                del front_ends[path]
+            seen = current
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+def _rerun_watched(path, front_ends, do_print, show_cost, run_options):
+    """Re-run one changed program through the warm pipeline and report the latency."""
+    started = time.perf_counter()
+    front_end = front_ends.setdefault(path, IncrementalFrontEnd())
+    # the same Pipeline.run as run_complete_pipeline (map paths, cost admission),
+    # parsing and analyzing with the file's cached front end
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            result = _shared_pipeline().run(path=path, front_end=front_end, **run_options)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    stats = front_end.stats
+    name = os.path.basename(path)
+    state = result.state
+    if result.ok:
+        print(f"[{time.strftime('%H:%M:%S')}] {name}: ok in {elapsed:.1f} ms "
+              f"(re-parsed {stats['reparsed']}/{stats['regions']} blocks, "
+              f"steps {state.steps}, dirt cleaned {state.cleaned_dirt})")
+    else:
+        verdict = 'rejected' if result.stage == 'admission' else 'failed'
+        print(f"[{time.strftime('%H:%M:%S')}] {name}: {verdict} in {elapsed:.1f} ms")
+        for err in result.errors:
+            print(f"  - {err}")
+    if show_cost and result.cost_profile is not None:
+        print(format_cost(result.cost_profile))
+    print_results(result.ok, result.cst, result.ast, result.errors, state,
+                  output_path=output_path_for(path), do_print=do_print)
+
+
+def analyze_program(filename):
+    """Front end for one program file (for the command lines); returns the AST or exits with its errors."""
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            cst, ast, errors = IncrementalFrontEnd().analyze_file(filename)
+    if ast is None or errors:
+        print(f"Error: {filename} did not compile")
+        for err in errors or []:
+            print(f"  - {err}")
+        sys.exit(1)
+    resolve_map_paths(ast, os.path.dirname(filename))
+    return ast
+
+
+def pop_option(args, name, convert=str):
+    """Remove `name value` from args and return the converted value (None if absent)."""
+    if name not in args:
+        return None
+    i = args.index(name)
+    if i + 1 >= len(args):
+        print(f"Error: {name} expects a value")
+        sys.exit(1)
+    value = args[i + 1]
+    del args[i:i + 2]
+    try:
+        return convert(value)
+    except ValueError:
+        print(f"Error: invalid value for {name}: {value}")
+        sys.exit(1)
+
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python run_complete.py [--print] <program.cl>")
+        print("Usage: python run_complete.py [--print] [--memo-size N] [--mode tree|stack] [--detect-cycles]")
+        print("       [--checkpoint FILE --checkpoint-every N] [--resume FILE] [--seek-step K]")
+        print("       [--max-steps N] [--time-limit SECONDS] [--world-store set|chunked]")
+        print("       [--history-depth N] [--cost] [--check-cost] [--max-cost N] [--trace FILE]")
+        print("       <program.cl>")
+        print("       python run_complete.py [options] --watch <directory> [--interval SECONDS]")
         print("\nAvailable test programs:")
         prog_dir = os.path.join(os.path.dirname(__file__), 'programs')
         if os.path.exists(prog_dir):
@@ -159,6 +283,63 @@ def main():
     if '--print' in args:
         do_print = True
         args.remove('--print')
+    interp_options = {}
+    if '--detect-cycles' in args:
+        interp_options['detect_cycles'] = True
+        args.remove('--detect-cycles')
+    memo_size = pop_option(args, '--memo-size', int)
+    if memo_size is not None:
+        interp_options['memo_size'] = memo_size
+    mode = pop_option(args, '--mode')
+    if mode is not None:
+        interp_options['mode'] = mode
+    checkpoint = pop_option(args, '--checkpoint')
+    if checkpoint is not None:
+        interp_options['mode'] = 'stack'
+        interp_options['checkpoint_path'] = checkpoint
+        every = pop_option(args, '--checkpoint-every', int)
+        if every is not None and every <= 0:
+            print(f"Error: --checkpoint-every must be positive, got {every}")
+            sys.exit(1)
+        interp_options['checkpoint_every'] = 1000 if every is None else every
+    resume = pop_option(args, '--resume')
+    if resume is not None:
+        interp_options['resume_from'] = resume
+    seek_step = pop_option(args, '--seek-step', int)
+    if seek_step is not None:
+        interp_options['seek_step'] = seek_step
+    max_steps = pop_option(args, '--max-steps', int)
+    if max_steps is not None:
+        interp_options['max_steps'] = max_steps
+    time_limit = pop_option(args, '--time-limit', float)
+    if time_limit is not None:
+        interp_options['time_limit'] = time_limit
+    world_store = pop_option(args, '--world-store')
+    if world_store is not None:
+        interp_options['world_store'] = world_store
+    history_depth = pop_option(args, '--history-depth', int)
+    if history_depth is not None:
+        interp_options['history_depth'] = history_depth
+    trace = pop_option(args, '--trace')
+    if trace is not None:
+        interp_options['trace_path'] = trace
+    if '--cost' in args:
+        interp_options['show_cost'] = True
+        args.remove('--cost')
+    if '--check-cost' in args:
+        interp_options['check_cost'] = True
+        args.remove('--check-cost')
+    max_cost = pop_option(args, '--max-cost', int)
+    if max_cost is not None:
+        interp_options['max_cost'] = max_cost
+    watch_dir = pop_option(args, '--watch')
+    if watch_dir is not None:
+        interval = pop_option(args, '--interval', float)
+        if not os.path.isdir(watch_dir):
+            print(f"Error: Directory not found: {watch_dir}")
+            sys.exit(1)
+        watch_directory(watch_dir, interval=interval or 0.25, do_print=do_print, **interp_options)
+        sys.exit(0)
     if not args:
         print("Error: no filename provided")
         sys.exit(1)
@@ -168,16 +349,9 @@ def main():
         sys.exit(1)
 
     # Prepare output directory and output filename
-    out_dir = os.path.join(os.path.dirname(__file__), 'output')
-    try:
-        os.makedirs(out_dir, exist_ok=True)
-    except Exception:
-        pass
-    base = os.path.basename(filename)
-    out_name = os.path.splitext(base)[0] + '_output.txt'
-    out_path = os.path.join(out_dir, out_name)
+    out_path = output_path_for(filename)
 
-    success, cst, ast, errors, state = run_complete_pipeline(filename, do_print=do_print)
+    success, cst, ast, errors, state = run_complete_pipeline(filename, do_print=do_print, **interp_options)
     print_results(success, cst, ast, errors, state, output_path=out_path, do_print=do_print)
 
     sys.exit(0 if success else 1)
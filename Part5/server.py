@@ -0,0 +1,347 @@
+"""
+Local execution server for Cleaning-World programs.
+Clients connect over localhost TCP or a Unix socket and send one JSON object
+per line; each request is run through a Pipeline on a pool of warm worker
+processes (modules and parser tables already loaded) and answered
+with one JSON line holding the final InterpreterState summary.
+
+Request:   {"id": 1, "source": "WORLD ..." | "path": "prog.cl",
+            "options": {"mode": "stack", "max_steps": 100000, ...},
+            "timeout": 5.0}
+           {"op": "ping"} / {"op": "shutdown"}
+Response:  {"id": 1, "ok": true, "state": {...}, "errors": [], "elapsed_ms": 3.1}
+           {"id": 1, "ok": false, "error": "..."}
+
+Programs given by path are read only from under the server's root directory
+(--root, default the working directory): relative paths are resolved against
+it. The same holds for MAP_FILE paths in any program, which must also name
+regular files. Options that read or write files of the client's choosing
+(checkpoints, resume) are not accepted.
+
+Every run has a deadline and a step limit: the request's timeout and
+max_steps, capped at the server's (--timeout, --max-steps), which are also
+the defaults. A runaway program cannot hold a worker, or stop(), for longer.
+
+Usage: python server.py [--port N | --socket PATH] [--workers N] [--root DIR]
+                        [--timeout SECONDS] [--max-steps N]
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+DEFAULT_PORT = 8765
+
+# server-wide limits for every run (requests may ask for less)
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_STEPS = 1000000
+
+# run options a request may set (passed on to Pipeline.run)
+# (no checkpoint or resume options: they would open files the client names)
+RUN_OPTIONS = {'memo_size', 'mode', 'tail_calls', 'detect_cycles', 'max_steps', 'world_store',
+               'history_depth', 'max_cost'}
+
+# extra time the server waits past a deadline for the worker's own time limit to stop it
+DEADLINE_GRACE = 1.0
+
+
+# ---------- Worker side ----------
+
+_pipeline = None  # this worker's Pipeline
+
+
+def _warm_worker():
+    """Pool initializer: import the pipeline (and load parser tables) once per worker."""
+    global _pipeline
+    from pipeline import Pipeline
+    _pipeline = Pipeline()
+
+
+def _ping(_=None):
+    return os.getpid()
+
+
+def _run_job(request, deadline, root):
+    """Run one request in a worker process; returns the response dict (without id)."""
+    if _pipeline is None:
+        _warm_worker()
+    if time.time() >= deadline:
+        return {'ok': False, 'error': 'deadline exceeded before the job started'}
+    options = dict(request.get('options') or {})
+    options['time_limit'] = max(deadline - time.time(), 0.0)
+
+    started = time.perf_counter()
+    result = _pipeline.run(request.get('source'), path=request.get('path'), map_root=root, **options)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    response = {'ok': result.ok, 'errors': [str(err) for err in result.errors],
+                'elapsed_ms': round(elapsed, 3)}
+    if result.state is not None:
+        response['state'] = result.state.summary()
+    if not result.ok and not response['errors']:
+        response['errors'] = [f"{result.stage} failed"]
+    return response
+
+
+# ---------- Server side ----------
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serves one client connection; requests on it are answered in order."""
+
+    def handle(self):
+        app = self.server.app
+        app._track(self, idle=True)
+        try:
+            while not app.stopping.is_set():
+                try:
+                    line = self.rfile.readline()
+                except OSError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                app._track(self, idle=False)
+                response = app.handle_line(line)
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                self.wfile.flush()
+                app._track(self, idle=True)
+        finally:
+            app._untrack(self)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = False
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = False
+
+
+class ExecutionServer:
+    """
+    Accepts connections (one thread each) and runs requests on a process pool.
+    Connections are served concurrently; stop() stops accepting, lets running
+    requests finish and then shuts the workers down. root: the only directory
+    programs and map files may be read from (default: the working directory).
+    timeout / max_steps: the longest and most steps any run may take.
+    """
+
+    def __init__(self, port=DEFAULT_PORT, socket_path=None, workers=None, root=None,
+                 timeout=DEFAULT_TIMEOUT, max_steps=DEFAULT_MAX_STEPS):
+        self.workers = workers or os.cpu_count() or 1
+        self.root = os.path.realpath(root or os.getcwd())
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.socket_path = socket_path
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = {}  # handler -> True while it waits for a request line
+        self.pool = self._start_pool()
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.server = _UnixServer(socket_path, _RequestHandler)
+        else:
+            self.server = _TCPServer(('127.0.0.1', port), _RequestHandler)
+        self.server.app = self
+        self.address = socket_path or self.server.server_address
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # start every worker now so the first requests do not pay for imports
+        list(pool.map(_ping, range(self.workers)))
+        return pool
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self._close()
+
+    def stop(self):
+        """Graceful shutdown; safe to call from any thread except the serving one."""
+        if self.stopping.is_set():
+            return
+        self.stopping.set()
+        self.server.shutdown()
+        with self._lock:
+            idle = [handler for handler, waiting in self._connections.items() if waiting]
+        for handler in idle:
+            # wake connections blocked in readline so their threads can exit
+            try:
+                handler.connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def _close(self):
+        self.server.server_close()  # joins connection threads (running requests finish)
+        self.pool.shutdown(wait=True)
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _track(self, handler, idle):
+        with self._lock:
+            self._connections[handler] = idle
+        if idle and self.stopping.is_set():
+            try:
+                handler.connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def _untrack(self, handler):
+        with self._lock:
+            self._connections.pop(handler, None)
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {'ok': False, 'error': f"invalid request: {e}"}
+        response = self.handle(request)
+        if 'id' in request:
+            response = dict(response, id=request['id'])
+        return response
+
+    def handle(self, request):
+        """Answer one decoded request."""
+        op = request.get('op', 'run')
+        if op == 'ping':
+            return {'ok': True, 'workers': self.workers}
+        if op == 'shutdown':
+            threading.Thread(target=self.stop).start()
+            return {'ok': True}
+        if op != 'run':
+            return {'ok': False, 'error': f"unknown op: {op}"}
+        if self.stopping.is_set():
+            return {'ok': False, 'error': 'server is shutting down'}
+
+        if ('source' in request) == ('path' in request):
+            return {'ok': False, 'error': "give exactly one of 'source' or 'path'"}
+        options = request.get('options') or {}
+        if not isinstance(options, dict):
+            return {'ok': False, 'error': "options must be a JSON object"}
+        unknown = set(options) - RUN_OPTIONS
+        if unknown:
+            return {'ok': False, 'error': f"unknown options: {', '.join(sorted(unknown))}"}
+        max_steps = options.get('max_steps', self.max_steps)
+        timeout = request.get('timeout', self.timeout)
+        if not _positive(max_steps, int):
+            return {'ok': False, 'error': "max_steps must be a positive integer"}
+        if not _positive(timeout, (int, float)):
+            return {'ok': False, 'error': "timeout must be a positive number of seconds"}
+        request = dict(request, options=dict(options, max_steps=min(max_steps, self.max_steps)))
+        if 'path' in request:
+            path = self.resolve_path(request['path'])
+            if path is None:
+                return {'ok': False, 'error': f"path is outside the server root: {request['path']}"}
+            if not os.path.isfile(path):
+                return {'ok': False, 'error': f"file not found: {request['path']}"}
+            request = dict(request, path=path)
+
+        deadline = time.time() + min(timeout, self.timeout)
+        try:
+            future = self.pool.submit(_run_job, request, deadline, self.root)
+            return future.result(timeout=max(deadline - time.time(), 0) + DEADLINE_GRACE)
+        except FutureTimeout:
+            future.cancel()
+            return {'ok': False, 'error': 'deadline exceeded'}
+        except BrokenProcessPool:
+            self._restart_pool()
+            return {'ok': False, 'error': 'worker process died; pool restarted'}
+        except Exception as e:
+            return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+    def resolve_path(self, path):
+        """Absolute path of a requested program under the root (links followed), or None."""
+        if not isinstance(path, str):
+            return None
+        path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, path]) != self.root:
+            return None
+        return path
+
+    def _restart_pool(self):
+        with self._lock:
+            if getattr(self.pool, '_broken', False):
+                self.pool.shutdown(wait=False)
+                self.pool = self._start_pool()
+
+
+def _positive(value, kind):
+    return isinstance(value, kind) and not isinstance(value, bool) and value > 0
+
+
+def send_request(request, port=DEFAULT_PORT, socket_path=None):
+    """Client helper: send one request and return the decoded response."""
+    if socket_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    else:
+        sock = socket.create_connection(('127.0.0.1', port))
+    with sock, sock.makefile('rwb') as stream:
+        stream.write(json.dumps(request).encode('utf-8') + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def _pop_option(args, name, convert=str):
+    if name not in args:
+        return None
+    i = args.index(name)
+    if i + 1 >= len(args):
+        print(f"Error: {name} expects a value")
+        sys.exit(1)
+    value = args[i + 1]
+    del args[i:i + 2]
+    try:
+        return convert(value)
+    except ValueError:
+        print(f"Error: invalid value for {name}: {value}")
+        sys.exit(1)
+
+
+def main():
+    args = sys.argv[1:]
+    port = _pop_option(args, '--port', int) or DEFAULT_PORT
+    socket_path = _pop_option(args, '--socket')
+    workers = _pop_option(args, '--workers', int)
+    root = _pop_option(args, '--root')
+    timeout = _pop_option(args, '--timeout', float)
+    max_steps = _pop_option(args, '--max-steps', int)
+    if args:
+        print("Usage: python server.py [--port N | --socket PATH] [--workers N] [--root DIR]")
+        print("                        [--timeout SECONDS] [--max-steps N]")
+        sys.exit(1)
+    if root and not os.path.isdir(root):
+        print(f"Error: not a directory: {root}")
+        sys.exit(1)
+    if (timeout is not None and timeout <= 0) or (max_steps is not None and max_steps <= 0):
+        print("Error: --timeout and --max-steps must be positive")
+        sys.exit(1)
+
+    app = ExecutionServer(port=port, socket_path=socket_path, workers=workers, root=root,
+                          timeout=timeout or DEFAULT_TIMEOUT, max_steps=max_steps or DEFAULT_MAX_STEPS)
+
+    def on_signal(signum, frame):
+        threading.Thread(target=app.stop).start()
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    print(f"Serving on {app.address} with {app.workers} workers (Ctrl+C to stop)")
+    app.serve_forever()
+    print("Server stopped")
+
+
+if __name__ == '__main__':
+    main()
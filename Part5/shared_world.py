@@ -0,0 +1,225 @@
+"""
+World grids in shared memory, for simulating one large world in many worker
+processes.
+
+SharedWorld.create(ast) runs the program's WORLD declarations once (map file,
+cells, rectangles, random fills) and paints the obstacles and dirt into a
+byte grid in multiprocessing.shared_memory, one byte per cell with the raw
+map codes (0 free, 1 obstacle, 2 dirt). The handle pickles to the segment's
+name and a few fields, so it can be handed to pool workers;
+Interpreter(shared_world=handle) attaches to the segment instead of building
+the layers itself. Nothing ever writes to the segment after it is built
+(attached grids only get a read-only view of it):
+CLEAN records the cells it frees in the interpreter's own SharedGrid, and
+visited cells are private as before, so a worker holds memory for the cells
+it changed rather than for the whole world.
+
+Cells the grid cannot hold (outside the SIZE, or dirt declared on an
+obstacle) travel with the handle as short lists.
+
+    with SharedWorld.create(ast) as world:
+        with ProcessPoolExecutor() as pool:
+            states = pool.map(run_one, [(ast, world)] * 100)
+"""
+
+from multiprocessing import shared_memory
+
+from interpreter import Interpreter
+from map_file import DIRT, FREE, OBSTACLE, MapLayer
+from world_store import RegionLayer
+
+# bytes counted per slice when totalling the grid
+_COUNT_CHUNK = 1 << 20
+
+
+class SharedGrid:
+    """
+    A shared byte grid (read-only) plus this process's freed cells; used by
+    MapLayer like a MapGrid. code(px, py) tells what cell (px + 1, py + 1) holds.
+    """
+
+    def __init__(self, name, width, height, counts):
+        self.path = f"shm:{name}"
+        self.name = name
+        self.width, self.height = width, height
+        self.counts = counts  # code -> cells holding it when the grid was built
+        self.freed = {}  # py -> {px: code the cell had}, cells set free since attaching
+        self.freed_counts = {}  # code -> cells holding it that were set free since attaching
+        self._attach()
+
+    def _attach(self):
+        self.shm = shared_memory.SharedMemory(name=self.name)
+        self.cells = self.shm.buf.toreadonly()
+
+    def code(self, px, py):
+        freed = self.freed.get(py)
+        if freed and px in freed:
+            return FREE
+        return self.cells[py * self.width + px]
+
+    def set_free(self, px, py):
+        code = self.code(px, py)
+        if code != FREE:
+            self.freed.setdefault(py, {})[px] = code
+            self.freed_counts[code] = self.freed_counts.get(code, 0) + 1
+
+    def row_codes(self, py):
+        """Codes of one row, as bytes."""
+        start = py * self.width
+        row = bytes(self.cells[start:start + self.width])
+        freed = self.freed.get(py)
+        if freed:
+            row = bytearray(row)
+            for px in freed:
+                row[px] = FREE
+            row = bytes(row)
+        return row
+
+    def count(self, code):
+        return self.counts.get(code, 0) - self.freed_counts.get(code, 0)
+
+    def close(self):
+        if self.cells is not None:
+            self.cells.release()  # the segment cannot be closed while a view of it is alive
+            self.cells = None
+            self.shm.close()
+
+    def __getstate__(self):
+        # the segment itself cannot be pickled: keep its name and the freed cells
+        state = dict(self.__dict__)
+        del state['shm'], state['cells']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach()
+
+
+class SharedWorld:
+    """
+    Handle to a world built into shared memory. The process that create()s it
+    owns the segment: close() and unlink() it once the workers are done (or
+    use the handle as a context manager). Copies unpickled in worker
+    processes only refer to it by name.
+    """
+
+    def __init__(self, name, width, height, counts, start, entry, exit, spill_obstacles, spill_dirt):
+        self.name = name
+        self.width, self.height = width, height
+        self.counts = counts
+        self.start = start  # agent (x, y, direction) before the first statement
+        self.entry, self.exit = entry, exit
+        self.spill_obstacles = spill_obstacles
+        self.spill_dirt = spill_dirt
+        self._shm = None  # the segment, in the creating process
+
+    @classmethod
+    def create(cls, ast, name=None):
+        """Build the world of a program AST into a new shared memory segment."""
+        interp = Interpreter()
+        interp.load(ast)
+        try:
+            return cls._build(interp.state, name)
+        finally:
+            interp.close_maps()  # a map file's cells are copied into the segment
+
+    @classmethod
+    def _build(cls, state, name):
+        width, height = state.width, state.height
+        if not width or not height:
+            raise ValueError("a shared world needs a SIZE (or a map file)")
+        shm = shared_memory.SharedMemory(name=name, create=True, size=width * height)
+        try:
+            cells = shm.buf  # a new segment is all zero bytes (FREE)
+            for layer in (state.obstacles, state.dirt):
+                if isinstance(layer, MapLayer):
+                    # the map's cells (both layers share the grid) are copied row by row
+                    for py in range(height):
+                        cells[py * width:(py + 1) * width] = layer.grid.row_codes(py)
+                    break
+            spill_obstacles = _paint(cells, width, height, state.obstacles, OBSTACLE)
+            spill_dirt = _paint(cells, width, height, state.dirt, DIRT)
+            counts = {OBSTACLE: 0, DIRT: 0}
+            for start in range(0, width * height, _COUNT_CHUNK):
+                chunk = bytes(cells[start:start + _COUNT_CHUNK])
+                for code in counts:
+                    counts[code] += chunk.count(code)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        world = cls(shm.name, width, height, counts, (state.agent_x, state.agent_y, state.agent_dir),
+                    state.entry, state.exit, spill_obstacles, spill_dirt)
+        world._shm = shm
+        return world
+
+    def attach(self, state):
+        """Set up an InterpreterState's world on the shared grid, with private changes."""
+        grid = SharedGrid(self.name, self.width, self.height, self.counts)
+        state.width, state.height = self.width, self.height
+        state.obstacles = MapLayer(set(self.spill_obstacles), grid, OBSTACLE)
+        state.dirt = MapLayer(set(self.spill_dirt), grid, DIRT)
+        state.entry, state.exit = self.entry, self.exit
+        state.agent_x, state.agent_y, state.agent_dir = self.start
+        state.visited.add((state.agent_x, state.agent_y))
+        state.history.reset((state.agent_x, state.agent_y))
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+
+    def unlink(self):
+        """Free the segment (creating process only; attached workers keep their mapping)."""
+        if self._shm is not None:
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_shm'] = None
+        return state
+
+
+def _paint(cells, width, height, layer, code):
+    """Write a layer's cells into the grid; returns the cells the grid cannot hold."""
+    spill = []
+    if isinstance(layer, MapLayer):
+        layer = layer.cells  # its map cells are already in the grid
+    if isinstance(layer, RegionLayer):
+        fill = bytes((code,))
+        for y, (starts, ends) in layer.rows.items():
+            for a, b in zip(starts, ends):
+                lo, hi = max(a, 1), min(b, width)
+                if not 1 <= y <= height or lo > hi:
+                    spill.extend((x, y) for x in range(a, b + 1))
+                    continue
+                spill.extend((x, y) for x in range(a, lo))
+                spill.extend((x, y) for x in range(hi + 1, b + 1))
+                start, end = (y - 1) * width + lo - 1, (y - 1) * width + hi
+                if bytes(cells[start:end]).translate(None, fill + bytes((FREE,))):
+                    # some cell holds the other code: cell by cell
+                    for x in range(lo, hi + 1):
+                        _put(cells, width, height, (x, y), code, spill)
+                else:
+                    cells[start:end] = fill * (end - start)
+        layer = layer.cells
+    for cell in layer:
+        _put(cells, width, height, cell, code, spill)
+    return spill
+
+
+def _put(cells, width, height, cell, code, spill):
+    x, y = cell
+    if 1 <= x <= width and 1 <= y <= height:
+        i = (y - 1) * width + x - 1
+        if cells[i] in (FREE, code):
+            cells[i] = code
+            return
+    spill.append(cell)
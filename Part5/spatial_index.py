@@ -0,0 +1,91 @@
+"""
+Spatial index of dirt cells for the DIRT_DIST / DIRT_DIR expressions.
+Cells are grouped into square buckets of 2**bucket_bits cells per side.
+A nearest query scans buckets in rings of growing distance around the
+agent and stops once no unscanned bucket can hold a closer cell, so it
+touches only the neighbourhood of the answer. Cleaning a cell is an O(1)
+removal from its bucket.
+"""
+
+
+class DirtIndex:
+    """Bucketed set of dirt cells with Manhattan nearest-neighbour queries."""
+
+    def __init__(self, cells=(), bucket_bits=4):
+        self.bits = bucket_bits
+        self.size = 1 << bucket_bits
+        self.buckets = {}  # (x >> bits, y >> bits) -> set of cells
+        self.count = 0
+        for cell in cells:
+            self.add(cell)
+
+    def add(self, cell):
+        key = (cell[0] >> self.bits, cell[1] >> self.bits)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = set()
+        if cell not in bucket:
+            bucket.add(cell)
+            self.count += 1
+
+    def discard(self, cell):
+        key = (cell[0] >> self.bits, cell[1] >> self.bits)
+        bucket = self.buckets.get(key)
+        if bucket and cell in bucket:
+            bucket.remove(cell)
+            self.count -= 1
+            if not bucket:
+                del self.buckets[key]
+
+    def _bucket_bound(self, key, x, y):
+        """Smallest Manhattan distance from (x, y) to any cell of a bucket."""
+        x0, y0 = key[0] << self.bits, key[1] << self.bits
+        x1, y1 = x0 + self.size - 1, y0 + self.size - 1
+        return max(x0 - x, 0, x - x1) + max(y0 - y, 0, y - y1)
+
+    def _scan(self, bucket, x, y, best):
+        for cell in bucket:
+            candidate = (abs(cell[0] - x) + abs(cell[1] - y), cell)
+            if best is None or candidate < best:
+                best = candidate
+        return best
+
+    def nearest(self, pos):
+        """(distance, cell) of the closest dirt cell (ties: smallest cell), or None."""
+        if not self.count:
+            return None
+        x, y = pos
+        bx, by = x >> self.bits, y >> self.bits
+        best = None
+        ring = 0
+        while True:
+            # every cell in ring r is at least (r - 1) * size + 1 away
+            if best is not None and ring and best[0] < (ring - 1) * self.size + 1:
+                return best
+            if 8 * ring >= len(self.buckets):
+                # the ring is larger than what is left: check the remaining buckets directly
+                rest = sorted((self._bucket_bound(key, x, y), key) for key in self.buckets
+                              if max(abs(key[0] - bx), abs(key[1] - by)) >= ring)
+                for bound, key in rest:
+                    if best is not None and bound > best[0]:
+                        break
+                    best = self._scan(self.buckets[key], x, y, best)
+                return best
+            for key in _ring(bx, by, ring):
+                bucket = self.buckets.get(key)
+                if bucket:
+                    best = self._scan(bucket, x, y, best)
+            ring += 1
+
+
+def _ring(bx, by, r):
+    """Bucket keys at Chebyshev distance exactly r from (bx, by)."""
+    if r == 0:
+        yield bx, by
+        return
+    for dx in range(-r, r + 1):
+        yield bx + dx, by - r
+        yield bx + dx, by + r
+    for dy in range(-r + 1, r):
+        yield bx - r, by + dy
+        yield bx + r, by + dy
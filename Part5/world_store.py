@@ -0,0 +1,238 @@
+"""
+World cell storage for the interpreter.
+
+The default store keeps visited cells, dirt and obstacles in Python sets of
+(x, y) tuples. For very large maps the chunked store splits the plane into
+fixed-size square tiles that are allocated the first time a cell in them is
+written; each tile holds one bitset per layer. Memory then follows the area
+an agent actually touches (3 bits per cell of a touched tile) instead of the
+~100 bytes a set entry costs, at the price of somewhat slower single-cell
+operations.
+
+Rectangular region declarations (OBSTACLE_RECT / DIRT_RECT) are kept as
+per-row intervals by a RegionLayer wrapped around either store, so a
+region costs a few integers per row instead of one entry per cell.
+"""
+
+from bisect import bisect_left, bisect_right
+
+# layer index inside a tile
+VISITED, DIRT, OBSTACLES = 0, 1, 2
+LAYERS = 3
+
+WORLD_STORES = ('set', 'chunked')
+
+
+def make_layers(kind='set', tile_bits=6):
+    """Return (visited, dirt, obstacles) containers for a world store kind."""
+    if kind == 'set':
+        return set(), set(), set()
+    if kind == 'chunked':
+        world = ChunkedWorld(tile_bits)
+        return world.layer(VISITED), world.layer(DIRT), world.layer(OBSTACLES)
+    raise ValueError(f"Unknown world store: {kind}")
+
+
+class ChunkedWorld:
+    """
+    Tiles of 2**tile_bits x 2**tile_bits cells, keyed by (x >> tile_bits, y >> tile_bits).
+    A tile is one bytearray with the bitsets of all layers back to back.
+    Negative coordinates work too (>> floors).
+    """
+
+    def __init__(self, tile_bits=6):
+        self.tile_bits = tile_bits
+        self.mask = (1 << tile_bits) - 1
+        self.layer_bytes = (1 << (2 * tile_bits)) >> 3
+        self.tiles = {}
+        self.counts = [0] * LAYERS
+
+    def layer(self, index):
+        return CellLayer(self, index)
+
+    def memory_bytes(self):
+        """Bytes held by tile bitsets."""
+        return len(self.tiles) * LAYERS * self.layer_bytes
+
+
+class CellLayer:
+    """Set-like view of one layer of a ChunkedWorld (supports what the interpreter uses)."""
+
+    def __init__(self, world, index):
+        self.world = world
+        self.index = index
+
+    def _locate(self, cell):
+        world = self.world
+        x, y = cell
+        b, m = world.tile_bits, world.mask
+        local = ((y & m) << b) | (x & m)
+        return (x >> b, y >> b), self.index * world.layer_bytes + (local >> 3), 1 << (local & 7)
+
+    def __contains__(self, cell):
+        key, offset, bit = self._locate(cell)
+        tile = self.world.tiles.get(key)
+        return tile is not None and tile[offset] & bit != 0
+
+    def add(self, cell):
+        key, offset, bit = self._locate(cell)
+        world = self.world
+        tile = world.tiles.get(key)
+        if tile is None:
+            tile = world.tiles[key] = bytearray(LAYERS * world.layer_bytes)
+        if not tile[offset] & bit:
+            tile[offset] |= bit
+            world.counts[self.index] += 1
+
+    def update(self, cells):
+        for cell in cells:
+            self.add(cell)
+
+    def discard(self, cell):
+        key, offset, bit = self._locate(cell)
+        tile = self.world.tiles.get(key)
+        if tile is not None and tile[offset] & bit:
+            tile[offset] &= ~bit
+            self.world.counts[self.index] -= 1
+
+    def remove(self, cell):
+        if cell not in self:
+            raise KeyError(cell)
+        self.discard(cell)
+
+    def clear(self):
+        world = self.world
+        start = self.index * world.layer_bytes
+        empty = bytes(world.layer_bytes)
+        for tile in world.tiles.values():
+            tile[start:start + world.layer_bytes] = empty
+        world.counts[self.index] = 0
+
+    def __len__(self):
+        return self.world.counts[self.index]
+
+    def __bool__(self):
+        return self.world.counts[self.index] > 0
+
+    def __iter__(self):
+        world = self.world
+        b = world.tile_bits
+        start = self.index * world.layer_bytes
+        for (tx, ty), tile in list(world.tiles.items()):
+            for i in range(world.layer_bytes):
+                byte = tile[start + i]
+                while byte:
+                    low = byte & -byte
+                    local = (i << 3) + low.bit_length() - 1
+                    yield (tx << b) | (local & world.mask), (ty << b) | (local >> b)
+                    byte ^= low
+
+    def __repr__(self):
+        return f"CellLayer({sorted(self)!r})"
+
+
+class RegionLayer:
+    """
+    Set-like layer of single cells (in `cells`, either store above) plus
+    rectangular regions kept as sorted, disjoint x intervals per row.
+    A cell is in at most one of the two, so len() and iteration need no
+    de-duplication. Discarding a region cell splits its interval.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.rows = {}  # y -> ([start, ...], [end, ...]), inclusive, non-touching
+        self.region_count = 0
+
+    def _in_region(self, x, y):
+        row = self.rows.get(y)
+        if row is None:
+            return False
+        starts, ends = row
+        i = bisect_right(starts, x) - 1
+        return i >= 0 and x <= ends[i]
+
+    def _add_interval(self, y, a, b):
+        """Cover x in [a, b] on row y; returns how many cells were newly covered."""
+        starts, ends = self.rows.setdefault(y, ([], []))
+        lo = bisect_left(ends, a - 1)       # first interval touching [a, b]
+        hi = bisect_right(starts, b + 1)    # one past the last interval touching it
+        covered = sum(ends[i] - starts[i] + 1 for i in range(lo, hi))
+        if lo < hi:
+            a, b = min(a, starts[lo]), max(b, ends[hi - 1])
+        starts[lo:hi] = [a]
+        ends[lo:hi] = [b]
+        return (b - a + 1) - covered
+
+    def add_rect(self, x1, y1, x2, y2):
+        """Add every cell with x between x1 and x2 and y between y1 and y2."""
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        for y in range(y1, y2 + 1):
+            self.region_count += self._add_interval(y, x1, x2)
+        # single cells now inside a region move to it (whichever side is smaller is scanned)
+        if len(self.cells) <= (x2 - x1 + 1) * (y2 - y1 + 1):
+            inside = [c for c in self.cells if x1 <= c[0] <= x2 and y1 <= c[1] <= y2]
+        else:
+            inside = [(x, y) for y in range(y1, y2 + 1) for x in range(x1, x2 + 1) if (x, y) in self.cells]
+        for cell in inside:
+            self.cells.discard(cell)
+
+    def __contains__(self, cell):
+        return cell in self.cells or self._in_region(cell[0], cell[1])
+
+    def add(self, cell):
+        if not self._in_region(cell[0], cell[1]):
+            self.cells.add(cell)
+
+    def update(self, cells):
+        if self.rows:
+            cells = [c for c in cells if not self._in_region(c[0], c[1])]
+        self.cells.update(cells)
+
+    def discard(self, cell):
+        x, y = cell
+        if not self._in_region(x, y):
+            self.cells.discard(cell)
+            return
+        starts, ends = self.rows[y]
+        i = bisect_right(starts, x) - 1
+        if starts[i] == ends[i]:
+            del starts[i], ends[i]
+            if not starts:
+                del self.rows[y]
+        elif x == starts[i]:
+            starts[i] += 1
+        elif x == ends[i]:
+            ends[i] -= 1
+        else:
+            starts.insert(i + 1, x + 1)
+            ends.insert(i + 1, ends[i])
+            ends[i] = x - 1
+        self.region_count -= 1
+
+    def remove(self, cell):
+        if cell not in self:
+            raise KeyError(cell)
+        self.discard(cell)
+
+    def clear(self):
+        self.cells.clear()
+        self.rows = {}
+        self.region_count = 0
+
+    def __len__(self):
+        return len(self.cells) + self.region_count
+
+    def __bool__(self):
+        return self.region_count > 0 or bool(self.cells)
+
+    def __iter__(self):
+        yield from self.cells
+        for y, (starts, ends) in list(self.rows.items()):
+            for a, b in list(zip(starts, ends)):
+                for x in range(a, b + 1):
+                    yield x, y
+
+    def __repr__(self):
+        return f"RegionLayer({sorted(self)!r})"
@@ -0,0 +1,57 @@
+"""
+Shared setup for the test suite: the three parts of the project are plain
+script folders, so their directories go on the import path here.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for part in (os.path.join('Part1&2', 'lexer'), 'Part3&4', 'Part5'):
+    path = os.path.join(ROOT, part)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# snapshots are signed with a key kept in a file; the tests make their own
+os.environ['CW_CHECKPOINT_KEY_FILE'] = os.path.join(tempfile.mkdtemp(), 'checkpoint.key')
+
+import pytest
+
+from pipeline import Pipeline
+from semantics_analyzer.semantic import SemanticAnalyzer
+
+# the sample programs that compile
+SAMPLE_PROGRAMS = sorted(
+    glob.glob(os.path.join(ROOT, 'Part3&4', 'programs', '*.cl'))
+    + glob.glob(os.path.join(ROOT, 'Part5', 'programs', '*.cl'))
+    + [os.path.join(ROOT, 'Part1&2', 'programs', 'program1.cl')])
+
+# sample programs with syntax errors
+BROKEN_PROGRAMS = [os.path.join(ROOT, 'Part1&2', 'programs', f'program{i}.cl') for i in (2, 3)]
+
+# a world with dirt, obstacles and regions, and an agent that uses every action
+SWEEP_PROGRAM = os.path.join(ROOT, 'tests', 'programs', 'sweep.cl')
+
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+@pytest.fixture(scope='session')
+def pipeline():
+    return Pipeline()
+
+
+@pytest.fixture(scope='session')
+def analyze(pipeline):
+    """analyze(path) -> the program's AST (it must compile); nothing is run."""
+    def analyze(path):
+        cst, errors, _ = pipeline.parse(read(path))
+        assert cst is not None, errors
+        ast, errors = SemanticAnalyzer().analyze(cst)
+        assert not errors, errors
+        return ast
+    return analyze
@@ -0,0 +1,32 @@
+WORLD Sweep {
+    SIZE(12, 8);
+    ENTRY_DEF(1, 1, E);
+    EXIT_DEF(12, 8, S);
+    DIRT_RANDOM(15, 3);
+    OBSTACLE_RECT(4, 3, 6, 5);
+    OBSTACLE_DEF(9, 2);
+    DIRT_RECT(2, 7, 5, 7);
+}
+
+FUNC count(K) RETURNS INT {
+    IF K LT 1 THEN
+        RETURN 0;
+    ELSE
+        RETURN count(K - 1) + 1;
+    ENDIF;
+}
+
+AGENT Sweeper {
+    VAR n = 0;
+    WHILE n LT count(40) DO
+        IF SENSE DIRT THEN CLEAN; ELSE REPORT DIRT_COUNT; ENDIF;
+        IF SENSE OBSTACLE THEN TURN RIGHT; ELSE MOVE; ENDIF;
+        n = n + 1;
+    ENDWHILE;
+    BACKTRACK;
+    BACKTRACK;
+    GOTO_DIRT;
+    CLEAN;
+    GOTO_EXIT;
+    REPORT DIRT_DIST;
+}
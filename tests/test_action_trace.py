@@ -0,0 +1,62 @@
+"""Action traces replay to the recorded run without the program."""
+
+import pytest
+
+from action_trace import MAGIC, TraceReplayer
+from conftest import SWEEP_PROGRAM
+from interpreter import Interpreter
+
+
+def _world(state):
+    """Summary without the pure-call cache counters (replay evaluates no calls)."""
+    summary = state.summary()
+    del summary['memo_hits'], summary['memo_misses']
+    return summary
+
+
+@pytest.fixture(params=['tree', 'stack'])
+def traced(request, analyze, tmp_path):
+    """(final state of a traced run, its trace file)."""
+    path = str(tmp_path / 'run.trace')
+    state = Interpreter(mode=request.param, trace_path=path).execute(analyze(SWEEP_PROGRAM))
+    return state, path
+
+
+def test_replay_matches_the_original_run(traced):
+    state, path = traced
+    replayed = TraceReplayer(path).final_state()
+    assert _world(replayed) == _world(state)
+    assert sorted(replayed.dirt) == sorted(state.dirt)
+    assert sorted(replayed.visited) == sorted(state.visited)
+
+
+def test_tracing_does_not_change_the_run(analyze, traced):
+    state, _ = traced
+    assert state.summary() == Interpreter().execute(analyze(SWEEP_PROGRAM)).summary()
+
+
+def test_scrubbing_back_and_forth_gives_the_same_states(traced):
+    _, path = traced
+    reference = TraceReplayer(path, keyframe_every=10**9)
+    expected = {i: reference.state_at(i).summary() for i in range(0, len(reference) + 1, 7)}
+    replayer = TraceReplayer(path, keyframe_every=5)
+    for i in sorted(expected, reverse=True) + sorted(expected):
+        assert replayer.state_at(i).summary() == expected[i], i
+
+
+def test_forward_replay_never_rewinds_past_the_position(traced):
+    _, path = traced
+    replayer = TraceReplayer(path, keyframe_every=5)
+    replayer.state_at(12)  # keyframes at 5 and 10, none ahead
+    applied = []
+    apply = replayer._apply
+    replayer._apply = lambda i, record: (applied.append(i), apply(i, record))
+    replayer.state_at(40)
+    assert applied == list(range(12, 40))
+
+
+def test_corrupt_header_is_rejected(tmp_path):
+    path = tmp_path / 'bad.trace'
+    path.write_bytes(MAGIC + b'\x05\x00\x00\x00junk!')
+    with pytest.raises(ValueError, match='Corrupt trace header'):
+        TraceReplayer(str(path))
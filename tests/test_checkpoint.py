@@ -0,0 +1,99 @@
+"""Checkpoints: resuming or seeking gives the run a fresh execution gives."""
+
+import pickle
+import zlib
+
+import pytest
+
+from checkpoint import pack_snapshot, program_digest, read_index
+from conftest import SWEEP_PROGRAM
+from interpreter import Interpreter
+from pipeline import run_interpreter
+
+unpickled = []
+
+
+class _Tripwire:
+    """Records it was unpickled."""
+    def __reduce__(self):
+        return unpickled.append, ('payload',)
+
+
+def _record(ast, path):
+    """Run the program writing a snapshot every 25 steps; returns the final state."""
+    return Interpreter(mode='stack', checkpoint_path=path, checkpoint_every=25).execute(ast)
+
+
+@pytest.fixture
+def checkpointed(analyze, tmp_path):
+    """(ast, final state of a fresh run, path for a checkpoint file)."""
+    ast = analyze(SWEEP_PROGRAM)
+    fresh = Interpreter(mode='stack').execute(ast)
+    path = str(tmp_path / 'run.ckpt')
+    return ast, fresh, path
+
+
+def test_checkpointing_does_not_change_the_run(analyze, checkpointed):
+    ast, fresh, path = checkpointed
+    state = _record(ast, path)
+    assert state.summary() == fresh.summary()
+    steps = [step for step, _, _ in read_index(path)]
+    assert len(steps) > 3
+    assert steps == sorted(steps)
+
+
+def test_resume_from_every_snapshot_matches_fresh_run(checkpointed):
+    ast, fresh, path = checkpointed
+    _record(ast, path)
+    for step, _, _ in read_index(path):
+        resumed = Interpreter.from_checkpoint(ast, path, step, mode='stack').resume()
+        assert resumed.summary() == fresh.summary(), step
+
+
+def test_seek_then_resume_matches_fresh_run(checkpointed):
+    ast, fresh, path = checkpointed
+    _record(ast, path)
+    paused = run_interpreter(ast, resume_from=path, seek_step=100)
+    assert paused.steps == 100
+    interp = Interpreter.from_checkpoint(ast, path, 100, mode='stack')
+    interp.run_until(100)
+    assert interp.state.steps == 100
+    assert interp.resume().summary() == fresh.summary()
+
+
+def test_snapshot_of_another_program_is_rejected_before_unpickling(checkpointed):
+    ast, _, _ = checkpointed
+    other = pack_snapshot('0' * 40, zlib.compress(pickle.dumps(_Tripwire())))
+    with pytest.raises(ValueError, match='different program'):
+        Interpreter(mode='stack').restore(ast, other)
+    with pytest.raises(ValueError, match='snapshot'):
+        Interpreter(mode='stack').restore(ast, zlib.compress(pickle.dumps(_Tripwire())))
+    with pytest.raises(RuntimeError):
+        Interpreter(mode='tree').restore(ast, other)
+    assert unpickled == []
+
+
+def test_forged_snapshot_is_rejected_before_unpickling(checkpointed, tmp_path):
+    ast, _, path = checkpointed
+    payload = zlib.compress(pickle.dumps(_Tripwire()))
+    # the right program digest, signed with a key other than this installation's
+    forged = pack_snapshot(program_digest(ast), payload, key=b'k' * 32)
+    with pytest.raises(ValueError, match='signature'):
+        Interpreter(mode='stack').restore(ast, forged)
+    # a genuine snapshot whose payload was swapped
+    _record(ast, path)
+    genuine = Interpreter.from_checkpoint(ast, path, mode='stack').snapshot()
+    with pytest.raises(ValueError, match='signature'):
+        Interpreter(mode='stack').restore(ast, genuine[:-len(payload)] + payload)
+    assert unpickled == []
+
+
+@pytest.mark.parametrize('every', [0, -5, None])
+def test_checkpoint_interval_must_be_positive(tmp_path, every):
+    with pytest.raises(ValueError, match='checkpoint_every'):
+        Interpreter(mode='stack', checkpoint_path=str(tmp_path / 'x'), checkpoint_every=every)
+
+
+def test_checkpoint_needs_stack_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Interpreter(mode='tree', checkpoint_path=str(tmp_path / 'x'), checkpoint_every=10)
@@ -0,0 +1,96 @@
+"""detect_cycles stops loops that repeat a state, and only those."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from cycle_detector import CycleDetector, NonTerminatingLoop
+from interpreter import Interpreter
+from path_history import PathHistory
+
+PACING = """
+WORLD Hall {
+    SIZE(5, 3);
+    ENTRY_DEF(2, 2, E);
+}
+
+AGENT Pacer {
+    VAR n = 0;
+    WHILE n LT %s DO
+        MOVE;
+        TURN RIGHT;
+        TURN RIGHT;
+        MOVE;
+        TURN RIGHT;
+        TURN RIGHT;
+        n = n + %d;
+    ENDWHILE;
+    REPORT n;
+}
+"""
+
+
+@pytest.mark.parametrize('mode', ['tree', 'stack'])
+def test_terminating_loop_back_at_the_same_cell_runs_to_the_end(pipeline, mode):
+    result = pipeline.run(PACING % (40, 1), mode=mode, detect_cycles=True, max_steps=10000)
+    assert result.ok, result.errors
+    assert result.state.halt_reason is None
+    assert result.state.outputs[-1].endswith('40')
+
+
+@pytest.mark.parametrize('mode', ['tree', 'stack'])
+def test_loop_repeating_its_state_is_stopped(pipeline, mode):
+    result = pipeline.run(PACING % (40, 0), mode=mode, detect_cycles=True, max_steps=10000)
+    assert result.ok, result.errors
+    assert result.state.halt_reason == 'non-terminating loop'
+
+
+def _state(moves):
+    """A state at (2, 2) whose history took `moves` (cells) from there and back."""
+    history = PathHistory()
+    history.reset((2, 2))
+    for cell in moves:
+        history.append(cell)
+    return SimpleNamespace(agent_x=history.x, agent_y=history.y, agent_dir='E', visited={(2, 2)},
+                           dirt=set(), history=history)
+
+
+def _colliding(*states):
+    for state in states:
+        state.history.hash = 12345
+    return states
+
+
+def test_hash_collision_does_not_stop_the_loop():
+    detector = CycleDetector(track_history=True)
+    watch = detector.enter_loop()
+    frames = [SimpleNamespace(locals={'n': 0})]
+    east, west, north = _colliding(_state([(3, 2), (2, 2)]), _state([(1, 2), (2, 2)]),
+                                   _state([(2, 1), (2, 2)]))
+    assert len(east.history) == len(west.history) and list(east.history) != list(west.history)
+    for state in (east, west, north, east, west, north):
+        detector.back_edge(watch, state, frames)
+
+
+def test_exact_repeat_with_history_is_stopped_one_period_later():
+    detector = CycleDetector(track_history=True)
+    watch = detector.enter_loop()
+    frames = [SimpleNamespace(locals={'n': 0})]
+    east, west = _state([(3, 2), (2, 2)]), _state([(1, 2), (2, 2)])
+    detector.back_edge(watch, east, frames)
+    detector.back_edge(watch, west, frames)
+    detector.back_edge(watch, east, frames)
+    detector.back_edge(watch, west, frames)
+    with pytest.raises(NonTerminatingLoop) as stopped:
+        detector.back_edge(watch, east, frames)
+    assert stopped.value.iterations == 2
+
+
+def test_without_history_a_repeat_stops_at_once():
+    detector = CycleDetector(track_history=False)
+    watch = detector.enter_loop()
+    frames = [SimpleNamespace(locals={'n': 0})]
+    east, west = _state([(3, 2), (2, 2)]), _state([(1, 2), (2, 2)])
+    detector.back_edge(watch, east, frames)
+    with pytest.raises(NonTerminatingLoop):
+        detector.back_edge(watch, west, frames)
@@ -0,0 +1,133 @@
+"""Monte Carlo evaluation over seeded world variants."""
+
+import json
+import sys
+
+import pytest
+
+import evaluator
+from conftest import SWEEP_PROGRAM
+from evaluator import Distribution, EvaluationStats, VariantSpec, evaluate
+from interpreter import Interpreter
+
+SPEC = VariantSpec(shuffle_dirt=True, obstacle_shift=30, entry_dirs='NESW')
+
+RUNAWAY = """
+WORLD Room {
+    SIZE(4, 4);
+    ENTRY_DEF(1, 1, E);
+}
+
+AGENT Spinner {
+    WHILE 0 LT 1 DO
+        TURN RIGHT;
+    ENDWHILE;
+}
+"""
+
+
+def _variant(ast, seed, spec=SPEC):
+    interp = Interpreter()
+    interp.load(ast)
+    spec.apply(interp.state, seed)
+    return interp.state
+
+
+def test_variants_keep_amounts_and_depend_only_on_the_seed(analyze):
+    ast = analyze(SWEEP_PROGRAM)
+    base = _variant(ast, 0, VariantSpec())
+    a, b, c = _variant(ast, 1), _variant(ast, 1), _variant(ast, 2)
+    assert (sorted(a.dirt), sorted(a.obstacles), a.agent_dir) == (sorted(b.dirt), sorted(b.obstacles), b.agent_dir)
+    assert sorted(a.dirt) != sorted(c.dirt)
+    for state in (a, c):
+        assert len(state.dirt) == len(base.dirt)
+        assert len(state.obstacles) == len(base.obstacles)
+        assert not set(state.dirt) & set(state.obstacles)
+        assert state.entry not in state.obstacles and state.exit not in state.obstacles
+        assert state.agent_dir in 'NESW'
+
+
+@pytest.mark.parametrize('kwargs', [{'obstacle_shift': 101}, {'entry_dirs': 'NX'}, {'entry_dirs': ''}])
+def test_bad_specs_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        VariantSpec(**kwargs)
+
+
+def test_parallel_and_serial_evaluations_agree(analyze):
+    ast = analyze(SWEEP_PROGRAM)
+    serial = list(evaluate(ast, SPEC, range(24), workers=1, max_steps=10000))
+    parallel = list(evaluate(ast, SPEC, range(24), workers=2, batch_size=5, max_steps=10000))
+    assert len(serial) == len(parallel) == 1
+    assert serial[0].summary() == parallel[0].summary()
+    assert serial[0].runs == 24 and serial[0].errors == 0
+
+
+def test_statistics_stream_while_running(analyze):
+    ast = analyze(SWEEP_PROGRAM)
+    runs = [stats.runs for stats in evaluate(ast, SPEC, range(25), workers=1, report_every=10)]
+    assert runs == [10, 20, 25]
+
+
+def test_stats_match_the_runs(analyze):
+    ast = analyze(SWEEP_PROGRAM)
+    results = [evaluator.run_variant(ast, SPEC, seed) for seed in range(10)]
+    stats = EvaluationStats()
+    for result in results:
+        stats.add(result)
+    stats.add({'seed': 99, 'error': 'boom'})
+    assert (stats.runs, stats.errors) == (10, 1)
+    assert stats.exit_rate == sum(r['exit_reached'] for r in results) / 10
+    steps = stats.metrics['steps']
+    assert steps.mean == sum(r['steps'] for r in results) / 10
+    assert steps.max == max(r['steps'] for r in results)
+
+
+def test_distribution_percentiles_and_histogram():
+    dist = Distribution()
+    for value in [1, 2, 2, 3, 3, 3, 10]:
+        dist.add(value)
+    assert (dist.min, dist.max, dist.mean) == (1, 10, 24 / 7)
+    assert [dist.percentile(p) for p in (1, 50, 90, 100)] == [1, 3, 10, 10]
+    assert dist.histogram(bins=5) == [(1, 2, 3), (3, 4, 3), (5, 6, 0), (7, 8, 0), (9, 10, 1)]
+
+
+def test_distribution_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr(evaluator, 'MAX_BUCKETS', 16)
+    dist = Distribution()
+    for value in range(1000):
+        dist.add(value)
+    assert len(dist.counts) <= 16
+    assert (dist.n, dist.min, dist.max, dist.mean) == (1000, 0, 999, 499.5)
+    assert abs(dist.percentile(50) - 500) <= dist.width
+    assert sum(count for _, _, count in dist.histogram()) == 1000
+
+
+def test_runaway_variants_stop_at_the_default_step_limit(pipeline):
+    ast = pipeline.run(RUNAWAY, max_steps=0).ast
+    stats = list(evaluate(ast, VariantSpec(), range(3), workers=1))[-1]
+    assert (stats.runs, stats.halts) == (3, {'step limit': 3})
+    assert stats.metrics['steps'].max == evaluator.DEFAULT_MAX_STEPS
+
+
+def _main(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, 'argv', ['evaluator.py', *args])
+    with pytest.raises(SystemExit) as exit:
+        evaluator.main()
+    return exit.value.code, capsys.readouterr().out
+
+
+@pytest.mark.parametrize('option', ['--max-steps', '--workers', '--every'])
+@pytest.mark.parametrize('value', ['0', '-1'])
+def test_cli_rejects_non_positive_counts(monkeypatch, capsys, option, value):
+    code, out = _main(monkeypatch, capsys, option, value, SWEEP_PROGRAM)
+    assert code == 1 and f"{option} must be a positive number" in out
+
+
+def test_cli_runs_with_the_given_step_limit(monkeypatch, capsys, tmp_path):
+    program = tmp_path / 'runaway.cl'
+    program.write_text(RUNAWAY)
+    monkeypatch.setattr(sys, 'argv', ['evaluator.py', '--seeds', '4', '--workers', '1', '--max-steps', '50',
+                                      '--json', str(program)])
+    evaluator.main()
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary['runs'], summary['halts'], summary['steps']['max']) == (4, {'step limit': 4}, 50)
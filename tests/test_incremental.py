@@ -0,0 +1,63 @@
+"""The incremental front end gives the same results as a cold analysis, cached or not."""
+
+import pytest
+
+from conftest import SAMPLE_PROGRAMS, SWEEP_PROGRAM, read
+from incremental import IncrementalFrontEnd
+from semantics_analyzer.semantic import SemanticAnalyzer
+
+
+def _cold(pipeline, text):
+    cst, errors, _ = pipeline.parse(text)
+    if cst is None:
+        return None, errors, None
+    analyzer = SemanticAnalyzer()
+    ast, errors = analyzer.analyze(cst)
+    return repr(ast), errors, analyzer.cost_profile
+
+
+def _incremental(front_end, text):
+    cst, ast, errors = front_end.analyze(text)
+    return (None if ast is None else repr(ast)), errors, front_end.cost_profile
+
+
+@pytest.mark.parametrize('path', SAMPLE_PROGRAMS + [SWEEP_PROGRAM])
+def test_first_analysis_matches_cold_analysis(pipeline, path):
+    text = read(path)
+    assert _incremental(IncrementalFrontEnd(), text) == _cold(pipeline, text)
+
+
+def test_cache_hits_and_misses_match_cold_analysis(pipeline):
+    front_end = IncrementalFrontEnd()
+    original = read(SWEEP_PROGRAM)
+    edited = original.replace("RETURN count(K - 1) + 1;", "RETURN count(K - 1) + 2;")
+    moved = "// a comment that shifts every line\n\n" + original
+
+    assert _incremental(front_end, original) == _cold(pipeline, original)
+    assert front_end.stats['reparsed'] == 3
+
+    assert _incremental(front_end, edited) == _cold(pipeline, edited)
+    assert (front_end.stats['reparsed'], front_end.stats['reanalyzed']) == (1, 1)
+
+    assert _incremental(front_end, moved) == _cold(pipeline, moved)
+    assert (front_end.stats['reparsed'], front_end.stats['reanalyzed']) == (1, 1)
+
+    assert _incremental(front_end, moved) == _cold(pipeline, moved)
+    assert (front_end.stats['reparsed'], front_end.stats['reanalyzed']) == (0, 0)
+
+
+def test_semantic_errors_match_cold_analysis(pipeline):
+    text = read(SWEEP_PROGRAM).replace("n = n + 1;", "n = m + 1;")
+    result = _incremental(IncrementalFrontEnd(), text)
+    assert result[1] and result[2] is None
+    assert result == _cold(pipeline, text)
+
+
+def test_syntax_errors_keep_their_line_numbers(pipeline):
+    text = read(SWEEP_PROGRAM).replace("BACKTRACK;\n    BACKTRACK;", "BACKTRACK;\n    BACKTRACK BACKTRACK;")
+    cst, errors, _ = pipeline.parse(text)
+    assert cst is None and errors
+    front_end = IncrementalFrontEnd()
+    assert front_end.analyze(text) == (None, None, errors)
+    assert front_end.cost_profile is None
+    assert 'line=27' in errors[0]
@@ -0,0 +1,53 @@
+"""Tree-walking and stack-machine execution give the same runs."""
+
+import pytest
+
+from conftest import SAMPLE_PROGRAMS, SWEEP_PROGRAM
+from interpreter import Interpreter
+
+DEEP_PROGRAM = """
+WORLD Deep {
+    SIZE(3, 3);
+    ENTRY_DEF(1, 1, N);
+    EXIT_DEF(3, 3, S);
+}
+
+FUNC depth(K) RETURNS INT {
+    IF K LT 1 THEN
+        RETURN 0;
+    ELSE
+        RETURN depth(K - 1) + 1;
+    ENDIF;
+}
+
+AGENT Diver {
+    REPORT depth(%d);
+}
+"""
+
+
+@pytest.mark.parametrize('path', SAMPLE_PROGRAMS + [SWEEP_PROGRAM])
+def test_stack_mode_matches_tree_mode(analyze, path):
+    tree = Interpreter(mode='tree').execute(analyze(path))
+    stack = Interpreter(mode='stack').execute(analyze(path))
+    assert stack.summary() == tree.summary()
+    assert sorted(stack.visited) == sorted(tree.visited)
+    assert sorted(stack.dirt) == sorted(tree.dirt)
+
+
+@pytest.mark.parametrize('mode', ['tree', 'stack'])
+def test_tail_calls_do_not_change_results(analyze, mode):
+    with_tco = Interpreter(mode=mode, tail_calls=True).execute(analyze(SWEEP_PROGRAM))
+    without = Interpreter(mode=mode, tail_calls=False).execute(analyze(SWEEP_PROGRAM))
+    assert with_tco.summary() == without.summary()
+
+
+def test_stack_mode_runs_recursion_deeper_than_python(pipeline):
+    result = pipeline.run(DEEP_PROGRAM % 20000, mode='stack', memo_size=0)
+    assert result.ok, result.errors
+    assert result.state.outputs == ['[REPORT] 20000']
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        Interpreter(mode='jit')
@@ -0,0 +1,66 @@
+"""The PLY lexer, FastLexer and TokenBuffer produce the same tokens."""
+
+import pytest
+
+import lexer as lexer_module
+from conftest import BROKEN_PROGRAMS, SAMPLE_PROGRAMS, SWEEP_PROGRAM, read
+from parser.parser import new_lexer
+from pipeline import Pipeline
+from token_buffer import TokenBuffer
+
+BAD_CHARACTERS = "VAR x = 1 $ 2;\nREPORT x @;\n"
+
+
+def _lex(scanner, text, errors=None):
+    lexer = new_lexer(scanner)
+    lexer.lineno = 1
+    lexer.errors = errors
+    lexer.input(text)
+    return [(tok.type, tok.value, tok.lineno, tok.lexpos) for tok in iter(lexer.token, None)]
+
+
+def _buffered(buffer):
+    return [(tok.type, tok.value, tok.lineno, tok.lexpos) for tok in iter(buffer.token, None)]
+
+
+@pytest.mark.parametrize('path', SAMPLE_PROGRAMS + BROKEN_PROGRAMS + [SWEEP_PROGRAM])
+def test_all_lexers_agree(path):
+    text = read(path)
+    expected = _lex('ply', text)
+    assert expected
+    assert _lex('fast', text) == expected
+    assert _buffered(TokenBuffer(text)) == expected
+
+
+def test_token_buffer_columns():
+    buffer = TokenBuffer(read(SWEEP_PROGRAM))
+    tokens = _lex('ply', read(SWEEP_PROGRAM))
+    assert len(buffer) == len(tokens)
+    for i, (kind, value, lineno, _) in enumerate(tokens):
+        assert (buffer.type(i), buffer.value(i), buffer.line(i)) == (kind, value, lineno)
+
+
+@pytest.mark.parametrize('scanner', ['ply', 'fast', 'buffer'])
+def test_illegal_characters_are_collected_not_printed(capsys, scanner):
+    errors = []
+    if scanner == 'buffer':
+        tokens = _buffered(TokenBuffer(BAD_CHARACTERS, errors))
+    else:
+        tokens = _lex(scanner, BAD_CHARACTERS, errors)
+    assert errors == ["[LEXICAL ERROR] Illegal character '$' at line 1",
+                      "[LEXICAL ERROR] Illegal character '@' at line 2"]
+    assert [kind for kind, _, _, _ in tokens] == ['VAR', 'ID', 'ASSIGN', 'INT_LIT', 'INT_LIT', 'SEMICOLON',
+                                                  'REPORT', 'ID', 'SEMICOLON']
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('scanner', ['ply', 'fast'])
+def test_pipeline_parses_leave_the_lexer_tables_alone(scanner):
+    pipeline = Pipeline(scanner=scanner)
+    symbols, literals = dict(lexer_module.symbol_table), dict(lexer_module.literal_table)
+    for i in range(50):
+        text = read(SWEEP_PROGRAM).replace("VAR n = 0;", f"VAR n = 0;\n    VAR name{i} = {1000 + i};")
+        cst, errors, _ = pipeline.parse(text)
+    assert cst is not None, errors
+    assert lexer_module.symbol_table == symbols
+    assert lexer_module.literal_table == literals
@@ -0,0 +1,78 @@
+"""Worlds loaded from map files."""
+
+import pytest
+
+from interpreter import Interpreter
+from map_file import MapGrid
+
+MAP_PROGRAM = """
+WORLD Floor {
+    MAP_FILE("floor.pgm");
+    ENTRY_DEF(1, 1, E);
+    EXIT_DEF(6, 4, S);
+}
+
+AGENT Mopper {
+    VAR n = 0;
+    WHILE n LT 8 DO
+        IF SENSE DIRT THEN CLEAN; ELSE REPORT n; ENDIF;
+        MOVE;
+        n = n + 1;
+    ENDWHILE;
+}
+"""
+
+# 6x4 PGM: a wall at x = 4 on the first row, dirt (gray) at x = 2 and 3
+PIXELS = bytes([255, 128, 128, 0, 255, 255] + [255] * 18)
+
+
+@pytest.fixture
+def floor(tmp_path):
+    (tmp_path / 'floor.pgm').write_bytes(b'P5\n# test floor\n6 4\n255\n' + PIXELS)
+    return tmp_path
+
+
+def test_map_world_runs_and_closes_its_mapping(pipeline, floor):
+    result = pipeline.run(MAP_PROGRAM, base_dir=str(floor))
+    assert result.ok, result.errors
+    state = result.state
+    assert (state.width, state.height) == (6, 4)
+    assert state.cleaned_dirt == 2 and state.blocked_moves == 6
+    assert (state.agent_x, state.agent_y) == (3, 1)
+    assert state.dirt.grid.mm is None
+    assert len(state.dirt) == 0
+
+
+def test_clean_never_writes_the_file(pipeline, floor):
+    pipeline.run(MAP_PROGRAM, base_dir=str(floor))
+    assert (floor / 'floor.pgm').read_bytes().endswith(PIXELS)
+
+
+def test_paused_run_keeps_its_mapping(pipeline, floor):
+    ast = pipeline.run(MAP_PROGRAM, base_dir=str(floor)).ast
+    interp = Interpreter(mode='stack')
+    interp.load(ast)
+    interp.run_until(5)
+    assert interp.state.dirt.grid.mm is not None
+    interp.resume()
+    assert interp.state.dirt.grid.mm is None
+
+
+@pytest.mark.parametrize('size, message', [((6, 4), 'shorter than a 6x4 map'), ((None, None), 'shorter than any map')])
+def test_empty_file_is_rejected(tmp_path, size, message):
+    (tmp_path / 'empty.pgm').write_bytes(b'')
+    with pytest.raises(ValueError, match=message):
+        MapGrid(str(tmp_path / 'empty.pgm'), *size)
+
+
+def test_truncated_and_raw_maps(tmp_path):
+    (tmp_path / 'short.pgm').write_bytes(b'P5 6 4 255\n' + PIXELS[:10])
+    with pytest.raises(ValueError, match='shorter than a 6x4 map'):
+        MapGrid(str(tmp_path / 'short.pgm'))
+    (tmp_path / 'raw.bin').write_bytes(bytes([0, 1, 2, 0]))
+    with pytest.raises(ValueError, match='needs a SIZE'):
+        MapGrid(str(tmp_path / 'raw.bin'))
+    grid = MapGrid(str(tmp_path / 'raw.bin'), 2, 2)
+    assert [grid.code(x, y) for y in range(2) for x in range(2)] == [0, 1, 2, 0]
+    grid.close()
+    grid.close()
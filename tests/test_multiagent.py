@@ -0,0 +1,56 @@
+"""Multi-agent runtime over one shared world."""
+
+from conftest import SWEEP_PROGRAM
+from interpreter import Interpreter
+from multiagent import MultiAgentRuntime
+
+
+def _runtime(ast, starts):
+    runtime = MultiAgentRuntime(ast.children[0], quantum=50)
+    for start in starts:
+        runtime.add_agent(ast, start=start)
+    return runtime.run()
+
+
+def test_single_agent_matches_a_standalone_run(analyze):
+    ast = analyze(SWEEP_PROGRAM)
+    alone = Interpreter(mode='stack').execute(analyze(SWEEP_PROGRAM))
+    agent = _runtime(ast, [None]).agents[0].interp.state
+    assert (agent.agent_x, agent.agent_y, agent.cleaned_dirt) == (alone.agent_x, alone.agent_y, alone.cleaned_dirt)
+    assert agent.outputs == alone.outputs
+
+
+def test_agents_share_the_dirt(analyze):
+    ast = analyze(SWEEP_PROGRAM)
+    loaded = Interpreter()
+    loaded.load(ast)
+    total = len(loaded.state.dirt)
+    summary = _runtime(ast, [None, (1, 8, 'N'), (12, 1, 'W')]).summary()
+    assert summary['halt_reason'] is None
+    assert summary['cleaned_dirt'] == sum(agent['cleaned_dirt'] for agent in summary['agents'])
+    assert summary['cleaned_dirt'] + summary['remaining_dirt'] == total
+
+
+def test_runs_are_deterministic(analyze):
+    starts = [None, None, (1, 8, 'N')]  # two agents start on the entry
+    first = _runtime(analyze(SWEEP_PROGRAM), starts).summary()
+    assert _runtime(analyze(SWEEP_PROGRAM), starts).summary() == first
+    assert first['collisions'] > 0
+
+
+def test_tick_limit(analyze):
+    runtime = MultiAgentRuntime(analyze(SWEEP_PROGRAM).children[0], quantum=1, max_ticks=5)
+    runtime.add_agent(analyze(SWEEP_PROGRAM))
+    assert runtime.run().summary()['halt_reason'] == 'tick limit'
+
+
+def test_world_is_built_once(analyze, monkeypatch):
+    built = []
+    init_world = Interpreter._init_world
+    monkeypatch.setattr(Interpreter, '_init_world', lambda self, world: built.append(world) or init_world(self, world))
+    ast = analyze(SWEEP_PROGRAM)
+    runtime = _runtime(ast, [None, None, (1, 8, 'N'), (12, 1, 'W')])
+    assert len(built) == 1
+    states = [task.interp.state for task in runtime.agents]
+    assert all(state.dirt is runtime.dirt and state.obstacles is runtime.obstacles for state in states)
+    assert len({id(state.visited) for state in states}) == 4
@@ -0,0 +1,52 @@
+"""The LALR and recursive-descent parsers build the same CSTs from every token source."""
+
+import pytest
+
+from conftest import BROKEN_PROGRAMS, SAMPLE_PROGRAMS, SWEEP_PROGRAM, read
+from parser.parser import new_lexer, parse_with_errors
+from token_buffer import TokenBuffer
+from token_stream import TokenStream, lex_to_stream
+
+ENGINES = ['lalr', 'descent']
+
+
+def _parse(text, source, engine):
+    if source == 'stream':
+        return parse_with_errors(stream=TokenStream(lex_to_stream(new_lexer(), text)), engine=engine)
+    if source == 'buffer':
+        return parse_with_errors(stream=TokenBuffer(text), engine=engine)
+    return parse_with_errors(text=text, scanner=source, engine=engine)
+
+
+@pytest.mark.parametrize('path', SAMPLE_PROGRAMS + [SWEEP_PROGRAM])
+def test_every_engine_and_token_source_builds_the_same_cst(path):
+    text = read(path)
+    expected, errors = _parse(text, 'ply', 'lalr')
+    assert expected is not None and errors == []
+    for engine in ENGINES:
+        for source in ('ply', 'fast', 'stream', 'buffer'):
+            cst, errors = _parse(text, source, engine)
+            assert errors == [], (engine, source)
+            assert str(cst) == str(expected), (engine, source)
+
+
+@pytest.mark.parametrize('path', BROKEN_PROGRAMS)
+def test_engines_report_the_same_syntax_errors(path):
+    text = read(path)
+    lalr_cst, lalr_errors = _parse(text, 'ply', 'lalr')
+    descent_cst, descent_errors = _parse(text, 'ply', 'descent')
+    assert lalr_errors
+    assert descent_errors == lalr_errors
+    assert str(descent_cst) == str(lalr_cst)
+
+
+def test_recovery_reports_every_bad_statement():
+    text = read(SWEEP_PROGRAM).replace('n = n + 1;', 'n = + 1;').replace('REPORT DIRT_DIST;', 'REPORT ;')
+    for engine in ENGINES:
+        _, errors = _parse(text, 'ply', engine)
+        assert len(errors) == 2, (engine, errors)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        parse_with_errors(text=read(SWEEP_PROGRAM), engine='earley')
@@ -0,0 +1,73 @@
+"""DIRT_RANDOM / OBSTACLE_RANDOM: seeded, exact counts, never on each other or the ends."""
+
+import pytest
+
+from interpreter import Interpreter
+
+WORLD = """
+WORLD Field {{
+    SIZE(40, 25);
+    ENTRY_DEF(3, 3, E);
+    EXIT_DEF(40, 25, S);
+    OBSTACLE_RECT(10, 10, 19, 12);
+    DIRT_RECT(1, 20, 40, 20);
+    DIRT_DEF(5, 5);
+    {fills}
+}}
+
+AGENT Idle {{
+    REPORT DIRT_COUNT;
+}}
+"""
+
+
+def _world(pipeline, fills, world_store='set'):
+    result = pipeline.run(WORLD.format(fills=fills), max_steps=0)
+    assert result.ast is not None, result.errors
+    interp = Interpreter(world_store=world_store)
+    interp.load(result.ast)
+    return interp.state
+
+
+def _cells(layer):
+    return set(layer)
+
+
+@pytest.mark.parametrize('world_store', ['set', 'chunked'])
+def test_same_seed_same_world(pipeline, world_store):
+    fills = "OBSTACLE_RANDOM(20, 7); DIRT_RANDOM(10, 11);"
+    first, second = _world(pipeline, fills, world_store), _world(pipeline, fills, world_store)
+    assert _cells(first.obstacles) == _cells(second.obstacles)
+    assert _cells(first.dirt) == _cells(second.dirt)
+    other = _world(pipeline, "OBSTACLE_RANDOM(20, 8); DIRT_RANDOM(10, 11);", world_store)
+    assert _cells(other.obstacles) != _cells(first.obstacles)
+    assert _world(pipeline, fills, 'set').summary() == first.summary()
+
+
+def test_fills_add_exact_counts_on_free_cells_only(pipeline):
+    plain = _world(pipeline, "")
+    state = _world(pipeline, "OBSTACLE_RANDOM(20, 7); DIRT_RANDOM(10, 11); DIRT_RANDOM(5, 3);")
+    total = 40 * 25
+    obstacles, dirt = _cells(state.obstacles), _cells(state.dirt)
+    assert len(state.obstacles) == len(obstacles) == len(plain.obstacles) + total * 20 // 100
+    assert len(state.dirt) == len(dirt) == len(plain.dirt) + total * 10 // 100 + total * 5 // 100
+    assert not obstacles & dirt
+    assert not obstacles & {(3, 3), (40, 25)}
+    assert _cells(plain.obstacles) <= obstacles and _cells(plain.dirt) <= dirt
+
+
+def test_fill_larger_than_the_free_cells_takes_them_all(pipeline):
+    state = _world(pipeline, "OBSTACLE_RANDOM(90, 1); DIRT_RANDOM(50, 2);")
+    assert len(state.obstacles) == 30 + 900
+    # dirt takes every cell left, the entry and exit included
+    assert len(state.obstacles) + len(state.dirt) == 40 * 25
+    assert not _cells(state.obstacles) & _cells(state.dirt)
+    assert {(3, 3), (40, 25)} <= _cells(state.dirt)
+
+
+def test_cleaning_a_filled_cell(pipeline):
+    state = _world(pipeline, "DIRT_RANDOM(10, 11);")
+    before = len(state.dirt)
+    cell = next(c for c in state.dirt if c[1] != 20 and c != (5, 5))
+    state.dirt.discard(cell)
+    assert cell not in state.dirt and len(state.dirt) == before - 1
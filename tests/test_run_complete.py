@@ -0,0 +1,114 @@
+"""The run_complete command line, including --watch mode."""
+
+import sys
+import time
+
+import pytest
+
+import run_complete
+
+FINITE = """
+WORLD Room {
+    SIZE(6, 4);
+    ENTRY_DEF(1, 1, E);
+    DIRT_DEF(3, 1);
+}
+
+AGENT Walker {
+    MOVE;
+    MOVE;
+    CLEAN;
+}
+"""
+
+FOREVER = """
+WORLD Room {
+    SIZE(6, 4);
+    ENTRY_DEF(1, 1, E);
+}
+
+AGENT Spinner {
+    WHILE 0 LT 1 DO
+        TURN RIGHT;
+    ENDWHILE;
+}
+"""
+
+MAPPED = """
+WORLD Floor {
+    MAP_FILE("floor.pgm");
+    ENTRY_DEF(1, 1, E);
+}
+
+AGENT Mopper {
+    MOVE;
+    CLEAN;
+}
+"""
+
+
+@pytest.fixture
+def programs(tmp_path):
+    folder = tmp_path / 'programs'
+    folder.mkdir()
+    (folder / 'finite.cl').write_text(FINITE)
+    (folder / 'forever.cl').write_text(FOREVER)
+    (folder / 'mapped.cl').write_text(MAPPED)
+    # 6x4 PGM with dirt (gray) at x = 2 on the first row
+    (folder / 'floor.pgm').write_bytes(b'P5\n6 4\n255\n' + bytes([255, 128] + [255] * 22))
+    return folder
+
+
+@pytest.fixture
+def cli(monkeypatch, capsys, tmp_path):
+    """cli(*args) runs run_complete's main and returns (exit code, stdout)."""
+    outputs = tmp_path / 'output'
+    outputs.mkdir()
+    monkeypatch.setattr(run_complete, 'output_path_for', lambda f: str(outputs / (f.rsplit('/', 1)[-1] + '.txt')))
+    monkeypatch.setattr(run_complete, 'write_cst_to_file', lambda cst, f, quiet=False: None)
+    # not the programs' folder: a relative MAP_FILE only loads if resolved against the program's folder
+    monkeypatch.chdir(tmp_path)
+
+    def stop_watching(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, 'sleep', stop_watching)
+
+    def cli(*args):
+        monkeypatch.setattr(sys, 'argv', ['run_complete.py', *args])
+        with pytest.raises(SystemExit) as exit:
+            run_complete.main()
+        return exit.value.code, capsys.readouterr().out
+    return cli
+
+
+def test_watch_applies_cost_admission_and_map_paths(cli, programs):
+    code, out = cli('--max-cost', '500', '--watch', str(programs))
+    assert code == 0
+    lines = {line.split(': ', 1)[0].split('] ')[-1]: line for line in out.splitlines() if line.startswith('[')}
+    assert 'ok in' in lines['finite.cl'] and 'dirt cleaned 1' in lines['finite.cl']
+    assert 'ok in' in lines['mapped.cl'] and 'dirt cleaned 1' in lines['mapped.cl']
+    assert 'rejected in' in lines['forever.cl']
+    assert 'WHILE 0 LT 1 in agent Spinner never terminates' in out
+
+
+def test_watch_with_show_cost_and_check_cost(cli, programs):
+    code, out = cli('--cost', '--check-cost', '--watch', str(programs))
+    assert code == 0
+    assert out.count('Static cost:') == 3
+    assert 'forever.cl: rejected in' in out
+
+
+def test_cost_alone_only_shows_the_profile(cli, programs):
+    code, out = cli('--print', '--cost', '--max-steps', '50', str(programs / 'forever.cl'))
+    assert code == 0
+    assert 'Static cost:' in out and 'Rejected' not in out
+    assert 'Steps: 50' in out
+
+
+@pytest.mark.parametrize('every, code', [('0', 1), ('-3', 1), ('7', 0)])
+def test_checkpoint_interval_is_checked(cli, programs, tmp_path, every, code):
+    checkpoint = tmp_path / 'run.ckpt'
+    result, out = cli('--checkpoint', str(checkpoint), '--checkpoint-every', every, str(programs / 'finite.cl'))
+    assert result == code
+    assert checkpoint.exists() == (code == 0)
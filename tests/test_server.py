@@ -0,0 +1,181 @@
+"""Execution server: request validation, path confinement and error responses."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import SWEEP_PROGRAM, read
+from server import ExecutionServer, send_request
+
+LOOP_FOREVER = read(SWEEP_PROGRAM).replace('WHILE n LT count(40) DO', 'WHILE 0 LT 1 DO')
+
+
+@pytest.fixture(scope='module')
+def root(tmp_path_factory):
+    root = tmp_path_factory.mktemp('root')
+    (root / 'sweep.cl').write_text(read(SWEEP_PROGRAM))
+    outside = tmp_path_factory.mktemp('outside')
+    (outside / 'secret.cl').write_text(read(SWEEP_PROGRAM))
+    os.symlink(outside / 'secret.cl', root / 'link.cl')
+    return root, outside
+
+
+def _serve(**options):
+    app = ExecutionServer(port=0, workers=1, **options)
+    thread = threading.Thread(target=app.serve_forever)
+    thread.start()
+    return app, thread
+
+
+@pytest.fixture(scope='module')
+def app(root):
+    (root[0] / 'floor.pgm').write_bytes(b'P5\n6 4\n255\n' + bytes([255, 128] + [255] * 22))
+    (root[1] / 'floor.pgm').write_bytes(b'P5\n6 4\n255\n' + bytes([255, 128] + [255] * 22))
+    os.mkfifo(root[0] / 'fifo.pgm')
+    app, thread = _serve(root=str(root[0]))
+    yield app
+    app.stop()
+    thread.join()
+
+
+def ask(app, request):
+    return app.handle_line(json.dumps(request).encode('utf-8'))
+
+
+def test_run_over_tcp(app):
+    response = send_request({'id': 7, 'source': read(SWEEP_PROGRAM)}, port=app.address[1])
+    assert response['ok'] and response['id'] == 7
+    assert response['state']['position'] == [12, 8]
+
+
+def test_run_by_path_under_the_root(app):
+    response = ask(app, {'path': 'sweep.cl', 'options': {'mode': 'stack'}})
+    assert response['ok'], response
+    assert response['state']['cleaned_dirt'] == 3
+
+
+@pytest.mark.parametrize('kind', ['dotdot', 'symlink', 'absolute'])
+def test_paths_outside_the_root_are_refused(app, root, kind):
+    inside, outside = root
+    path = {'dotdot': os.path.relpath(outside / 'secret.cl', inside),
+            'symlink': 'link.cl',
+            'absolute': str(outside / 'secret.cl')}[kind]
+    response = ask(app, {'path': path})
+    assert not response['ok']
+    assert 'outside the server root' in response['error']
+
+
+def test_missing_file(app):
+    response = ask(app, {'path': 'nope.cl'})
+    assert response == {'ok': False, 'error': 'file not found: nope.cl'}
+
+
+@pytest.mark.parametrize('option', ['checkpoint_path', 'checkpoint_every', 'resume_from', 'seek_step', 'bogus'])
+def test_file_and_unknown_options_are_refused(app, tmp_path, option):
+    target = str(tmp_path / 'pwned.txt')
+    response = ask(app, {'source': read(SWEEP_PROGRAM), 'options': {option: target}})
+    assert response == {'ok': False, 'error': f"unknown options: {option}"}
+    assert not os.path.exists(target)
+
+
+@pytest.mark.parametrize('line, error', [
+    (b'not json', 'invalid request'),
+    (b'[1, 2]', 'invalid request: request must be a JSON object'),
+    (b'{"op": "explode"}', 'unknown op: explode'),
+    (b'{"source": "x", "path": "y"}', "give exactly one of 'source' or 'path'"),
+    (b'{}', "give exactly one of 'source' or 'path'"),
+])
+def test_malformed_requests(app, line, error):
+    response = app.handle_line(line)
+    assert not response['ok']
+    assert response['error'].startswith(error)
+
+
+def test_ping_echoes_the_id(app):
+    assert ask(app, {'op': 'ping', 'id': 'a'}) == {'ok': True, 'workers': 1, 'id': 'a'}
+
+
+def test_program_errors_are_reported(app):
+    response = ask(app, {'source': 'WORLD {'})
+    assert not response['ok']
+    assert response['errors']
+
+
+def test_deadline_stops_a_runaway_program(app):
+    response = ask(app, {'source': LOOP_FOREVER, 'timeout': 0.5})
+    assert response['state']['halt_reason'] == 'time limit'
+    assert ask(app, {'op': 'ping'})['ok']
+
+
+def _map_program(path):
+    return f"""
+WORLD Floor {{
+    MAP_FILE("{path}");
+    ENTRY_DEF(1, 1, E);
+}}
+
+AGENT Mopper {{
+    MOVE;
+    CLEAN;
+}}
+"""
+
+
+def test_map_file_under_the_root(app):
+    response = ask(app, {'source': _map_program('floor.pgm')})
+    assert response['ok'], response
+    assert response['state']['cleaned_dirt'] == 1
+
+
+@pytest.mark.parametrize('kind', ['dotdot', 'absolute'])
+def test_map_files_outside_the_root_are_refused(app, root, kind):
+    inside, outside = root
+    path = {'dotdot': os.path.relpath(outside / 'floor.pgm', inside),
+            'absolute': str(outside / 'floor.pgm')}[kind]
+    for request in ({'source': _map_program(path)}, {'path': 'mapped.cl'}):
+        (inside / 'mapped.cl').write_text(_map_program(path))
+        response = ask(app, request)
+        assert not response['ok']
+        assert response['errors'] == [f"MAP_FILE path is outside the allowed directory: {path}"]
+
+
+def test_map_file_that_is_not_a_regular_file_is_refused(app):
+    response = ask(app, {'source': _map_program('fifo.pgm'), 'timeout': 5})
+    assert response['errors'] == ["MAP_FILE is not a regular file: fifo.pgm"]
+
+
+@pytest.mark.parametrize('request_', [
+    {'timeout': 0}, {'timeout': 'soon'}, {'options': {'max_steps': -1}}, {'options': {'max_steps': 1.5}},
+    {'options': [1]},
+])
+def test_bad_limits_are_refused(app, request_):
+    response = ask(app, dict(request_, source=read(SWEEP_PROGRAM)))
+    assert not response['ok'] and 'error' in response
+
+
+def test_server_step_cap_applies_without_and_above_a_request_limit(root):
+    app, thread = _serve(root=str(root[0]), max_steps=5000)
+    try:
+        for options in ({}, {'max_steps': 10 ** 9}):
+            state = ask(app, {'source': LOOP_FOREVER, 'options': options})['state']
+            assert (state['halt_reason'], state['steps']) == ('step limit', 5000)
+    finally:
+        app.stop()
+        thread.join()
+
+
+def test_server_deadline_stops_a_runaway_without_a_timeout(root):
+    app, thread = _serve(root=str(root[0]), timeout=0.5, max_steps=10 ** 12)
+    responses = []
+    client = threading.Thread(target=lambda: responses.append(ask(app, {'source': LOOP_FOREVER})))
+    client.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    app.stop()
+    thread.join(timeout=10)
+    client.join(timeout=10)
+    assert not thread.is_alive() and time.monotonic() - started < 5
+    assert responses[0]['state']['halt_reason'] == 'time limit'
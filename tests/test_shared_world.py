@@ -0,0 +1,67 @@
+"""Worlds built once into shared memory and run in other processes."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from conftest import SWEEP_PROGRAM, read
+from interpreter import Interpreter
+from map_file import DIRT, OBSTACLE
+from shared_world import SharedWorld
+
+
+def _run(args):
+    ast, world = args
+    return Interpreter(shared_world=world).execute(ast).summary()
+
+
+@pytest.fixture
+def sweep(pipeline):
+    # DIRT_DEF outside the SIZE: kept with the handle, not in the grid
+    source = read(SWEEP_PROGRAM).replace('DIRT_RECT(2, 7, 5, 7);', 'DIRT_RECT(2, 7, 5, 7);\n    DIRT_DEF(30, 30);')
+    return pipeline.run(source).ast
+
+
+def test_attached_run_matches_a_plain_run(sweep):
+    plain = Interpreter().execute(sweep).summary()
+    with SharedWorld.create(sweep) as world:
+        assert world.spill_dirt == [(30, 30)]
+        assert _run((sweep, world)) == plain
+
+
+def test_workers_share_one_grid_and_never_write_it(sweep):
+    plain = Interpreter().execute(sweep).summary()
+    with SharedWorld.create(sweep) as world:
+        before = bytes(world._shm.buf)
+        with ProcessPoolExecutor(2) as pool:
+            results = list(pool.map(_run, [(sweep, world)] * 4))
+        assert bytes(world._shm.buf) == before
+        assert before.count(DIRT) == world.counts[DIRT]
+    assert results == [plain] * 4
+
+
+def test_world_needs_a_size(pipeline):
+    source = "WORLD Open {\n    ENTRY_DEF(1, 1, N);\n}\nAGENT Idle {\n    REPORT 1;\n}\n"
+    ast = pipeline.run(source).ast
+    with pytest.raises(ValueError, match='needs a SIZE'):
+        SharedWorld.create(ast)
+
+
+def test_attached_grid_is_read_only_and_counts_freed_cells(sweep):
+    with SharedWorld.create(sweep) as world:
+        interp = Interpreter(shared_world=world)
+        interp.load(sweep)
+        dirt, obstacles = interp.state.dirt, interp.state.obstacles
+        grid = dirt.grid
+        with pytest.raises(TypeError):
+            grid.cells[0] = DIRT
+        total = len(dirt)
+        cells = [cell for cell in dirt if cell != (30, 30)][:3]
+        for cell in cells + cells[:1]:
+            dirt.discard(cell)
+        assert len(dirt) == total - 3 == grid.count(DIRT) + 1
+        assert grid.freed_counts == {DIRT: 3}
+        assert len(obstacles) == world.counts[OBSTACLE]
+        interp.close_maps()
+        interp.close_maps()
+        assert grid.cells is None